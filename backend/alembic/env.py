@@ -10,7 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.config import settings
 from app.core.database import Base
-from app.models import user, platform, category, product, violation, report
+from app.models import user, platform, category, product, violation, report, product_snapshot, product_feature, product_match, ml_analysis, distribution_sketch, sampling_run, daily_rollup
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,28 @@
+"""add normalized quantity to products
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('net_quantity', sa.Float(), nullable=True))
+    op.add_column('products', sa.Column('quantity_unit', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('products', 'quantity_unit')
+    op.drop_column('products', 'net_quantity')
@@ -0,0 +1,30 @@
+"""add anomaly_score to products
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('anomaly_score', sa.Float(), nullable=True))
+    # A new enum value can't be used in the transaction that adds it
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE violationtype ADD VALUE IF NOT EXISTS 'PRICING_ANOMALY'")
+
+
+def downgrade() -> None:
+    # Enum values can't be dropped; PRICING_ANOMALY stays in violationtype
+    op.drop_column('products', 'anomaly_score')
@@ -0,0 +1,44 @@
+"""add product_features
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'product_features',
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('mrp', sa.Float(), nullable=True),
+        sa.Column('net_quantity', sa.Float(), nullable=True),
+        sa.Column('quantity_unit', sa.String(), nullable=True),
+        sa.Column('unit_price', sa.Float(), nullable=True),
+        sa.Column('discount_ratio', sa.Float(), nullable=True),
+        sa.Column('compliance_score', sa.Float(), nullable=True),
+        sa.Column('rule_bitmask', sa.BigInteger(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('platform_id', sa.Integer(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+    )
+    op.create_index('ix_product_features_platform_id', 'product_features', ['platform_id'])
+    op.create_index('ix_product_features_category_id', 'product_features', ['category_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_features_category_id', table_name='product_features')
+    op.drop_index('ix_product_features_platform_id', table_name='product_features')
+    op.drop_table('product_features')
@@ -0,0 +1,43 @@
+"""add product matching index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'product_fingerprints',
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('normalized_text', sa.String(), nullable=True),
+        sa.Column('signature', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+    op.create_table(
+        'product_match_keys',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('key', sa.String(length=64), nullable=False),
+    )
+    op.create_index('ix_product_match_keys_product_id', 'product_match_keys', ['product_id'])
+    op.create_index('ix_product_match_keys_key', 'product_match_keys', ['key'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_product_match_keys_key', table_name='product_match_keys')
+    op.drop_index('ix_product_match_keys_product_id', table_name='product_match_keys')
+    op.drop_table('product_match_keys')
+    op.drop_table('product_fingerprints')
@@ -0,0 +1,54 @@
+"""add ml analysis results
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'ml_analysis_runs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('status', sa.Enum('RUNNING', 'COMPLETED', 'FAILED', name='mlrunstatus'), nullable=False),
+        sa.Column('products_analyzed', sa.Integer(), nullable=True),
+        sa.Column('anomaly_count', sa.Integer(), nullable=True),
+        sa.Column('model_versions', sa.JSON(), nullable=True),
+        sa.Column('summary', sa.JSON(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_ml_analysis_runs_id', 'ml_analysis_runs', ['id'])
+    op.create_table(
+        'ml_product_results',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('run_id', sa.Integer(), sa.ForeignKey('ml_analysis_runs.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('product_id', sa.Integer(), sa.ForeignKey('products.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('anomaly_score', sa.Float(), nullable=True),
+        sa.Column('is_anomaly', sa.Boolean(), nullable=False),
+        sa.Column('cluster', sa.Integer(), nullable=True),
+    )
+    op.create_index('ix_ml_product_results_run_anomaly', 'ml_product_results', ['run_id', 'is_anomaly', 'anomaly_score'])
+    op.create_index('ix_ml_product_results_run_cluster', 'ml_product_results', ['run_id', 'cluster', 'product_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_ml_product_results_run_cluster', table_name='ml_product_results')
+    op.drop_index('ix_ml_product_results_run_anomaly', table_name='ml_product_results')
+    op.drop_table('ml_product_results')
+    op.drop_index('ix_ml_analysis_runs_id', table_name='ml_analysis_runs')
+    op.drop_table('ml_analysis_runs')
+    sa.Enum(name='mlrunstatus').drop(op.get_bind(), checkfirst=True)
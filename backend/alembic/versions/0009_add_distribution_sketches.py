@@ -0,0 +1,46 @@
+"""add distribution_sketches
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'distribution_sketches',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('platform_id', sa.Integer(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('mean', sa.Float(), nullable=False),
+        sa.Column('m2', sa.Float(), nullable=False),
+        sa.Column('min_value', sa.Float(), nullable=True),
+        sa.Column('max_value', sa.Float(), nullable=True),
+        sa.Column('digest', sa.LargeBinary(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+    op.create_index('ix_distribution_sketches_key', 'distribution_sketches', ['key'], unique=True)
+    op.create_index('ix_distribution_sketches_platform_id', 'distribution_sketches', ['platform_id'])
+    op.create_index('ix_distribution_sketches_category_id', 'distribution_sketches', ['category_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_distribution_sketches_category_id', table_name='distribution_sketches')
+    op.drop_index('ix_distribution_sketches_platform_id', table_name='distribution_sketches')
+    op.drop_index('ix_distribution_sketches_key', table_name='distribution_sketches')
+    op.drop_table('distribution_sketches')
@@ -0,0 +1,45 @@
+"""add sampling_runs
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'sampling_runs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('platform_id', sa.Integer(), sa.ForeignKey('platforms.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('population_size', sa.Integer(), nullable=False),
+        sa.Column('sample_size', sa.Integer(), nullable=False),
+        sa.Column('scanned_count', sa.Integer(), nullable=False),
+        sa.Column('confidence_level', sa.Float(), nullable=False),
+        sa.Column('estimated_compliance_rate', sa.Float(), nullable=True),
+        sa.Column('variance', sa.Float(), nullable=True),
+        sa.Column('ci_lower', sa.Float(), nullable=True),
+        sa.Column('ci_upper', sa.Float(), nullable=True),
+        sa.Column('strata', sa.JSON(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+    op.create_index('ix_sampling_runs_id', 'sampling_runs', ['id'])
+    op.create_index('ix_sampling_runs_platform_id', 'sampling_runs', ['platform_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sampling_runs_platform_id', table_name='sampling_runs')
+    op.drop_index('ix_sampling_runs_id', table_name='sampling_runs')
+    op.drop_table('sampling_runs')
@@ -0,0 +1,157 @@
+"""add daily rollup tables maintained by triggers
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Statement-level triggers with transition tables: a bulk write of N rows costs one
+# grouped upsert, and updates only move counts for rows whose rollup key changed.
+VIOLATION_KEY = """
+    ({r}.detected_at AT TIME ZONE 'UTC')::date AS day, {p}.platform_id, {p}.category_id,
+    {r}.violation_type::text AS violation_type, {r}.severity::text AS severity, {r}.status::text AS status"""
+VIOLATION_CHANGED = """
+    (o.detected_at, o.product_id, o.violation_type, o.severity, o.status)
+    IS DISTINCT FROM (n.detected_at, n.product_id, n.violation_type, n.severity, n.status)"""
+
+PRODUCT_KEY = """
+    ({r}.created_at AT TIME ZONE 'UTC')::date AS day, {r}.platform_id, {r}.category_id,
+    {r}.compliance_status::text AS compliance_status"""
+PRODUCT_CHANGED = """
+    (o.created_at, o.platform_id, o.category_id, o.compliance_status)
+    IS DISTINCT FROM (n.created_at, n.platform_id, n.category_id, n.compliance_status)"""
+
+
+def _apply_function(name, rollup, columns, key, changed, join_old, join_new):
+    group = ", ".join(str(i) for i in range(1, len(columns) + 1))
+    upsert = (
+        f"INSERT INTO {rollup} AS r ({', '.join(columns)}, count)\n"
+        "        SELECT {columns}, sum(delta) FROM ({rows}) d\n"
+        f"        GROUP BY {group} HAVING sum(delta) <> 0 ORDER BY {group}\n"
+        f"        ON CONFLICT ({', '.join(columns)}) DO UPDATE SET count = r.count + EXCLUDED.count;"
+    ).replace("{columns}", ", ".join(columns))
+    inserted = f"SELECT {key.format(r='n', p='pn')}, 1 AS delta FROM new_rows n {join_new}"
+    deleted = f"SELECT {key.format(r='o', p='po')}, -1 AS delta FROM old_rows o {join_old}"
+    return f"""
+CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {upsert.replace('{rows}', inserted)}
+    ELSIF TG_OP = 'DELETE' THEN
+        {upsert.replace('{rows}', deleted)}
+    ELSE
+        {upsert.replace('{rows}',
+            f"{deleted} JOIN new_rows n ON n.id = o.id WHERE {changed} "
+            f"UNION ALL {inserted} JOIN old_rows o ON o.id = n.id WHERE {changed}")}
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def _create_triggers(table, function):
+    for event, referencing in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        op.execute(
+            f"CREATE TRIGGER {table}_rollup_{event.lower()} AFTER {event} ON {table} "
+            f"REFERENCING {referencing} FOR EACH STATEMENT EXECUTE FUNCTION {function}()"
+        )
+
+
+def create_rollup_triggers():
+    """Trigger functions and triggers that keep the existing rollup tables current"""
+    op.execute(_apply_function(
+        'violation_daily_rollups_apply', 'violation_daily_rollups',
+        ['day', 'platform_id', 'category_id', 'violation_type', 'severity', 'status'],
+        VIOLATION_KEY, VIOLATION_CHANGED,
+        'LEFT JOIN products po ON po.id = o.product_id', 'LEFT JOIN products pn ON pn.id = n.product_id'
+    ))
+    op.execute(_apply_function(
+        'product_daily_rollups_apply', 'product_daily_rollups',
+        ['day', 'platform_id', 'category_id', 'compliance_status'],
+        PRODUCT_KEY, PRODUCT_CHANGED, '', ''
+    ))
+    _create_triggers('violations', 'violation_daily_rollups_apply')
+    _create_triggers('products', 'product_daily_rollups_apply')
+
+
+def drop_rollup_triggers():
+    for table in ('violations', 'products'):
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_rollup_{event} ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS violation_daily_rollups_apply()")
+    op.execute("DROP FUNCTION IF EXISTS product_daily_rollups_apply()")
+
+
+def upgrade() -> None:
+    op.create_table(
+        'violation_daily_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('platform_id', sa.Integer(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('violation_type', sa.String(32), nullable=False),
+        sa.Column('severity', sa.String(16), nullable=True),
+        sa.Column('status', sa.String(16), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        'ux_violation_daily_rollups_key', 'violation_daily_rollups',
+        ['day', 'platform_id', 'category_id', 'violation_type', 'severity', 'status'],
+        unique=True, postgresql_nulls_not_distinct=True
+    )
+    op.create_table(
+        'product_daily_rollups',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('platform_id', sa.Integer(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('compliance_status', sa.String(16), nullable=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        'ux_product_daily_rollups_key', 'product_daily_rollups',
+        ['day', 'platform_id', 'category_id', 'compliance_status'],
+        unique=True, postgresql_nulls_not_distinct=True
+    )
+
+    # Backfill before the triggers exist, so existing rows are counted once
+    op.execute(f"""
+        INSERT INTO violation_daily_rollups (day, platform_id, category_id, violation_type, severity, status, count)
+        SELECT {VIOLATION_KEY.format(r='v', p='p')}, count(*)
+        FROM violations v LEFT JOIN products p ON p.id = v.product_id
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """)
+    op.execute(f"""
+        INSERT INTO product_daily_rollups (day, platform_id, category_id, compliance_status, count)
+        SELECT {PRODUCT_KEY.format(r='p')}, count(*)
+        FROM products p
+        GROUP BY 1, 2, 3, 4
+    """)
+
+    create_rollup_triggers()
+
+
+def downgrade() -> None:
+    drop_rollup_triggers()
+    op.drop_index('ux_product_daily_rollups_key', table_name='product_daily_rollups')
+    op.drop_table('product_daily_rollups')
+    op.drop_index('ux_violation_daily_rollups_key', table_name='violation_daily_rollups')
+    op.drop_table('violation_daily_rollups')
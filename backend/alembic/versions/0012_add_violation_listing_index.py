@@ -0,0 +1,26 @@
+"""add violation listing index
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_violations_detected_at_id', 'violations', ['detected_at', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_violations_detected_at_id', table_name='violations')
@@ -0,0 +1,50 @@
+"""add indexes for the hot filter and sort paths
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, partial index predicate); checked by explain_queries.py
+INDEXES = [
+    ('ix_products_platform_category_id', 'products', ['platform_id', 'category_id', 'id'], None),
+    ('ix_products_category_id_id', 'products', ['category_id', 'id'], None),
+    ('ix_products_compliance_status_id', 'products', ['compliance_status', 'id'], None),
+    ('ix_products_last_scanned', 'products', ['last_scanned'], None),
+    ('ix_violations_status_detected_at_id', 'violations', ['status', 'detected_at', 'id'], None),
+    ('ix_violations_product_id', 'violations', ['product_id'], None),
+    ('ix_violations_officer_detected_at_id', 'violations', ['assigned_officer_id', 'detected_at', 'id'],
+     "assigned_officer_id IS NOT NULL"),
+    ('ix_violations_open_critical', 'violations', ['detected_at', 'id'],
+     "status = 'OPEN' AND severity = 'CRITICAL'"),
+    ('ix_violations_resolved_at', 'violations', ['resolved_at'], "status = 'RESOLVED'"),
+]
+
+
+def upgrade() -> None:
+    # Built concurrently so scans and the API keep writing to both tables
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True, if_not_exists=True,
+                postgresql_where=sa.text(where) if where else None
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
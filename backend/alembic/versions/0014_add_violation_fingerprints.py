@@ -0,0 +1,77 @@
+"""add violation fingerprints and last seen time
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0014'
+down_revision: Union[str, None] = '0013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FINGERPRINT_FUNCTION = """
+CREATE OR REPLACE FUNCTION violation_fingerprint(product_id integer, violation_type violationtype, evidence json)
+RETURNS varchar LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT md5(concat_ws(':', product_id, violation_type, evidence->>'rule_id', (
+        SELECT string_agg(key || '=' || CASE jsonb_typeof(value)
+                                            WHEN 'number' THEN trim_scale(value::numeric)::text
+                                            ELSE value::text END, ',' ORDER BY key)
+        FROM jsonb_each((evidence->'fields')::jsonb)
+    )))
+$$
+"""
+
+# Earlier rescans stored one row per scan; keep the first unresolved row of each
+# fingerprint (preferring one an officer is working on) and dismiss the rest
+COLLAPSE_DUPLICATES = """
+WITH ranked AS (
+    SELECT id,
+           first_value(id) OVER (
+               PARTITION BY fingerprint ORDER BY status = 'IN_PROGRESS' DESC, detected_at, id
+           ) AS keeper,
+           max(last_seen_at) OVER (PARTITION BY fingerprint) AS seen
+    FROM violations
+    WHERE status IN ('OPEN', 'IN_PROGRESS')
+)
+UPDATE violations v
+SET status = CASE WHEN v.id = r.keeper THEN v.status ELSE 'DISMISSED' END,
+    last_seen_at = r.seen,
+    resolved_at = CASE WHEN v.id = r.keeper THEN v.resolved_at ELSE now() END,
+    resolution_notes = CASE WHEN v.id = r.keeper THEN v.resolution_notes
+                            ELSE 'Duplicate of violation ' || r.keeper END
+FROM ranked r
+WHERE v.id = r.id AND (v.id <> r.keeper OR v.last_seen_at < r.seen)
+"""
+
+
+def upgrade() -> None:
+    op.add_column('violations', sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE violations SET last_seen_at = coalesce(detected_at, now())")
+    op.alter_column('violations', 'last_seen_at', server_default=sa.text('now()'))
+
+    op.execute(FINGERPRINT_FUNCTION)
+    op.add_column('violations', sa.Column(
+        'fingerprint', sa.String(length=32),
+        sa.Computed('violation_fingerprint(product_id, violation_type, evidence)', persisted=True)
+    ))
+    op.execute(COLLAPSE_DUPLICATES)
+    op.create_index(
+        'ix_violations_product_fingerprint', 'violations', ['product_id', 'fingerprint'],
+        postgresql_where=sa.text("status <> 'RESOLVED'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_violations_product_fingerprint', table_name='violations')
+    op.drop_column('violations', 'fingerprint')
+    op.execute("DROP FUNCTION IF EXISTS violation_fingerprint(integer, violationtype, json)")
+    op.drop_column('violations', 'last_seen_at')
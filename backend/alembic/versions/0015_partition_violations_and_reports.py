@@ -0,0 +1,154 @@
+"""partition violations and reports by month
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0015'
+down_revision: Union[str, None] = '0014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Partitions created ahead of the current month; the partition beat task keeps this up
+PREMAKE_MONTHS = 3
+
+VIOLATION_COLUMNS = [
+    'id', 'violation_type', 'severity', 'status', 'description', 'rule_reference', 'evidence',
+    'resolution_notes', 'detected_at', 'resolved_at', 'last_seen_at', 'product_id', 'assigned_officer_id'
+]
+REPORT_COLUMNS = ['id', 'title', 'report_type', 'data', 'generated_at', 'period_start', 'period_end']
+
+# (name, columns, partial index predicate); resolved_at is no longer needed once retention drops partitions
+VIOLATION_INDEXES = [
+    ('ix_violations_id', ['id'], None),
+    ('ix_violations_detected_at_id', ['detected_at', 'id'], None),
+    ('ix_violations_status_detected_at_id', ['status', 'detected_at', 'id'], None),
+    ('ix_violations_product_id', ['product_id'], None),
+    ('ix_violations_product_fingerprint', ['product_id', 'fingerprint'], "status <> 'RESOLVED'"),
+    ('ix_violations_officer_detected_at_id', ['assigned_officer_id', 'detected_at', 'id'],
+     "assigned_officer_id IS NOT NULL"),
+    ('ix_violations_open_critical', ['detected_at', 'id'], "status = 'OPEN' AND severity = 'CRITICAL'"),
+]
+UNPARTITIONED_VIOLATION_INDEXES = VIOLATION_INDEXES + [
+    ('ix_violations_resolved_at', ['resolved_at'], "status = 'RESOLVED'"),
+]
+
+
+def _violations_table(name, partitioned):
+    enum = lambda type_name: postgresql.ENUM(name=type_name, create_type=False)
+    op.create_table(
+        name,
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('violations_id_seq'::regclass)"),
+                  autoincrement=False, nullable=False),
+        sa.Column('violation_type', enum('violationtype'), nullable=False),
+        sa.Column('severity', enum('violationseverity'), nullable=True),
+        sa.Column('status', enum('violationstatus'), nullable=True),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('rule_reference', sa.String(), nullable=True),
+        sa.Column('evidence', sa.JSON(), nullable=True),
+        sa.Column('resolution_notes', sa.Text(), nullable=True),
+        sa.Column('detected_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('fingerprint', sa.String(length=32),
+                  sa.Computed('violation_fingerprint(product_id, violation_type, evidence)', persisted=True)),
+        sa.Column('product_id', sa.Integer(), nullable=True),
+        sa.Column('assigned_officer_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.ForeignKeyConstraint(['assigned_officer_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id', 'detected_at') if partitioned else sa.PrimaryKeyConstraint('id'),
+        **({'postgresql_partition_by': 'RANGE (detected_at)'} if partitioned else {})
+    )
+
+
+def _reports_table(name, partitioned):
+    op.create_table(
+        name,
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('reports_id_seq'::regclass)"),
+                  autoincrement=False, nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('report_type', postgresql.ENUM(name='reporttype', create_type=False), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('generated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('period_start', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('period_end', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id', 'generated_at') if partitioned else sa.PrimaryKeyConstraint('id'),
+        **({'postgresql_partition_by': 'RANGE (generated_at)'} if partitioned else {})
+    )
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(table, key):
+    """Monthly partitions from the oldest row of the old table to PREMAKE_MONTHS ahead, UTC bounds"""
+    oldest = op.get_bind().execute(sa.text(f"SELECT min({key}) FROM {table}_old")).scalar()
+    now = datetime.now(timezone.utc)
+    first = (oldest or now).astimezone(timezone.utc)
+    month = date(first.year, first.month, 1)
+    last = _add_months(date(now.year, now.month, 1), PREMAKE_MONTHS)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {table}_{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+        month = _add_months(month, 1)
+
+
+def _create_rollup_triggers():
+    # Statement triggers on the partitioned parent see the transition rows of every partition
+    for event, referencing in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        op.execute(
+            f"CREATE TRIGGER violations_rollup_{event.lower()} AFTER {event} ON violations "
+            f"REFERENCING {referencing} FOR EACH STATEMENT EXECUTE FUNCTION violation_daily_rollups_apply()"
+        )
+
+
+def _replace(table, key, columns, create, indexes, partitioned):
+    """Copy table into a new (un)partitioned table of the same name that keeps its id sequence"""
+    op.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    op.execute(f"ALTER TABLE {table}_old RENAME CONSTRAINT {table}_pkey TO {table}_old_pkey")
+    create(table, partitioned)
+    if partitioned:
+        _create_partitions(table, key)
+    select_columns = [f"coalesce({column}, now())" if column == key else column for column in columns]
+    op.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(select_columns)} FROM {table}_old"
+    )
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.drop_table(f"{table}_old")
+    for name, index_columns, where in indexes:
+        op.create_index(name, table, index_columns, postgresql_where=sa.text(where) if where else None)
+
+
+def upgrade() -> None:
+    # Rewrites both tables; run in a maintenance window. Rollup triggers are recreated
+    # after the copy so the rollups are not counted twice.
+    _replace('violations', 'detected_at', VIOLATION_COLUMNS, _violations_table, VIOLATION_INDEXES, True)
+    _create_rollup_triggers()
+    _replace('reports', 'generated_at', REPORT_COLUMNS, _reports_table, [('ix_reports_id', ['id'], None)], True)
+
+
+def downgrade() -> None:
+    _replace('violations', 'detected_at', VIOLATION_COLUMNS, _violations_table,
+             UNPARTITIONED_VIOLATION_INDEXES, False)
+    _create_rollup_triggers()
+    _replace('reports', 'generated_at', REPORT_COLUMNS, _reports_table, [('ix_reports_id', ['id'], None)], False)
@@ -0,0 +1,29 @@
+"""add PRICING_ANOMALY to violationtype
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0016'
+down_revision: Union[str, None] = '0015'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases that ran 0005 before it added the enum value; a no-op on the others
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE violationtype ADD VALUE IF NOT EXISTS 'PRICING_ANOMALY'")
+
+
+def downgrade() -> None:
+    # Enum values can't be dropped
+    pass
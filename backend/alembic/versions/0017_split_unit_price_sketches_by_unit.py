@@ -0,0 +1,28 @@
+"""split unit price sketches by quantity unit
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2024-01-01 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0017'
+down_revision: Union[str, None] = '0016'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # These mixed prices per gram, millilitre and item; the rebuild_distribution_sketches
+    # task recreates them per unit from product_features
+    op.execute("DELETE FROM distribution_sketches WHERE metric = 'unit_price'")
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM distribution_sketches WHERE metric LIKE 'unit\\_price\\_%'")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, products, platforms, violations, dashboard, compliance
+from app.api.v1.endpoints import auth, products, platforms, violations, dashboard, compliance, ml
 
 api_router = APIRouter()
 
@@ -9,3 +9,4 @@ api_router.include_router(platforms.router, prefix="/platforms", tags=["platform
 api_router.include_router(violations.router, prefix="/violations", tags=["violations"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
 api_router.include_router(compliance.router, prefix="/compliance", tags=["compliance"])
+api_router.include_router(ml.router, prefix="/ml", tags=["ml"])
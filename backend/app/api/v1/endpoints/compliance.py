@@ -1,3 +1,4 @@
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
@@ -6,6 +7,7 @@ from app.core.permissions import require_officer
 from app.models.user import User
 from app.schemas.product import ProductScanRequest
 from app.services.compliance_service import ComplianceService
+from app.services.compliance_sweep_service import ComplianceSweepService
 
 router = APIRouter()
 
@@ -30,9 +32,38 @@ async def bulk_scan_platform(
     result = await service.bulk_scan_platform(platform_id, limit)
     return result
 
+@router.post("/sample-scan")
+async def sample_scan_platform(
+    platform_id: int,
+    sample_size: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_officer)
+):
+    service = ComplianceService(db)
+    result = await service.sample_scan_platform(platform_id, sample_size)
+    return result
+
+@router.post("/sweep")
+def sweep_platform_compliance(
+    platform_id: int,
+    category_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_officer)
+):
+    service = ComplianceSweepService(db)
+    return service.sweep_platform(platform_id, category_id)
+
 @router.get("/rules")
 async def get_compliance_rules(
     current_user: User = Depends(get_current_user)
 ):
     service = ComplianceService(None)
     return service.get_all_rules()
+
+# Plain def: the Redis reads block, so FastAPI runs this in its threadpool
+@router.get("/rules/stats")
+def get_compliance_rule_stats(
+    current_user: User = Depends(get_current_user)
+):
+    service = ComplianceService(None)
+    return service.get_rule_stats()
@@ -1,34 +1,48 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db, get_async_db
 from app.core.auth import get_current_user
 from app.models.user import User
-from app.services.dashboard_service import DashboardService
+from app.services.dashboard_service import AsyncDashboardService
+from app.services.distribution_service import DistributionService
 
 router = APIRouter()
 
 @router.get("/stats")
 async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = DashboardService(db)
-    return service.get_dashboard_stats()
+    service = AsyncDashboardService(db)
+    return await service.get_dashboard_stats()
 
 @router.get("/violations/chart")
 async def get_violations_chart_data(
     days: int = 30,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = DashboardService(db)
-    return service.get_violations_chart_data(days)
+    service = AsyncDashboardService(db)
+    return await service.get_violations_chart_data(days)
 
 @router.get("/compliance/trends")
 async def get_compliance_trends(
     days: int = 30,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    service = AsyncDashboardService(db)
+    return await service.get_compliance_trends(days)
+
+@router.get("/distributions")
+def get_price_distribution(
+    metric: str = Query("price", pattern="^(price|unit_price_(g|ml|count))$"),
+    platform_id: Optional[int] = None,
+    category_id: Optional[int] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = DashboardService(db)
-    return service.get_compliance_trends(days)
+    service = DistributionService(db)
+    return service.get_distribution(metric, platform_id, category_id)
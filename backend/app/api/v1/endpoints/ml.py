@@ -0,0 +1,65 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.core.auth import get_current_user
+from app.models.user import User
+from app.services.ml_result_service import MLResultService
+
+router = APIRouter()
+
+def _resolve_run_id(service: MLResultService, run_id: Optional[int]) -> int:
+    run_id = run_id or service.get_latest_run_id()
+    if run_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No completed ML analysis run"
+        )
+    return run_id
+
+@router.get("/runs")
+def get_ml_runs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    service = MLResultService(db)
+    return service.get_runs(limit)
+
+@router.get("/runs/{run_id}")
+def get_ml_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    service = MLResultService(db)
+    run = service.get_run(run_id)
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="ML analysis run not found"
+        )
+    return run
+
+@router.get("/anomalies")
+def get_ml_anomalies(
+    run_id: Optional[int] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    service = MLResultService(db)
+    return service.get_anomalies(_resolve_run_id(service, run_id), skip, limit)
+
+@router.get("/clusters")
+def get_ml_clusters(
+    run_id: Optional[int] = None,
+    cluster: Optional[int] = Query(None, ge=0),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    service = MLResultService(db)
+    return service.get_clusters(_resolve_run_id(service, run_id), cluster, skip, limit)
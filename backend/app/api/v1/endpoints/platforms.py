@@ -1,12 +1,13 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db, get_async_db
 from app.core.auth import get_current_user
 from app.core.permissions import require_officer
 from app.models.user import User
 from app.schemas.platform import Platform, PlatformCreate, PlatformUpdate
-from app.services.platform_service import PlatformService
+from app.services.platform_service import PlatformService, AsyncPlatformService
 
 router = APIRouter()
 
@@ -14,20 +15,20 @@ router = APIRouter()
 async def get_platforms(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = PlatformService(db)
-    return service.get_platforms(skip=skip, limit=limit)
+    service = AsyncPlatformService(db)
+    return await service.get_platforms(skip=skip, limit=limit)
 
 @router.get("/{platform_id}", response_model=Platform)
 async def get_platform(
     platform_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = PlatformService(db)
-    platform = service.get_platform(platform_id)
+    service = AsyncPlatformService(db)
+    platform = await service.get_platform(platform_id)
     if not platform:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -36,7 +37,7 @@ async def get_platform(
     return platform
 
 @router.post("/", response_model=Platform)
-async def create_platform(
+def create_platform(
     platform: PlatformCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_officer)
@@ -45,7 +46,7 @@ async def create_platform(
     return service.create_platform(platform)
 
 @router.put("/{platform_id}", response_model=Platform)
-async def update_platform(
+def update_platform(
     platform_id: int,
     platform_update: PlatformUpdate,
     db: Session = Depends(get_db),
@@ -1,46 +1,64 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db, get_async_db
 from app.core.auth import get_current_user
 from app.core.permissions import require_officer
+from app.core.pagination import InvalidCursor, next_cursor
 from app.models.user import User
 from app.models.product import Product as ProductModel, ComplianceStatus
 from app.schemas.product import Product, ProductCreate, ProductUpdate, ProductScanRequest
-from app.services.product_service import ProductService
+from app.services.product_service import ProductService, AsyncProductService, PRODUCT_PAGE_KEYS
 from app.services.compliance_engine import LegalMetrologyRuleEngine
 from app.services.violation_service import ViolationService
+from app.services.feature_store_service import FeatureStoreService
+from app.services.product_matching_service import ProductMatchingService
+from app.services.distribution_service import DistributionService
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Product])
 async def get_products(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; replaces skip"),
     compliance_status: Optional[ComplianceStatus] = None,
     platform_id: Optional[int] = None,
     category_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = ProductService(db)
-    products = service.get_products(
-        skip=skip,
-        limit=limit,
-        compliance_status=compliance_status,
-        platform_id=platform_id,
-        category_id=category_id
-    )
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+    service = AsyncProductService(db)
+    try:
+        products = await service.get_products(
+            skip=skip,
+            limit=limit,
+            compliance_status=compliance_status,
+            platform_id=platform_id,
+            category_id=category_id,
+            cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Keyset continuation of this listing; absent on the last page
+    token = next_cursor(products, PRODUCT_PAGE_KEYS, limit)
+    if token:
+        response.headers["X-Next-Cursor"] = token
     return products
 
 @router.get("/{product_id}", response_model=Product)
 async def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = ProductService(db)
-    product = service.get_product(product_id)
+    service = AsyncProductService(db)
+    product = await service.get_product(product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -48,24 +66,41 @@ async def get_product(
         )
     return product
 
+@router.get("/{product_id}/matches")
+def get_product_matches(
+    product_id: int,
+    min_similarity: Optional[float] = Query(None, ge=0, le=1),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    product = ProductService(db).get_product(product_id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    service = ProductMatchingService(db)
+    return service.compare_declarations(product, service.find_matches(product, min_similarity))
+
 @router.post("/", response_model=Product)
 async def create_product(
     product: ProductCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_officer)
 ):
-    service = ProductService(db)
-    return service.create_product(product)
+    service = AsyncProductService(db)
+    return await service.create_product(product)
 
 @router.put("/{product_id}", response_model=Product)
 async def update_product(
     product_id: int,
     product_update: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_officer)
 ):
-    service = ProductService(db)
-    product = service.update_product(product_id, product_update)
+    service = AsyncProductService(db)
+    product = await service.update_product(product_id, product_update)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -76,11 +111,11 @@ async def update_product(
 @router.delete("/{product_id}")
 async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_officer)
 ):
-    service = ProductService(db)
-    if not service.delete_product(product_id):
+    service = AsyncProductService(db)
+    if not await service.delete_product(product_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
@@ -88,7 +123,7 @@ async def delete_product(
     return {"message": "Product deleted successfully"}
 
 @router.post("/{product_id}/scan")
-async def scan_product_compliance(
+def scan_product_compliance(
     product_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_officer)
@@ -104,21 +139,27 @@ async def scan_product_compliance(
     # Run compliance check
     engine = LegalMetrologyRuleEngine()
     violations = engine.validate_product(product)
-    compliance_score = engine.get_compliance_score(product)
+    compliance_score = engine.calculate_score(violations)
     
     # Update product compliance status
+    violation_service = ViolationService(db)
     if violations:
         product.compliance_status = ComplianceStatus.NON_COMPLIANT
         product.violation_count = len(violations)
-        
-        # Create violation records
-        violation_service = ViolationService(db)
-        for violation_data in violations:
-            violation_service.create_violation(violation_data, product_id)
+        violation_service.save_product_snapshot(engine.get_product_snapshot(product), product_id, commit=False)
     else:
         product.compliance_status = ComplianceStatus.COMPLIANT
         product.violation_count = 0
     
+    # Bump, insert and resolve violation records, committed with the status and features
+    violation_service.record_violations(
+        [(product_id, v) for v in violations], product_ids=[product_id],
+        rule_ids=[rule.rule_id for rule in engine.rules], commit=False
+    )
+    distribution_service = DistributionService(db)
+    recorded = distribution_service.recorded_values(product_id)
+    feature = FeatureStoreService(db).update_product_features(product, violations, commit=False)
+    distribution_service.record_product(feature, recorded, commit=False)
     db.commit()
     
     return {
@@ -1,46 +1,60 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.core.auth import get_current_user
 from app.core.permissions import require_officer
+from app.core.pagination import InvalidCursor, next_cursor
 from app.models.user import User
 from app.models.violation import ViolationStatus, ViolationSeverity, ViolationType
 from app.schemas.violation import Violation, ViolationUpdate
-from app.services.violation_service import ViolationService
+from app.services.violation_service import AsyncViolationService, VIOLATION_PAGE_KEYS
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Violation])
 async def get_violations(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page; replaces skip"),
     status: Optional[ViolationStatus] = None,
     severity: Optional[ViolationSeverity] = None,
     violation_type: Optional[ViolationType] = None,
     assigned_officer_id: Optional[int] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = ViolationService(db)
-    violations = service.get_violations(
-        skip=skip,
-        limit=limit,
-        status=status,
-        severity=severity,
-        violation_type=violation_type,
-        assigned_officer_id=assigned_officer_id
-    )
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both")
+    service = AsyncViolationService(db)
+    try:
+        violations = await service.get_violations(
+            skip=skip,
+            limit=limit,
+            status=status,
+            severity=severity,
+            violation_type=violation_type,
+            assigned_officer_id=assigned_officer_id,
+            cursor=cursor
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Keyset continuation of this listing; absent on the last page
+    token = next_cursor(violations, VIOLATION_PAGE_KEYS, limit)
+    if token:
+        response.headers["X-Next-Cursor"] = token
     return violations
 
 @router.get("/{violation_id}", response_model=Violation)
 async def get_violation(
     violation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = ViolationService(db)
-    violation = service.get_violation(violation_id)
+    service = AsyncViolationService(db)
+    violation = await service.get_violation(violation_id)
     if not violation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -48,15 +62,30 @@ async def get_violation(
         )
     return violation
 
+@router.get("/{violation_id}/evidence")
+async def get_violation_evidence(
+    violation_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    service = AsyncViolationService(db)
+    evidence = await service.get_violation_evidence(violation_id)
+    if evidence is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Violation not found"
+        )
+    return evidence
+
 @router.put("/{violation_id}/assign")
 async def assign_violation(
     violation_id: int,
     officer_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_officer)
 ):
-    service = ViolationService(db)
-    violation = service.assign_violation(violation_id, officer_id)
+    service = AsyncViolationService(db)
+    violation = await service.assign_violation(violation_id, officer_id)
     if not violation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -68,11 +97,11 @@ async def assign_violation(
 async def resolve_violation(
     violation_id: int,
     resolution_notes: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(require_officer)
 ):
-    service = ViolationService(db)
-    violation = service.resolve_violation(violation_id, resolution_notes)
+    service = AsyncViolationService(db)
+    violation = await service.resolve_violation(violation_id, resolution_notes)
     if not violation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -82,8 +111,8 @@ async def resolve_violation(
 
 @router.get("/stats/overview")
 async def get_violation_stats(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = ViolationService(db)
-    return service.get_violation_stats()
+    service = AsyncViolationService(db)
+    return await service.get_violation_stats()
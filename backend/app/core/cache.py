@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+import redis
+import redis.asyncio as aioredis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """
+    JSON result cache in Redis shared by all API workers.
+    Cache failures never fail a request: the loader is called directly instead.
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "cache"):
+        self.url = url or settings.REDIS_URL
+        self.prefix = prefix
+        self._client = None
+        self._async_client = None
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._client
+
+    @property
+    def async_client(self) -> aioredis.Redis:
+        if self._async_client is None:
+            self._async_client = aioredis.Redis.from_url(self.url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._async_client
+
+    def get_or_set(self, key: str, loader: Callable[[], Any], ttl: int) -> Any:
+        full_key = f"{self.prefix}:{key}"
+        try:
+            cached = self.client.get(full_key)
+            if cached is not None:
+                return json.loads(cached)
+        except redis.RedisError as e:
+            logger.warning(f"Cache read failed for {full_key}: {str(e)}")
+            return loader()
+
+        value = loader()
+        try:
+            self.client.set(full_key, json.dumps(value, default=str), ex=ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Cache write failed for {full_key}: {str(e)}")
+        return value
+
+    async def get_or_refresh(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: int,
+                             stale_ttl: int = 0) -> Any:
+        """
+        Stale-while-revalidate read for async endpoints. A value is fresh for ttl
+        seconds, then served stale for stale_ttl more while the one caller holding
+        the key's refresh lock recomputes it. Concurrent misses share one load per
+        process, and other processes wait for the lock holder's result.
+        The load runs in its own task and can outlive the request that started it,
+        so loader must open its own database session rather than use the request's.
+        """
+        full_key = f"{self.prefix}:{key}"
+        try:
+            entry = await self._get_entry(full_key)
+            if entry is not None and entry["fresh_until"] > time.time():
+                return entry["value"]
+            if full_key not in self._inflight and await self._acquire_refresh_lock(full_key):
+                return await self._refresh(full_key, loader, ttl, stale_ttl)
+            if entry is not None:
+                return entry["value"]
+            if full_key not in self._inflight:
+                entry = await self._wait_for_entry(full_key)
+                if entry is not None:
+                    return entry["value"]
+        except redis.RedisError as e:
+            logger.warning(f"Cache read failed for {full_key}: {str(e)}")
+        return await self._load_once(full_key, loader)
+
+    def delete_prefix(self, key_prefix: str):
+        try:
+            keys = list(self.client.scan_iter(f"{self.prefix}:{key_prefix}*"))
+            if keys:
+                self.client.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning(f"Cache invalidation failed for {key_prefix}: {str(e)}")
+
+    async def _get_entry(self, full_key: str) -> Optional[Dict[str, Any]]:
+        cached = await self.async_client.get(full_key)
+        return json.loads(cached) if cached is not None else None
+
+    async def _acquire_refresh_lock(self, full_key: str) -> bool:
+        return bool(await self.async_client.set(
+            f"{full_key}:refresh", "1", nx=True, ex=settings.CACHE_REFRESH_LOCK_TIMEOUT
+        ))
+
+    async def _refresh(self, full_key: str, loader: Callable[[], Awaitable[Any]], ttl: int, stale_ttl: int) -> Any:
+        # Stored and unlocked by the shared load, so a cancelled caller leaves neither undone
+        return await self._load_once(full_key, lambda: self._load_and_store(full_key, loader, ttl, stale_ttl))
+
+    async def _load_and_store(self, full_key: str, loader: Callable[[], Awaitable[Any]], ttl: int,
+                              stale_ttl: int) -> Any:
+        try:
+            value = await loader()
+            entry = {"value": value, "fresh_until": time.time() + ttl}
+            await self.async_client.set(full_key, json.dumps(entry, default=str), ex=ttl + stale_ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Cache write failed for {full_key}: {str(e)}")
+        finally:
+            try:
+                await self.async_client.delete(f"{full_key}:refresh")
+            except redis.RedisError as e:
+                logger.warning(f"Cache lock release failed for {full_key}: {str(e)}")
+        return value
+
+    async def _wait_for_entry(self, full_key: str) -> Optional[Dict[str, Any]]:
+        """Poll for the value another process is computing, until its lock goes away"""
+        deadline = time.monotonic() + settings.CACHE_REFRESH_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            entry = await self._get_entry(full_key)
+            if entry is not None:
+                return entry
+            if not await self.async_client.exists(f"{full_key}:refresh"):
+                break
+        return None
+
+    async def _load_once(self, full_key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        # One load per key per process, in its own task; shielded so a cancelled
+        # waiter, including the one that started it, does not cancel the others
+        task = self._inflight.get(full_key)
+        if task is None:
+            task = asyncio.create_task(loader())
+            self._inflight[full_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(full_key, None))
+        return await asyncio.shield(task)
+
+result_cache = ResultCache()
@@ -1,16 +1,63 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from app.core.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    poolclass=StaticPool,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-)
+def create_db_engine(profile: str = None):
+    """
+    Engine for one process type. API servers, Celery workers and beat each get
+    their own pool sizing and statement timeout from settings.DB_POOL_PROFILES.
+    """
+    if "sqlite" in settings.DATABASE_URL:
+        return create_engine(
+            settings.DATABASE_URL,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False}
+        )
+
+    profile = profile or settings.DB_POOL_PROFILE
+    options = settings.DB_POOL_PROFILES[profile]
+    server_options = f"-c statement_timeout={options['statement_timeout_ms']}"
+    return create_engine(
+        settings.DATABASE_URL,
+        pool_size=options["pool_size"],
+        max_overflow=options["max_overflow"],
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"options": server_options, "application_name": f"compliance-{profile}"}
+    )
+
+def create_async_db_engine(profile: str = None):
+    """asyncpg engine for the API's async endpoints, sized by the same profile"""
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() == "sqlite":
+        return create_async_engine(url.set(drivername="sqlite+aiosqlite"), poolclass=StaticPool)
+
+    profile = profile or settings.DB_POOL_PROFILE
+    options = settings.DB_POOL_PROFILES[profile]
+    return create_async_engine(
+        url.set(drivername="postgresql+asyncpg"),
+        pool_size=options["pool_size"],
+        max_overflow=options["max_overflow"],
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"server_settings": {
+            "statement_timeout": str(options["statement_timeout_ms"]),
+            "application_name": f"compliance-{profile}"
+        }}
+    )
+
+engine = create_db_engine()
+async_engine = create_async_db_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Objects stay usable after commit; lazy loads are not possible outside the session's greenlet
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 def get_db():
@@ -19,3 +66,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
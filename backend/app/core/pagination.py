@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+from sqlalchemy import DateTime, tuple_
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque token for the sort key of the last row of a page"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(token: str, keys: Sequence) -> List[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(keys):
+            raise ValueError("wrong number of key values")
+        return [
+            datetime.fromisoformat(value) if isinstance(key.type, DateTime) else key.type.python_type(value)
+            for key, value in zip(keys, payload)
+        ]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+
+def paginate(query, keys: Sequence, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    """
+    Newest-first page of a Query or select() ordered by keys, which must be unique
+    together and covered by an index. With a cursor the page starts right after the
+    row it was taken from (keyset); otherwise skip rows are discarded (offset).
+    """
+    query = query.order_by(*[key.desc() for key in keys])
+    if cursor:
+        query = query.where(tuple_(*keys) < tuple_(*decode_cursor(cursor, keys)))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def next_cursor(items: Sequence, keys: Sequence, limit: int) -> Optional[str]:
+    """Cursor for the page after items, or None if items was the last page"""
+    if len(items) < limit:
+        return None
+    return encode_cursor([getattr(items[-1], key.key) for key in keys])
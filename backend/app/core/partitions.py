@@ -0,0 +1,61 @@
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import text
+
+# Monthly range-partitioned tables and their partition key; bounds are UTC month starts
+PARTITIONED_TABLES = {
+    "violations": "detected_at",
+    "reports": "generated_at",
+}
+
+def month_start(value: Optional[date] = None) -> date:
+    value = value or datetime.now(timezone.utc)
+    return date(value.year, value.month, 1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month:%Y_%m}"
+
+def partition_bounds(month: date) -> str:
+    """FOR VALUES clause of the month's partition"""
+    return (f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')")
+
+def list_partitions(connection, table: str) -> List[Tuple[str, date]]:
+    """(name, month) of the table's monthly partitions, oldest first"""
+    rows = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:table AS regclass) ORDER BY c.relname"
+    ), {"table": table}).scalars()
+    prefix = f"{table}_"
+    return [
+        (name, datetime.strptime(name[len(prefix):], "%Y_%m").date())
+        for name in rows if name.startswith(prefix)
+    ]
+
+def list_detached_partitions(connection, table: str) -> List[Tuple[str, date]]:
+    """(name, month) of tables named like the table's partitions but no longer attached, oldest first"""
+    rows = connection.execute(text(
+        "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition "
+        "AND relnamespace = CAST(current_schema() AS regnamespace) AND relname ~ :pattern ORDER BY relname"
+    ), {"pattern": f"^{table}_[0-9]{{4}}_[0-9]{{2}}$"}).scalars()
+    prefix = f"{table}_"
+    return [(name, datetime.strptime(name[len(prefix):], "%Y_%m").date()) for name in rows]
+
+def create_monthly_partitions(connection, table: str, first_month: date, last_month: date) -> List[str]:
+    """Create the missing partitions for first_month through last_month and return their names"""
+    existing = {name for name, _ in list_partitions(connection, table)}
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        name = partition_name(table, month)
+        if name not in existing:
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} {partition_bounds(month)}"
+            ))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
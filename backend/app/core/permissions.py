@@ -1,4 +1,5 @@
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
+from app.core.auth import get_current_user
 from app.models.user import User, UserRole
 
 def require_role(required_role: UserRole):
@@ -17,10 +18,10 @@ def require_role(required_role: UserRole):
         return current_user
     return role_checker
 
-def require_admin(current_user: User = None):
+def require_admin(current_user: User = Depends(get_current_user)):
     return require_role(UserRole.ADMIN)(current_user)
 
-def require_officer(current_user: User = None):
+def require_officer(current_user: User = Depends(get_current_user)):
     return require_role(UserRole.OFFICER)(current_user)
 
 def can_modify_violation(current_user: User, violation_owner_id: int = None):
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Integer, String, Date, Index
+from app.core.database import Base
+
+class ViolationDailyRollup(Base):
+    """
+    Violation counts per detection day, platform, category, type, severity and status.
+    Maintained by statement-level triggers on violations (migration 0011), so every
+    write path, including bulk inserts, keeps it current.
+    """
+    __tablename__ = "violation_daily_rollups"
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)  # UTC date of detected_at
+    platform_id = Column(Integer)
+    category_id = Column(Integer)
+    violation_type = Column(String(32), nullable=False)  # enum names, as stored on violations
+    severity = Column(String(16))
+    status = Column(String(16))
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index(
+            "ux_violation_daily_rollups_key",
+            "day", "platform_id", "category_id", "violation_type", "severity", "status",
+            unique=True, postgresql_nulls_not_distinct=True
+        ),
+    )
+
+class ProductDailyRollup(Base):
+    """Product counts per creation day, platform, category and current compliance status"""
+    __tablename__ = "product_daily_rollups"
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)  # UTC date of created_at
+    platform_id = Column(Integer)
+    category_id = Column(Integer)
+    compliance_status = Column(String(16))
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index(
+            "ux_product_daily_rollups_key",
+            "day", "platform_id", "category_id", "compliance_status",
+            unique=True, postgresql_nulls_not_distinct=True
+        ),
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, LargeBinary
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class DistributionSketch(Base):
+    """
+    Mergeable quantile digest and moments of one metric for one
+    (platform, category) segment; wider scopes are merged at read time.
+    """
+    __tablename__ = "distribution_sketches"
+    
+    id = Column(Integer, primary_key=True)
+    key = Column(String, unique=True, index=True, nullable=False)  # "<metric>:<platform_id>:<category_id>"
+    metric = Column(String, nullable=False)  # 'price' or 'unit_price_<g|ml|count>'
+    platform_id = Column(Integer, index=True)
+    category_id = Column(Integer, index=True)
+    count = Column(Integer, default=0, nullable=False)
+    mean = Column(Float, default=0.0, nullable=False)
+    m2 = Column(Float, default=0.0, nullable=False)  # sum of squared deviations (Welford)
+    min_value = Column(Float)
+    max_value = Column(Float)
+    digest = Column(LargeBinary)  # t-digest centroid means followed by weights, float64
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
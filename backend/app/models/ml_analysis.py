@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Float, Enum, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+import enum
+
+class MLRunStatus(enum.Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class MLAnalysisRun(Base):
+    __tablename__ = "ml_analysis_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(Enum(MLRunStatus), default=MLRunStatus.RUNNING, nullable=False)
+    products_analyzed = Column(Integer, default=0)
+    anomaly_count = Column(Integer, default=0)
+    model_versions = Column(JSON)
+    summary = Column(JSON)  # clustering, segment and insight aggregates of the run
+    error = Column(String)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+class MLProductResult(Base):
+    """Anomaly score and cluster of one product in one analysis run"""
+    __tablename__ = "ml_product_results"
+    
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey("ml_analysis_runs.id", ondelete="CASCADE"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    anomaly_score = Column(Float)  # > 0 is anomalous; NULL when the product has no price
+    is_anomaly = Column(Boolean, default=False, nullable=False)
+    cluster = Column(Integer)
+    
+    __table_args__ = (
+        Index("ix_ml_product_results_run_anomaly", "run_id", "is_anomaly", "anomaly_score"),
+        Index("ix_ml_product_results_run_cluster", "run_id", "cluster", "product_id"),
+    )
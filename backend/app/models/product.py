@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Float, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -21,9 +21,12 @@ class Product(Base):
     compliance_status = Column(Enum(ComplianceStatus), default=ComplianceStatus.PENDING)
     violation_count = Column(Integer, default=0)
     compliance_score = Column(Float, default=0.0)
+    anomaly_score = Column(Float)  # > 0 means the price is anomalous for its category
     extracted_data = Column(JSON)
     price = Column(Float)
     weight = Column(String)
+    net_quantity = Column(Float)  # normalized to quantity_unit
+    quantity_unit = Column(String)  # 'g', 'ml' or 'count'
     country_of_origin = Column(String)
     manufacturer = Column(String)
     last_scanned = Column(DateTime(timezone=True))
@@ -38,3 +41,12 @@ class Product(Base):
     platform = relationship("Platform", back_populates="products")
     category = relationship("Category", back_populates="products")
     violations = relationship("Violation", back_populates="product")
+    
+    __table_args__ = (
+        # Platform / category scoped scans, sampling strata and listings
+        Index("ix_products_platform_category_id", "platform_id", "category_id", "id"),
+        Index("ix_products_category_id_id", "category_id", "id"),
+        Index("ix_products_compliance_status_id", "compliance_status", "id"),
+        # Stale product checks
+        Index("ix_products_last_scanned", "last_scanned"),
+    )
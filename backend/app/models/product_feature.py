@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, BigInteger
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ProductFeature(Base):
+    """Normalized numeric features of a product, maintained on every scan"""
+    __tablename__ = "product_features"
+    
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    price = Column(Float)
+    mrp = Column(Float)
+    net_quantity = Column(Float)  # in quantity_unit base units
+    quantity_unit = Column(String)  # 'g', 'ml' or 'count'
+    unit_price = Column(Float)  # price per base unit of quantity_unit; only comparable within a unit
+    discount_ratio = Column(Float)  # (mrp - price) / mrp
+    compliance_score = Column(Float)
+    rule_bitmask = Column(BigInteger, default=0)  # bit i set when the engine's i-th rule failed
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Denormalized so segments can be read without joining products
+    platform_id = Column(Integer, index=True)
+    category_id = Column(Integer, index=True)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ProductFingerprint(Base):
+    """MinHash signature of a listing's normalized name, brand and quantity"""
+    __tablename__ = "product_fingerprints"
+    
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    normalized_text = Column(String)
+    signature = Column(LargeBinary, nullable=False)  # uint32 MinHash values
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ProductMatchKey(Base):
+    """Lookup key shared by matching listings: 'gtin:...', 'asin:...' or an LSH band 'lsh:<band>:...'"""
+    __tablename__ = "product_match_keys"
+    
+    id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), index=True, nullable=False)
+    key = Column(String(64), index=True, nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ProductSnapshot(Base):
+    """Immutable, content-addressed copy of the product data a violation was detected on"""
+    __tablename__ = "product_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Foreign Keys
+    product_id = Column(Integer, ForeignKey("products.id"))  # product the snapshot was first taken from
@@ -12,10 +12,14 @@ class ReportType(enum.Enum):
 class Report(Base):
     __tablename__ = "reports"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by month of generation; the table key includes generated_at, rows are identified by id
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     title = Column(String, nullable=False)
     report_type = Column(Enum(ReportType), nullable=False)
     data = Column(JSON)
-    generated_at = Column(DateTime(timezone=True), server_default=func.now())
+    generated_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
     period_start = Column(DateTime(timezone=True))
     period_end = Column(DateTime(timezone=True))
+    
+    __table_args__ = {"postgresql_partition_by": "RANGE (generated_at)"}
+    __mapper_args__ = {"primary_key": [id]}
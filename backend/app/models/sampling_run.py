@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, DateTime, JSON, ForeignKey, Float
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class SamplingRun(Base):
+    """Compliance rate of a platform estimated from a stratified random sample of its products"""
+    __tablename__ = "sampling_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    platform_id = Column(Integer, ForeignKey("platforms.id", ondelete="CASCADE"), nullable=False, index=True)
+    population_size = Column(Integer, nullable=False)
+    sample_size = Column(Integer, nullable=False)  # products drawn
+    scanned_count = Column(Integer, nullable=False)  # successful scans the estimate is based on
+    confidence_level = Column(Float, nullable=False)
+    estimated_compliance_rate = Column(Float)  # fraction of compliant products, 0-1
+    variance = Column(Float)
+    ci_lower = Column(Float)
+    ci_upper = Column(Float)
+    strata = Column(JSON)  # per-category population, allocation and sample results
+    started_at = Column(DateTime(timezone=True))
+    completed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Enum, Text
+from sqlalchemy import text, event, DDL, Column, Integer, String, DateTime, Boolean, JSON, ForeignKey, Enum, Text, Index, Computed
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -12,6 +12,7 @@ class ViolationType(enum.Enum):
     UNIT_PRICING = "unit_pricing"
     QUANTITY_DECLARATION = "quantity_declaration"
     LABELING = "labeling"
+    PRICING_ANOMALY = "pricing_anomaly"
 
 class ViolationSeverity(enum.Enum):
     LOW = "low"
@@ -28,7 +29,8 @@ class ViolationStatus(enum.Enum):
 class Violation(Base):
     __tablename__ = "violations"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Partitioned by month of detection; the table key includes detected_at, rows are identified by id
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     violation_type = Column(Enum(ViolationType), nullable=False)
     severity = Column(Enum(ViolationSeverity), default=ViolationSeverity.MEDIUM)
     status = Column(Enum(ViolationStatus), default=ViolationStatus.OPEN)
@@ -36,8 +38,13 @@ class Violation(Base):
     rule_reference = Column(String)
     evidence = Column(JSON)
     resolution_notes = Column(Text)
-    detected_at = Column(DateTime(timezone=True), server_default=func.now())
+    detected_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
     resolved_at = Column(DateTime(timezone=True))
+    last_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Identity of a finding across rescans: product, violation type, rule id and evidence fields
+    fingerprint = Column(
+        String(32), Computed("violation_fingerprint(product_id, violation_type, evidence)", persisted=True)
+    )
     
     # Foreign Keys
     product_id = Column(Integer, ForeignKey("products.id"))
@@ -46,3 +53,44 @@ class Violation(Base):
     # Relationships
     product = relationship("Product", back_populates="violations")
     assigned_officer = relationship("User", back_populates="violations")
+    
+    __table_args__ = (
+        # Keyset pagination of the newest-first violation listing, unfiltered and by status
+        Index("ix_violations_detected_at_id", "detected_at", "id"),
+        Index("ix_violations_status_detected_at_id", "status", "detected_at", "id"),
+        Index("ix_violations_product_id", "product_id"),
+        # Rescan deduplication against the product's unresolved violations
+        Index(
+            "ix_violations_product_fingerprint", "product_id", "fingerprint",
+            postgresql_where=text("status <> 'RESOLVED'")
+        ),
+        # Officer work queues; most violations are never assigned
+        Index(
+            "ix_violations_officer_detected_at_id", "assigned_officer_id", "detected_at", "id",
+            postgresql_where=text("assigned_officer_id IS NOT NULL")
+        ),
+        # Critical alert check
+        Index(
+            "ix_violations_open_critical", "detected_at", "id",
+            postgresql_where=text("status = 'OPEN' AND severity = 'CRITICAL'")
+        ),
+        # Monthly partitions are created ahead by PartitionService and dropped after retention
+        {"postgresql_partition_by": "RANGE (detected_at)"},
+    )
+    __mapper_args__ = {"primary_key": [id]}
+
+# Evidence numbers are compared by value, so 100, 100.0 and 1e2 written by the
+# Python scan path and the SQL sweep give the same fingerprint
+FINGERPRINT_FUNCTION = DDL("""
+CREATE OR REPLACE FUNCTION violation_fingerprint(product_id integer, violation_type violationtype, evidence json)
+RETURNS varchar LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT md5(concat_ws(':', product_id, violation_type, evidence->>'rule_id', (
+        SELECT string_agg(key || '=' || CASE jsonb_typeof(value)
+                                            WHEN 'number' THEN trim_scale(value::numeric)::text
+                                            ELSE value::text END, ',' ORDER BY key)
+        FROM jsonb_each((evidence->'fields')::jsonb)
+    )))
+$$
+""")
+
+event.listen(Violation.__table__, "before_create", FINGERPRINT_FUNCTION.execute_if(dialect="postgresql"))
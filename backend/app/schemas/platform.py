@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+class PlatformBase(BaseModel):
+    name: str
+    url: str
+    api_endpoint: Optional[str] = None
+    scraping_config: Optional[Dict[str, Any]] = None
+    is_active: bool = True
+
+class PlatformCreate(PlatformBase):
+    pass
+
+class PlatformUpdate(BaseModel):
+    name: Optional[str] = None
+    url: Optional[str] = None
+    api_endpoint: Optional[str] = None
+    scraping_config: Optional[Dict[str, Any]] = None
+    is_active: Optional[bool] = None
+
+class PlatformInDB(PlatformBase):
+    id: int
+    last_scan: Optional[datetime]
+    created_at: datetime
+    updated_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+class Platform(PlatformInDB):
+    pass
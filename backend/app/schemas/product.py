@@ -32,6 +32,9 @@ class ProductInDB(ProductBase):
     id: int
     compliance_status: ComplianceStatus
     violation_count: int
+    net_quantity: Optional[float] = None
+    quantity_unit: Optional[str] = None
+    anomaly_score: Optional[float] = None
     platform_id: int
     category_id: int
     last_scanned: Optional[datetime]
@@ -1,16 +1,19 @@
 import re
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from sqlalchemy import and_, or_, case, cast, func, false, Float, Numeric
+from sqlalchemy.sql.elements import ColumnElement
 from app.models.product import Product, ComplianceStatus
 from app.models.violation import Violation, ViolationType, ViolationSeverity
 from app.core.config import settings
-import joblib
+from app.services.quantity_parser import parse_quantity, Quantity
+from app.services.rule_metrics import RuleMetrics, rule_metrics
+from app.services.model_registry import model_registry, category_model_name, segment_model_name
 import os
+import json
+import time
+import hashlib
 
 @dataclass
 class ComplianceRule:
@@ -20,14 +23,85 @@ class ComplianceRule:
     violation_type: ViolationType
     severity: ViolationSeverity
     rule_reference: str
+    # Product attributes / extracted_data keys copied into violation evidence
+    evidence_fields: Tuple[str, ...] = ()
     
+# Weight of a violation in the compliance score, by severity
+SEVERITY_WEIGHTS = {
+    ViolationSeverity.LOW: 0.25,
+    ViolationSeverity.MEDIUM: 0.5,
+    ViolationSeverity.HIGH: 0.75,
+    ViolationSeverity.CRITICAL: 1.0
+}
+
+# Rule id of the advisory price anomaly violation
+ANOMALY_RULE_ID = "ML001"
+
+# Characters str.strip() removes, so SQL strips exactly what the validators do; U+3000 is the last
+WHITESPACE = "".join(c for c in map(chr, range(0x3001)) if c.isspace())
+
+# Price strings the validators and their SQL translation read as numbers, once currency
+# symbols, thousands separators and surrounding whitespace are removed
+PRICE_NUMBER_PATTERN = r"[+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]{1,2})?"
+PRICE_NUMBER = re.compile(PRICE_NUMBER_PATTERN)
+
+def _price_text(value: Any) -> str:
+    return re.sub("[₹,]", "", str(value)).strip()
+
+def _json_text(field: str) -> ColumnElement:
+    return Product.extracted_data[field].as_string()
+
+def _json_truthy(field: str) -> ColumnElement:
+    """Python truthiness of an extracted_data value, decided by its JSON type"""
+    value = Product.extracted_data[field]
+    kind = func.json_typeof(value)
+    text = value.as_string()
+    return case(
+        (kind == 'string', text != ''),
+        (kind == 'number', cast(text, Float) != 0),
+        (kind == 'boolean', text == 'true'),
+        (kind.in_(('array', 'object')), text.notin_(('[]', '{}'))),
+        else_=false()
+    )
+
+def _json_non_blank(field: str) -> ColumnElement:
+    return and_(_json_truthy(field), _non_blank(_json_text(field)))
+
+def _non_blank(column: ColumnElement) -> ColumnElement:
+    return func.btrim(func.coalesce(column, ''), WHITESPACE) != ''
+
+def _json_positive_number(field: str) -> ColumnElement:
+    cleaned = func.btrim(func.regexp_replace(_json_text(field), '[₹,]', '', 'g'), WHITESPACE)
+    # CASE guards the cast so non-numeric strings don't raise
+    return case(
+        (cleaned.op('~')(f'^({PRICE_NUMBER_PATTERN})$'), cast(cleaned, Numeric) > 0),
+        else_=false()
+    )
+
 class LegalMetrologyRuleEngine:
     """
     Implements Legal Metrology Rules 2011 for Indian e-commerce platforms
     """
     
-    def __init__(self):
+    def __init__(self, metrics: Optional[RuleMetrics] = None):
         self.rules = self._initialize_rules()
+        self._validators = {
+            "LM001": self._validate_weight_declaration,
+            "LM002": self._validate_price_display,
+            "LM003": self._validate_country_of_origin,
+            "LM004": self._validate_manufacturer_info,
+            "LM005": self._validate_unit_pricing,
+            "LM006": self._validate_net_quantity,
+        }
+        # Bit i of a rule bitmask is the i-th rule; new rules must be appended
+        self.rule_bits = {rule.rule_id: 1 << i for i, rule in enumerate(self.rules)}
+        self._rule_bits_by_description = {
+            f"{rule.name}: {rule.description}": self.rule_bits[rule.rule_id] for rule in self.rules
+        }
+        # Per-rule profiling is opt-in; it costs a timer call and an evidence dump per rule
+        if metrics is None and settings.RULE_PROFILING_ENABLED:
+            metrics = rule_metrics
+        self.metrics = metrics
     
     def _initialize_rules(self) -> List[ComplianceRule]:
         return [
@@ -37,7 +111,8 @@ class LegalMetrologyRuleEngine:
                 description="Products must declare weight in metric units",
                 violation_type=ViolationType.WEIGHT_DECLARATION,
                 severity=ViolationSeverity.HIGH,
-                rule_reference="Rule 6(1) - Legal Metrology Rules 2011"
+                rule_reference="Rule 6(1) - Legal Metrology Rules 2011",
+                evidence_fields=("weight", "net_quantity", "quantity_unit", "net_weight", "quantity", "volume", "size")
             ),
             ComplianceRule(
                 rule_id="LM002",
@@ -45,7 +120,8 @@ class LegalMetrologyRuleEngine:
                 description="Maximum retail price must be clearly displayed",
                 violation_type=ViolationType.PRICE_DISPLAY,
                 severity=ViolationSeverity.CRITICAL,
-                rule_reference="Rule 18 - Legal Metrology Rules 2011"
+                rule_reference="Rule 18 - Legal Metrology Rules 2011",
+                evidence_fields=("price", "price_text", "mrp", "mrp_text")
             ),
             ComplianceRule(
                 rule_id="LM003",
@@ -53,7 +129,8 @@ class LegalMetrologyRuleEngine:
                 description="Country of origin must be declared",
                 violation_type=ViolationType.COUNTRY_OF_ORIGIN,
                 severity=ViolationSeverity.MEDIUM,
-                rule_reference="Rule 8 - Legal Metrology Rules 2011"
+                rule_reference="Rule 8 - Legal Metrology Rules 2011",
+                evidence_fields=("country_of_origin", "origin", "made_in", "extracted_country")
             ),
             ComplianceRule(
                 rule_id="LM004",
@@ -61,7 +138,8 @@ class LegalMetrologyRuleEngine:
                 description="Name and address of manufacturer/packer required",
                 violation_type=ViolationType.MANUFACTURER_INFO,
                 severity=ViolationSeverity.HIGH,
-                rule_reference="Rule 7 - Legal Metrology Rules 2011"
+                rule_reference="Rule 7 - Legal Metrology Rules 2011",
+                evidence_fields=("manufacturer", "packer", "brand_owner")
             ),
             ComplianceRule(
                 rule_id="LM005",
@@ -69,64 +147,146 @@ class LegalMetrologyRuleEngine:
                 description="Price per unit weight/volume must be displayed",
                 violation_type=ViolationType.UNIT_PRICING,
                 severity=ViolationSeverity.MEDIUM,
-                rule_reference="Rule 19 - Legal Metrology Rules 2011"
+                rule_reference="Rule 19 - Legal Metrology Rules 2011",
+                evidence_fields=("price", "weight", "net_quantity", "quantity_unit", "unit_price", "price_per_unit")
+            ),
+            ComplianceRule(
+                rule_id="LM006",
+                name="Net Quantity Accuracy",
+                description="Declared net quantity must match the label within permissible error",
+                violation_type=ViolationType.QUANTITY_DECLARATION,
+                severity=ViolationSeverity.HIGH,
+                rule_reference="Schedule II - Legal Metrology Rules 2011",
+                evidence_fields=("weight", "net_quantity", "quantity_unit", "extracted_weight", "net_weight")
             )
         ]
     
-    def validate_product(self, product: Product) -> List[Dict[str, Any]]:
+    def validate_product(self, product: Product, include_evidence: bool = True,
+                         rules: Optional[List[ComplianceRule]] = None) -> List[Dict[str, Any]]:
         """
-        Validate a product against all compliance rules
-        Returns list of violations found
+        Validate a product against all compliance rules (or the given subset)
+        Returns list of violations found; score-only callers can skip building evidence
         """
         violations = []
         extracted_data = product.extracted_data or {}
+        # Hash of the product snapshot the evidence refers to, computed on first violation
+        snapshot_hash = None
         
-        # Rule LM001: Weight Declaration
-        if not self._validate_weight_declaration(product, extracted_data):
-            violations.append(self._create_violation_dict("LM001", product, extracted_data))
-        
-        # Rule LM002: Price Display
-        if not self._validate_price_display(product, extracted_data):
-            violations.append(self._create_violation_dict("LM002", product, extracted_data))
-        
-        # Rule LM003: Country of Origin
-        if not self._validate_country_of_origin(product, extracted_data):
-            violations.append(self._create_violation_dict("LM003", product, extracted_data))
-        
-        # Rule LM004: Manufacturer Information
-        if not self._validate_manufacturer_info(product, extracted_data):
-            violations.append(self._create_violation_dict("LM004", product, extracted_data))
-        
-        # Rule LM005: Unit Pricing
-        if not self._validate_unit_pricing(product, extracted_data):
-            violations.append(self._create_violation_dict("LM005", product, extracted_data))
+        for rule in (rules if rules is not None else self.rules):
+            validator = self._validators[rule.rule_id]
+            if self.metrics is None:
+                if not validator(product, extracted_data):
+                    if include_evidence:
+                        snapshot_hash = snapshot_hash or self.get_product_snapshot(product)["content_hash"]
+                    violations.append(self._create_violation_dict(rule, product, extracted_data, snapshot_hash))
+                continue
+            
+            started = time.perf_counter()
+            passed = validator(product, extracted_data)
+            elapsed_us = (time.perf_counter() - started) * 1_000_000
+            evidence_bytes = 0
+            if not passed:
+                if include_evidence:
+                    snapshot_hash = snapshot_hash or self.get_product_snapshot(product)["content_hash"]
+                violation = self._create_violation_dict(rule, product, extracted_data, snapshot_hash)
+                evidence_bytes = len(json.dumps(violation.get("evidence", {}), default=str))
+                violations.append(violation)
+            self.metrics.record(
+                rule.rule_id,
+                elapsed_us,
+                passed,
+                platform_id=product.platform_id,
+                category_id=product.category_id,
+                evidence_bytes=evidence_bytes
+            )
         
         return violations
     
+    def compile_rule_to_sql(self, rule_id: str) -> Optional[ColumnElement]:
+        """
+        Compile a rule into a SQL boolean expression over the products table that is
+        true when the rule passes, mirroring the Python validator. Returns None for
+        rules that need Python (quantity parsing) and can't be pushed down.
+        """
+        compilers = {
+            "LM002": self._price_display_sql,
+            "LM003": self._country_of_origin_sql,
+            "LM004": self._manufacturer_info_sql,
+            "LM005": self._unit_pricing_sql,
+        }
+        compiler = compilers.get(rule_id)
+        if compiler is None:
+            return None
+        # NULL comparisons must count as a failed check, not as unknown
+        return func.coalesce(compiler(), false())
+    
+    def _price_display_sql(self) -> ColumnElement:
+        price_fields = ['price', 'mrp', 'cost', 'amount', 'rate']
+        return or_(
+            Product.price > 0,
+            *[_json_positive_number(field) for field in price_fields]
+        )
+    
+    def _country_of_origin_sql(self) -> ColumnElement:
+        origin_fields = ['country_of_origin', 'origin', 'made_in', 'manufactured_in']
+        return or_(
+            _non_blank(Product.country_of_origin),
+            *[_json_non_blank(field) for field in origin_fields]
+        )
+    
+    def _manufacturer_info_sql(self) -> ColumnElement:
+        manufacturer_fields = ['manufacturer', 'packer', 'company', 'brand_owner']
+        return or_(
+            _non_blank(Product.manufacturer),
+            *[_json_non_blank(field) for field in manufacturer_fields]
+        )
+    
+    def _unit_pricing_sql(self) -> ColumnElement:
+        unit_price_fields = ['unit_price', 'price_per_unit', 'rate_per_kg', 'cost_per_gram']
+        return or_(
+            and_(
+                Product.price != 0,
+                or_(Product.net_quantity != 0, func.coalesce(Product.weight, '') != '')
+            ),
+            *[_json_truthy(field) for field in unit_price_fields]
+        )
+    
     def _validate_weight_declaration(self, product: Product, data: Dict) -> bool:
         """Validate weight declaration compliance"""
-        weight_patterns = [
-            r'\d+\.?\d*\s*(kg|g|gram|grams|kilogram|kilograms)',
-            r'\d+\.?\d*\s*(ml|l|litre|litres|millilitre|millilitres)',
-            r'\d+\.?\d*\s*(piece|pieces|pcs|units?)'
-        ]
-        
-        # Check product weight field
-        if product.weight:
-            for pattern in weight_patterns:
-                if re.search(pattern, product.weight.lower()):
-                    return True
+        # Check normalized product quantity
+        if product.net_quantity is not None or parse_quantity(product.weight):
+            return True
         
         # Check extracted data
         weight_fields = ['weight', 'net_weight', 'quantity', 'volume', 'size']
         for field in weight_fields:
-            if field in data and data[field]:
-                for pattern in weight_patterns:
-                    if re.search(pattern, str(data[field]).lower()):
-                        return True
+            if field in data and data[field] and parse_quantity(str(data[field])):
+                return True
         
         return False
     
+    def _validate_net_quantity(self, product: Product, data: Dict) -> bool:
+        """Validate declared net quantity against the quantity extracted from product details"""
+        declared = self._get_declared_quantity(product)
+        if not declared:
+            # Missing declarations are reported by LM001
+            return True
+        
+        extracted_fields = ['extracted_weight', 'net_weight', 'net_quantity']
+        for field in extracted_fields:
+            extracted = parse_quantity(data.get(field))
+            if extracted and declared.is_comparable(extracted):
+                if declared.relative_difference(extracted) > settings.WEIGHT_TOLERANCE:
+                    return False
+        
+        return True
+    
+    def _get_declared_quantity(self, product: Product) -> Optional[Quantity]:
+        """Get the declared quantity, preferring the stored normalized value"""
+        if product.net_quantity is not None and product.quantity_unit:
+            return Quantity(value=product.net_quantity, unit=product.quantity_unit)
+        return parse_quantity(product.weight)
+    
     def _validate_price_display(self, product: Product, data: Dict) -> bool:
         """Validate price display compliance"""
         # Check if price is available
@@ -137,12 +297,9 @@ class LegalMetrologyRuleEngine:
         price_fields = ['price', 'mrp', 'cost', 'amount', 'rate']
         for field in price_fields:
             if field in data and data[field]:
-                try:
-                    price_value = float(str(data[field]).replace('₹', '').replace(',', ''))
-                    if price_value > 0:
-                        return True
-                except (ValueError, TypeError):
-                    continue
+                price_text = _price_text(data[field])
+                if PRICE_NUMBER.fullmatch(price_text) and float(price_text) > 0:
+                    return True
         
         return False
     
@@ -177,7 +334,7 @@ class LegalMetrologyRuleEngine:
     def _validate_unit_pricing(self, product: Product, data: Dict) -> bool:
         """Validate unit pricing compliance"""
         # Check if both price and weight are available for unit calculation
-        if product.price and product.weight:
+        if product.price and (product.net_quantity or product.weight):
             return True
         
         # Check extracted data for unit pricing
@@ -188,186 +345,143 @@ class LegalMetrologyRuleEngine:
         
         return False
     
-    def _create_violation_dict(self, rule_id: str, product: Product, data: Dict) -> Dict[str, Any]:
-        """Create violation dictionary for a specific rule"""
-        rule = next((r for r in self.rules if r.rule_id == rule_id), None)
-        if not rule:
-            return {}
-        
-        return {
+    def _create_violation_dict(self, rule: ComplianceRule, product: Product, data: Dict,
+                               snapshot_hash: Optional[str]) -> Dict[str, Any]:
+        """
+        Create violation dictionary for a specific rule.
+        Evidence holds only the fields the rule looked at plus a reference to the
+        deduplicated product snapshot; see ViolationService.get_violation_evidence.
+        Evidence is omitted when no snapshot_hash is given.
+        """
+        violation = {
             "violation_type": rule.violation_type,
             "severity": rule.severity,
             "description": f"{rule.name}: {rule.description}",
-            "rule_reference": rule.rule_reference,
-            "evidence": {
-                "product_data": {
-                    "name": product.product_name,
-                    "brand": product.brand,
-                    "price": product.price,
-                    "weight": product.weight,
-                    "country_of_origin": product.country_of_origin,
-                    "manufacturer": product.manufacturer
-                },
-                "extracted_data": data,
-                "rule_id": rule_id
-            }
+            "rule_reference": rule.rule_reference
+        }
+        if snapshot_hash is None:
+            return violation
+        
+        fields = {}
+        for field in rule.evidence_fields:
+            value = getattr(product, field, None)
+            if value is None:
+                value = data.get(field)
+            if value is not None:
+                fields[field] = value
+        
+        violation["evidence"] = {
+            "rule_id": rule.rule_id,
+            "snapshot_hash": snapshot_hash,
+            "fields": fields
+        }
+        return violation
+    
+    def get_product_snapshot(self, product: Product) -> Dict[str, Any]:
+        """Build the immutable product snapshot referenced by violation evidence"""
+        data = {
+            "product_data": {
+                "name": product.product_name,
+                "brand": product.brand,
+                "price": product.price,
+                "weight": product.weight,
+                "country_of_origin": product.country_of_origin,
+                "manufacturer": product.manufacturer
+            },
+            "extracted_data": product.extracted_data or {}
+        }
+        canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+        return {
+            "content_hash": hashlib.sha256(canonical.encode()).hexdigest(),
+            "data": data
         }
     
     def get_compliance_score(self, product: Product) -> float:
         """Calculate compliance score for a product (0-100)"""
-        violations = self.validate_product(product)
+        return self.calculate_score(self.validate_product(product, include_evidence=False))
+    
+    def calculate_score(self, violations: List[Dict[str, Any]]) -> float:
+        """Calculate compliance score (0-100) from already evaluated violations"""
         total_rules = len(self.rules)
-        violations_count = len(violations)
         
         if total_rules == 0:
             return 100.0
         
-        # Weight violations by severity
-        severity_weights = {
-            ViolationSeverity.LOW: 0.25,
-            ViolationSeverity.MEDIUM: 0.5,
-            ViolationSeverity.HIGH: 0.75,
-            ViolationSeverity.CRITICAL: 1.0
-        }
-        
         weighted_violations = sum(
-            severity_weights.get(v.get("severity", ViolationSeverity.MEDIUM), 0.5)
+            SEVERITY_WEIGHTS.get(v.get("severity", ViolationSeverity.MEDIUM), 0.5)
             for v in violations
         )
         
         score = max(0, 100 - (weighted_violations / total_rules * 100))
         return round(score, 2)
 
-    def analyze_with_ml(self, products: List[Product]) -> Dict[str, Any]:
-        """
-        Use ML models to analyze products for anomalies and patterns
-        """
-        if not products:
-            return {}
-
-        # Prepare data for ML analysis
-        df = self._prepare_ml_data(products)
-
-        results = {
-            'anomaly_detection': self._detect_price_anomalies(df),
-            'clustering': self._cluster_products(df),
-            'insights': self._generate_ml_insights(df)
-        }
-
-        return results
-
-    def _prepare_ml_data(self, products: List[Product]) -> pd.DataFrame:
-        """Prepare product data for ML analysis"""
-        data = []
-        for product in products:
-            extracted = product.extracted_data or {}
-            data.append({
-                'id': product.id,
-                'price': product.price or extracted.get('price', 0),
-                'weight': self._extract_numeric_weight(product.weight or extracted.get('weight', '')),
-                'compliance_score': product.compliance_score,
-                'platform': product.platform_id,
-                'category': product.category_id,
-                'brand': product.brand or '',
-                'country_of_origin': product.country_of_origin or ''
-            })
-
-        return pd.DataFrame(data)
+    def calculate_rule_bitmask(self, violations: List[Dict[str, Any]]) -> int:
+        """Bitmask of the rules that produced the given violations"""
+        bitmask = 0
+        for violation in violations:
+            bitmask |= self._rule_bits_by_description.get(violation.get("description"), 0)
+        return bitmask
 
     def _extract_numeric_weight(self, weight_str: str) -> float:
-        """Extract numeric weight value from string"""
-        if not weight_str:
-            return 0.0
-
-        # Extract numbers
-        import re
-        numbers = re.findall(r'\d+\.?\d*', weight_str.lower())
-        if numbers:
-            return float(numbers[0])
-        return 0.0
-
-    def _detect_price_anomalies(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Detect price anomalies using Isolation Forest"""
-        # Filter products with valid prices
-        price_data = df[df['price'] > 0][['price', 'weight']].fillna(0)
-
-        if len(price_data) < 10:
-            return {'anomalies': [], 'message': 'Insufficient data for anomaly detection'}
-
-        # Scale the data
-        scaler = StandardScaler()
-        scaled_data = scaler.fit_transform(price_data)
-
-        # Train Isolation Forest
-        iso_forest = IsolationForest(contamination=0.1, random_state=42)
-        anomalies = iso_forest.fit_predict(scaled_data)
-
-        # Get anomaly indices
-        anomaly_indices = df[df['price'] > 0].index[anomalies == -1].tolist()
-
-        return {
-            'anomalies': anomaly_indices,
-            'contamination_rate': 0.1,
-            'total_products_analyzed': len(price_data)
-        }
-
-    def _cluster_products(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Cluster products based on price and compliance"""
-        # Prepare clustering data
-        cluster_data = df[['price', 'compliance_score']].fillna(0)
+        """Extract weight normalized to base units (g, ml or count) from string"""
+        quantity = parse_quantity(weight_str)
+        return quantity.value if quantity else 0.0
 
-        if len(cluster_data) < 5:
-            return {'clusters': {}, 'message': 'Insufficient data for clustering'}
+    def score_product_anomaly(self, product: Product) -> Optional[float]:
+        """
+        Score a single product against the cached price anomaly model of its
+        (category, platform) segment, falling back to its category model and then
+        the global model. Positive scores are anomalous.
+        Returns None when the product has no price or no model has been trained.
+        """
+        extracted = product.extracted_data or {}
+        price = product.price or extracted.get('price') or 0
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return None
+        if price <= 0:
+            return None
 
-        # Scale data
-        scaler = StandardScaler()
-        scaled_data = scaler.fit_transform(cluster_data)
+        stored = None
+        for name in self._anomaly_model_candidates(product):
+            stored = model_registry.load(name)
+            if stored is not None:
+                break
+        if stored is None:
+            return None
 
-        # Perform K-means clustering
-        kmeans = KMeans(n_clusters=3, random_state=42, n_init=10)
-        clusters = kmeans.fit_predict(scaled_data)
+        weight = product.net_quantity if product.net_quantity is not None \
+            else self._extract_numeric_weight(product.weight or extracted.get('weight', ''))
+        features = np.array([[price, weight]], dtype=float)
+        # decision_function is negative for outliers; flip it so higher means more anomalous
+        return round(float(-stored[0].decision_function(features)[0]), 4)
 
-        # Analyze clusters
-        cluster_analysis = {}
-        for i in range(3):
-            cluster_products = df[clusters == i]
-            cluster_analysis[f'cluster_{i}'] = {
-                'size': len(cluster_products),
-                'avg_price': cluster_products['price'].mean(),
-                'avg_compliance': cluster_products['compliance_score'].mean(),
-                'product_ids': cluster_products['id'].tolist()
-            }
+    def _anomaly_model_candidates(self, product: Product) -> List[str]:
+        """Anomaly model names from most to least specific"""
+        names = []
+        if product.category_id is not None:
+            if product.platform_id is not None:
+                names.append(segment_model_name(product.category_id, product.platform_id))
+            names.append(category_model_name(product.category_id))
+        names.append('price_anomaly')
+        return names
 
+    def create_anomaly_violation(self, product: Product, anomaly_score: float) -> Dict[str, Any]:
+        """Advisory pricing-anomaly violation; not counted in the compliance score"""
         return {
-            'clusters': cluster_analysis,
-            'cluster_centers': kmeans.cluster_centers_.tolist()
-        }
-
-    def _generate_ml_insights(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Generate insights from ML analysis"""
-        insights = {}
-
-        # Price distribution insights
-        if len(df[df['price'] > 0]) > 0:
-            price_stats = df[df['price'] > 0]['price'].describe()
-            insights['price_distribution'] = {
-                'mean': price_stats['mean'],
-                'median': price_stats['50%'],
-                'std': price_stats['std'],
-                'range': f"{price_stats['min']:.2f} - {price_stats['max']:.2f}"
+            "violation_type": ViolationType.PRICING_ANOMALY,
+            "severity": ViolationSeverity.LOW,
+            "description": "Pricing Anomaly: Price is unusual for products in this category",
+            "rule_reference": "ML price anomaly detection (advisory)",
+            "evidence": {
+                "rule_id": ANOMALY_RULE_ID,
+                # The score moves with every model retrain, so it is kept out of the fingerprinted fields
+                "anomaly_score": anomaly_score,
+                "fields": {
+                    "price": product.price,
+                    "net_quantity": product.net_quantity,
+                    "quantity_unit": product.quantity_unit
+                }
             }
-
-        # Compliance score insights
-        compliance_stats = df['compliance_score'].describe()
-        insights['compliance_distribution'] = {
-            'mean': compliance_stats['mean'],
-            'median': compliance_stats['50%'],
-            'high_compliance_count': len(df[df['compliance_score'] >= 80]),
-            'low_compliance_count': len(df[df['compliance_score'] < 50])
         }
-
-        # Platform-wise insights
-        platform_stats = df.groupby('platform')['compliance_score'].agg(['mean', 'count'])
-        insights['platform_compliance'] = platform_stats.to_dict()
-
-        return insights
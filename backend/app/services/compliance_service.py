@@ -1,15 +1,22 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from sqlalchemy.orm import Session
 from app.services.scraping_service import WebScrapingService, PLATFORM_CONFIGS
-from app.services.compliance_engine import LegalMetrologyRuleEngine
+from app.services.compliance_engine import LegalMetrologyRuleEngine, ANOMALY_RULE_ID
 from app.services.product_service import ProductService
 from app.services.violation_service import ViolationService
 from app.services.platform_service import PlatformService
+from app.services.feature_store_service import FeatureStoreService
+from app.services.product_matching_service import ProductMatchingService
+from app.services.distribution_service import DistributionService
+from app.services.sampling_service import SamplingService
+from app.services.rule_metrics import rule_metrics
+from app.core.config import settings
 from app.schemas.product import ProductCreate, ProductScanRequest
-from app.models.product import ComplianceStatus
+from app.models.product import Product, ComplianceStatus
 from app.models.platform import Platform
 import hashlib
 from urllib.parse import urlparse
+from datetime import datetime
 
 class ComplianceService:
     def __init__(self, db: Session):
@@ -19,16 +26,26 @@ class ComplianceService:
         self.product_service = ProductService(db) if db else None
         self.violation_service = ViolationService(db) if db else None
         self.platform_service = PlatformService(db) if db else None
+        self.feature_store = FeatureStoreService(db) if db else None
+        self.matching_service = ProductMatchingService(db) if db else None
+        self.distribution_service = DistributionService(db) if db else None
+        self.sampling_service = SamplingService(db) if db else None
     
-    async def scan_product_from_url(self, scan_request: ProductScanRequest) -> Dict[str, Any]:
-        """Scan a single product from URL and check compliance"""
+    async def scan_product_from_url(self, scan_request: ProductScanRequest, platform: Optional[Platform] = None,
+                                    existing_product: Optional[Product] = None) -> Dict[str, Any]:
+        """
+        Scan a single product from URL and check compliance. Bulk scans pass the
+        platform and the already loaded product so they aren't looked up per URL.
+        """
         try:
             # Get platform configuration
-            platform = self.platform_service.get_platform(scan_request.platform_id)
+            platform = platform or self.platform_service.get_platform(scan_request.platform_id)
             if not platform:
                 return {"error": "Platform not found"}
             
             platform_config = platform.scraping_config or self._get_default_config(scan_request.url)
+            # End the lookup's transaction so no connection sits idle in it during the scrape
+            self.db.commit()
             
             # Scrape product data
             scraped_data = await self.scraping_service.scrape_product_data(
@@ -42,63 +59,89 @@ class ComplianceService:
                     "details": scraped_data.get('error')
                 }
             
-            # Create or update product
-            product_id = self._generate_product_id(scan_request.url)
-            existing_product = self.product_service.get_product_by_product_id(product_id)
+            # Rescans update the product they were started from
+            product_id = (existing_product.product_id if existing_product
+                          else self._generate_product_id(scan_request.url))
             
-            if existing_product:
-                # Update existing product
-                product = self.product_service.update_product(
-                    existing_product.id,
-                    self._create_product_update_from_scraped_data(scraped_data)
-                )
-            else:
-                # Create new product
-                product_create = ProductCreate(
-                    product_id=product_id,
-                    product_name=scraped_data.get('product_name', 'Unknown Product'),
-                    brand=scraped_data.get('brand'),
-                    source=scan_request.url,
-                    price=scraped_data.get('price'),
-                    weight=scraped_data.get('weight') or scraped_data.get('extracted_weight'),
-                    country_of_origin=scraped_data.get('country_of_origin') or scraped_data.get('extracted_country'),
-                    manufacturer=scraped_data.get('manufacturer'),
-                    extracted_data=scraped_data,
-                    platform_id=scan_request.platform_id,
-                    category_id=scan_request.category_id
-                )
-                product = self.product_service.create_product(product_create)
+            # Evaluate the scanned state on an unsaved product, then store it with one upsert
+            product = self.product_service.build_product(ProductCreate(
+                product_id=product_id,
+                product_name=scraped_data.get('product_name') or 'Unknown Product',
+                brand=scraped_data.get('brand'),
+                source=scan_request.url,
+                price=scraped_data.get('price'),
+                weight=scraped_data.get('weight'),
+                country_of_origin=scraped_data.get('country_of_origin') or scraped_data.get('extracted_country'),
+                manufacturer=scraped_data.get('manufacturer'),
+                extracted_data=scraped_data,
+                platform_id=existing_product.platform_id if existing_product else scan_request.platform_id,
+                category_id=existing_product.category_id if existing_product else scan_request.category_id
+            ))
             
             # Run compliance check
             violations = self.compliance_engine.validate_product(product)
-            compliance_score = self.compliance_engine.get_compliance_score(product)
+            compliance_score = self.compliance_engine.calculate_score(violations)
             
             # Update compliance status
+            product.compliance_status = ComplianceStatus.NON_COMPLIANT if violations else ComplianceStatus.COMPLIANT
+            product.violation_count = len(violations)
+            product.compliance_score = compliance_score
+            
+            # Score against the cached per-category anomaly model
+            anomaly_score = self.compliance_engine.score_product_anomaly(product)
+            product.anomaly_score = anomaly_score
+            new_violations = list(violations)
+            if anomaly_score is not None and anomaly_score > 0 and settings.ANOMALY_VIOLATION_ENABLED:
+                new_violations.append(self.compliance_engine.create_anomaly_violation(product, anomaly_score))
+            
+            product = self.product_service.upsert_scanned_product(product)
             if violations:
-                product.compliance_status = ComplianceStatus.NON_COMPLIANT
-                product.violation_count = len(violations)
-                
-                # Create violation records
-                for violation_data in violations:
-                    self.violation_service.create_violation(violation_data, product.id)
-            else:
-                product.compliance_status = ComplianceStatus.COMPLIANT
-                product.violation_count = 0
+                # Violation records reference one stored product snapshot
+                self.violation_service.save_product_snapshot(
+                    self.compliance_engine.get_product_snapshot(product), product.id, commit=False
+                )
             
-            self.product_service.update_last_scanned(product.id)
+            # Findings of earlier scans are bumped rather than duplicated, and the ones
+            # no longer found are resolved, in the transaction of the product upsert
+            evaluated_rules = [rule.rule_id for rule in self.compliance_engine.rules]
+            if anomaly_score is not None and settings.ANOMALY_VIOLATION_ENABLED:
+                evaluated_rules.append(ANOMALY_RULE_ID)
+            self.violation_service.record_violations(
+                [(product.id, v) for v in new_violations], product_ids=[product.id], rule_ids=evaluated_rules,
+                commit=False
+            )
             
-            return {
+            recorded = self.distribution_service.recorded_values(product.id)
+            feature = self.feature_store.update_product_features(product, violations, commit=False)
+            
+            # Place the price in its segment's distribution before adding it
+            price_distribution = self.distribution_service.check_price_outlier(feature)
+            self.distribution_service.record_product(feature, recorded, commit=False)
+            
+            # Group with listings of the same product on other platforms and sellers
+            match_keys = self.matching_service.index_product(product, commit=False)
+            matches = self.matching_service.find_matches(product, computed=match_keys)
+            result = {
                 "success": True,
                 "product_id": product.id,
                 "product_name": product.product_name,
                 "compliance_status": product.compliance_status,
                 "compliance_score": compliance_score,
+                "anomaly_score": anomaly_score,
+                "price_distribution": price_distribution,
                 "violations_found": len(violations),
                 "violations": violations,
+                "matching_listings": matches,
                 "scraped_data": scraped_data
             }
+            # The product, its violations, features, sketches and match keys are committed
+            # together; the result is read first, since the commit expires the product
+            self.db.commit()
+            return result
             
         except Exception as e:
+            # Nothing of a failed scan is kept
+            self.db.rollback()
             return {
                 "error": f"Compliance scan failed: {str(e)}",
                 "url": scan_request.url
@@ -115,6 +158,7 @@ class ComplianceService:
             platform_id=platform_id,
             limit=limit
         )
+        self._detach(platform, *products)
         
         results = {
             "total_scanned": 0,
@@ -137,7 +181,7 @@ class ComplianceService:
                     category_id=product.category_id
                 )
                 
-                result = await self.scan_product_from_url(scan_request)
+                result = await self.scan_product_from_url(scan_request, platform, product)
                 results["total_scanned"] += 1
                 
                 if result.get("success"):
@@ -167,6 +211,66 @@ class ComplianceService:
         
         return results
     
+    async def sample_scan_platform(self, platform_id: int, sample_size: int = None) -> Dict[str, Any]:
+        """
+        Scan a stratified random sample of a platform's products and store the
+        estimated compliance rate of the whole catalog with its confidence interval
+        """
+        platform = self.platform_service.get_platform(platform_id)
+        if not platform:
+            return {"error": "Platform not found"}
+        
+        started_at = datetime.utcnow()
+        plan = self.sampling_service.build_plan(platform_id, sample_size)
+        sample = self.sampling_service.draw_sample(platform_id, plan)
+        self._detach(platform, *(product for products in sample.values() for product in products))
+        
+        results = {
+            "total_scanned": 0,
+            "successful_scans": 0,
+            "failed_scans": 0,
+            "compliance_results": {
+                "compliant": 0,
+                "non_compliant": 0,
+                "pending": 0
+            }
+        }
+        
+        for stratum in plan:
+            stratum["scanned"] = 0
+            stratum["compliant"] = 0
+            for product in sample.get(stratum["category_id"], []):
+                try:
+                    scan_request = ProductScanRequest(
+                        url=product.source,
+                        platform_id=platform_id,
+                        category_id=product.category_id
+                    )
+                    result = await self.scan_product_from_url(scan_request, platform, product)
+                except Exception:
+                    result = {}
+                results["total_scanned"] += 1
+                
+                if not result.get("success"):
+                    results["failed_scans"] += 1
+                    continue
+                results["successful_scans"] += 1
+                stratum["scanned"] += 1
+                status = result.get("compliance_status")
+                if status == ComplianceStatus.COMPLIANT:
+                    stratum["compliant"] += 1
+                    results["compliance_results"]["compliant"] += 1
+                elif status == ComplianceStatus.NON_COMPLIANT:
+                    results["compliance_results"]["non_compliant"] += 1
+                else:
+                    results["compliance_results"]["pending"] += 1
+        
+        db_run = self.sampling_service.save_run(platform_id, plan, started_at)
+        results["sampling_run_id"] = db_run.id
+        results["estimate"] = self.sampling_service.run_summary(db_run, platform.name)
+        results["strata"] = plan
+        return results
+    
     def get_all_rules(self) -> List[Dict[str, Any]]:
         """Get all compliance rules"""
         return [
@@ -181,6 +285,21 @@ class ComplianceService:
             for rule in self.compliance_engine.rules
         ]
     
+    def get_rule_stats(self) -> Dict[str, Any]:
+        """Get per-rule evaluation time and hit-rate statistics of the API and all workers"""
+        return {
+            "profiling_enabled": settings.RULE_PROFILING_ENABLED,
+            **rule_metrics.snapshot()
+        }
+    
+    def _detach(self, *instances):
+        """
+        Detach the platform and products a bulk scan loaded up front. Each scan
+        commits, which would otherwise expire them and reload every one by id.
+        """
+        for instance in instances:
+            self.db.expunge(instance)
+    
     def _generate_product_id(self, url: str) -> str:
         """Generate unique product ID from URL"""
         return hashlib.md5(url.encode()).hexdigest()[:16]
@@ -206,16 +325,3 @@ class ComplianceService:
                 }
             }
     
-    def _create_product_update_from_scraped_data(self, scraped_data: Dict[str, Any]):
-        """Create ProductUpdate from scraped data"""
-        from app.schemas.product import ProductUpdate
-        
-        return ProductUpdate(
-            product_name=scraped_data.get('product_name'),
-            brand=scraped_data.get('brand'),
-            price=scraped_data.get('price'),
-            weight=scraped_data.get('weight') or scraped_data.get('extracted_weight'),
-            country_of_origin=scraped_data.get('country_of_origin') or scraped_data.get('extracted_country'),
-            manufacturer=scraped_data.get('manufacturer'),
-            extracted_data=scraped_data
-        )
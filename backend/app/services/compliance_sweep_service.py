@@ -0,0 +1,242 @@
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, union_all, literal, case, cast, func, not_, exists, bindparam, Numeric
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models.product import Product, ComplianceStatus
+from app.models.violation import Violation, ViolationStatus
+from app.models.product_snapshot import ProductSnapshot
+from app.models.product_feature import ProductFeature
+from app.services.compliance_engine import LegalMetrologyRuleEngine, ComplianceRule, SEVERITY_WEIGHTS
+from app.services.violation_service import ViolationService, fingerprint_sql
+
+def _enum_literal(value, column):
+    # Bound parameters in INSERT ... SELECT are untyped text; cast them to the column's enum
+    return cast(literal(value, column.type), column.type)
+
+class ComplianceSweepService:
+    """
+    Set-based compliance sweep over all products of a platform.
+    Rules the engine can compile to SQL are evaluated by PostgreSQL; the rest
+    fall back to the Python validators over a streamed product cursor.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.compliance_engine = LegalMetrologyRuleEngine()
+
+    def sweep_platform(self, platform_id: int, category_id: Optional[int] = None) -> Dict[str, Any]:
+        scope = [Product.platform_id == platform_id]
+        if category_id:
+            scope.append(Product.category_id == category_id)
+
+        pushed = []
+        python_rules = []
+        for rule in self.compliance_engine.rules:
+            passes = self.compliance_engine.compile_rule_to_sql(rule.rule_id)
+            if passes is None:
+                python_rules.append(rule)
+            else:
+                pushed.append((rule, passes))
+        total_rules = len(self.compliance_engine.rules)
+
+        try:
+            pushed_violations, pushed_ids = self._record_pushed_violations(pushed, scope)
+            products_swept = self._update_pushed_scores(pushed, scope, total_rules)
+            self._update_pushed_feature_bitmasks(pushed, scope)
+            python_violations, python_ids = self._evaluate_python_rules(python_rules, scope, total_rules)
+            resolved_violations = ViolationService(self.db).resolve_undetected(
+                select(Product.id).where(*scope), [rule.rule_id for rule in self.compliance_engine.rules],
+                pushed_ids + python_ids
+            )
+            self._update_compliance_status(scope)
+            self._sync_feature_scores(scope)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return {
+            "platform_id": platform_id,
+            "category_id": category_id,
+            "products_swept": products_swept,
+            "violations_created": pushed_violations + python_violations,
+            "violations_resolved": resolved_violations,
+            "pushed_down_rules": [rule.rule_id for rule, _ in pushed],
+            "python_rules": [rule.rule_id for rule in python_rules]
+        }
+
+    def _record_pushed_violations(self, pushed: List, scope: List) -> Tuple[int, List[int]]:
+        """
+        Bump the unresolved violations that failing pushed-down rules find again and
+        INSERT ... SELECT the new ones, matching on the stored fingerprint. Returns the
+        number inserted and the ids of all bumped and inserted violations.
+        """
+        if not pushed:
+            return 0, []
+
+        selects = [
+            select(
+                Product.id.label("product_id"),
+                _enum_literal(rule.violation_type, Violation.violation_type).label("violation_type"),
+                _enum_literal(rule.severity, Violation.severity).label("severity"),
+                _enum_literal(ViolationStatus.OPEN, Violation.status).label("status"),
+                literal(f"{rule.name}: {rule.description}").label("description"),
+                literal(rule.rule_reference).label("rule_reference"),
+                self._evidence_sql(rule).label("evidence")
+            ).where(*scope, not_(passes))
+            for rule, passes in pushed
+        ]
+        candidates = union_all(*selects).subquery("candidates")
+        unresolved = [
+            Violation.product_id == candidates.c.product_id,
+            Violation.fingerprint == fingerprint_sql(
+                candidates.c.product_id, candidates.c.violation_type, candidates.c.evidence
+            ),
+            Violation.status != ViolationStatus.RESOLVED
+        ]
+        bumped = self.db.scalars(
+            update(Violation)
+            .where(*unresolved)
+            .values(last_seen_at=func.now())
+            .returning(Violation.id)
+            .execution_options(synchronize_session=False)
+        ).all()
+        inserted = self.db.scalars(
+            insert(Violation).from_select(
+                [column.name for column in candidates.c],
+                select(candidates).where(~exists().where(*unresolved))
+            ).returning(Violation.id)
+        ).all()
+        return len(inserted), bumped + inserted
+
+    def _evidence_sql(self, rule: ComplianceRule):
+        """Server-side equivalent of the engine's rule-specific evidence fields"""
+        field_pairs = []
+        for field in rule.evidence_fields:
+            column = getattr(Product, field, None)
+            if column is None:
+                column = Product.extracted_data[field]
+            field_pairs.extend([literal(field), column])
+        return func.json_build_object(
+            literal("rule_id"), literal(rule.rule_id),
+            literal("fields"), func.json_strip_nulls(func.json_build_object(*field_pairs))
+        )
+
+    def _update_pushed_scores(self, pushed: List, scope: List, total_rules: int) -> int:
+        """Set violation count and (unrounded) score from the pushed-down rules"""
+        failed = literal(0)
+        penalty = literal(0.0)
+        for rule, passes in pushed:
+            failed = failed + case((passes, 0), else_=1)
+            penalty = penalty + case((passes, 0.0), else_=SEVERITY_WEIGHTS[rule.severity])
+
+        result = self.db.execute(
+            update(Product)
+            .where(*scope)
+            .values(
+                violation_count=failed,
+                compliance_score=100 - penalty / total_rules * 100,
+                last_scanned=func.now()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def _update_pushed_feature_bitmasks(self, pushed: List, scope: List):
+        """Reset the rule bitmask of existing feature rows to the failing pushed-down rules"""
+        features = ProductFeature.__table__
+        bitmask = literal(0)
+        for rule, passes in pushed:
+            bitmask = bitmask + case((passes, 0), else_=self.compliance_engine.rule_bits[rule.rule_id])
+        self.db.execute(
+            update(features)
+            .where(features.c.product_id.in_(select(Product.id).where(*scope)))
+            .values(rule_bitmask=self._product_value(bitmask))
+        )
+
+    def _evaluate_python_rules(self, python_rules: List[ComplianceRule], scope: List,
+                               total_rules: int) -> Tuple[int, List[int]]:
+        """
+        Evaluate rules that can't be pushed down and write their results in bulk.
+        Returns the number of violations inserted and the ids of those detected.
+        """
+        if not python_rules:
+            return 0, []
+
+        violation_rows = []
+        score_updates = []
+        snapshots = {}
+        products = self.db.query(Product).filter(*scope).order_by(Product.id).yield_per(1000)
+        for product in products:
+            violations = self.compliance_engine.validate_product(product, rules=python_rules)
+            if not violations:
+                continue
+
+            snapshot = self.compliance_engine.get_product_snapshot(product)
+            snapshots.setdefault(snapshot["content_hash"], {
+                "content_hash": snapshot["content_hash"],
+                "data": snapshot["data"],
+                "product_id": product.id
+            })
+            violation_rows.extend((product.id, violation) for violation in violations)
+            score_updates.append({
+                "b_id": product.id,
+                "b_count": len(violations),
+                "b_penalty": sum(SEVERITY_WEIGHTS[v["severity"]] for v in violations) / total_rules * 100,
+                "b_mask": self.compliance_engine.calculate_rule_bitmask(violations)
+            })
+
+        if snapshots:
+            self.db.execute(
+                pg_insert(ProductSnapshot)
+                .values(list(snapshots.values()))
+                .on_conflict_do_nothing(index_elements=["content_hash"])
+            )
+        recorded = ViolationService(self.db).record_violations(violation_rows, commit=False)
+        if score_updates:
+            products_table = Product.__table__
+            self.db.execute(
+                update(products_table)
+                .where(products_table.c.id == bindparam("b_id"))
+                .values(
+                    violation_count=products_table.c.violation_count + bindparam("b_count"),
+                    compliance_score=products_table.c.compliance_score - bindparam("b_penalty")
+                ),
+                score_updates
+            )
+            features = ProductFeature.__table__
+            self.db.execute(
+                update(features)
+                .where(features.c.product_id == bindparam("b_id"))
+                .values(rule_bitmask=features.c.rule_bitmask.op("|")(bindparam("b_mask"))),
+                score_updates
+            )
+        return recorded["inserted"], recorded["violation_ids"]
+
+    def _update_compliance_status(self, scope: List):
+        self.db.execute(
+            update(Product)
+            .where(*scope)
+            .values(
+                compliance_status=case(
+                    (Product.violation_count > 0,
+                     _enum_literal(ComplianceStatus.NON_COMPLIANT, Product.compliance_status)),
+                    else_=_enum_literal(ComplianceStatus.COMPLIANT, Product.compliance_status)
+                ),
+                compliance_score=func.round(cast(Product.compliance_score, Numeric), 2)
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def _sync_feature_scores(self, scope: List):
+        features = ProductFeature.__table__
+        self.db.execute(
+            update(features)
+            .where(features.c.product_id.in_(select(Product.id).where(*scope)))
+            .values(compliance_score=self._product_value(Product.compliance_score))
+        )
+
+    def _product_value(self, expression):
+        # Correlated on product id; an UPDATE ... FROM products would repeat onupdate columns
+        features = ProductFeature.__table__
+        return select(expression).where(Product.id == features.c.product_id).scalar_subquery()
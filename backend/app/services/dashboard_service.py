@@ -1,10 +1,28 @@
 from typing import Dict, Any, List
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from datetime import datetime, timedelta
 from app.models.product import Product, ComplianceStatus
-from app.models.violation import Violation, ViolationStatus, ViolationSeverity
 from app.models.platform import Platform
+from app.services.sampling_service import SamplingService
+from app.services.violation_service import VIOLATION_COUNTS_QUERY
+from app.services.rollup_service import violation_trend_query, compliance_trend_query
+from app.core.cache import result_cache
+from app.core.database import AsyncSessionLocal
+from app.core.config import settings
+
+PRODUCT_COUNTS_QUERY = select(
+    func.count(Product.id).label("total"),
+    func.count(Product.id).filter(Product.compliance_status == ComplianceStatus.COMPLIANT).label("compliant"),
+    func.count(Product.id).filter(Product.compliance_status == ComplianceStatus.NON_COMPLIANT).label("non_compliant"),
+    func.count(Product.id).filter(Product.compliance_status == ComplianceStatus.PENDING).label("pending")
+)
+
+PLATFORM_COUNTS_QUERY = select(
+    func.count(Platform.id).label("total"),
+    func.count(Platform.id).filter(Platform.is_active == True).label("active")
+)
 
 class DashboardService:
     def __init__(self, db: Session):
@@ -12,107 +30,111 @@ class DashboardService:
     
     def get_dashboard_stats(self) -> Dict[str, Any]:
         """Get comprehensive dashboard statistics"""
-        
-        # Product statistics
-        total_products = self.db.query(Product).count()
-        compliant_products = self.db.query(Product).filter(
-            Product.compliance_status == ComplianceStatus.COMPLIANT
-        ).count()
-        non_compliant_products = self.db.query(Product).filter(
-            Product.compliance_status == ComplianceStatus.NON_COMPLIANT
-        ).count()
-        pending_products = self.db.query(Product).filter(
-            Product.compliance_status == ComplianceStatus.PENDING
-        ).count()
-        
-        # Violation statistics
-        total_violations = self.db.query(Violation).count()
-        open_violations = self.db.query(Violation).filter(
-            Violation.status == ViolationStatus.OPEN
-        ).count()
-        resolved_violations = self.db.query(Violation).filter(
-            Violation.status == ViolationStatus.RESOLVED
-        ).count()
-        critical_violations = self.db.query(Violation).filter(
-            Violation.severity == ViolationSeverity.CRITICAL,
-            Violation.status == ViolationStatus.OPEN
-        ).count()
-        
-        # Platform statistics
-        total_platforms = self.db.query(Platform).count()
-        active_platforms = self.db.query(Platform).filter(Platform.is_active == True).count()
-        
-        # Calculate rates
-        compliance_rate = (compliant_products / total_products * 100) if total_products > 0 else 0
-        resolution_rate = (resolved_violations / total_violations * 100) if total_violations > 0 else 0
-        
-        return {
-            "products": {
-                "total": total_products,
-                "compliant": compliant_products,
-                "non_compliant": non_compliant_products,
-                "pending": pending_products,
-                "compliance_rate": round(compliance_rate, 2)
-            },
-            "violations": {
-                "total": total_violations,
-                "open": open_violations,
-                "resolved": resolved_violations,
-                "critical": critical_violations,
-                "resolution_rate": round(resolution_rate, 2)
-            },
-            "platforms": {
-                "total": total_platforms,
-                "active": active_platforms
-            }
-        }
+        return _dashboard_stats(
+            self.db.execute(PRODUCT_COUNTS_QUERY).one(),
+            self.db.execute(VIOLATION_COUNTS_QUERY).one(),
+            self.db.execute(PLATFORM_COUNTS_QUERY).one(),
+            SamplingService(self.db).get_latest_estimates()
+        )
     
     def get_violations_chart_data(self, days: int = 30) -> List[Dict[str, Any]]:
-        """Get violation trends for chart display"""
+        """Get violation trends for chart display, from the daily rollups"""
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        result = self.db.execute(text("""
-            SELECT 
-                DATE(detected_at) as date,
-                violation_type,
-                COUNT(*) as count
-            FROM violations 
-            WHERE detected_at BETWEEN :start_date AND :end_date
-            GROUP BY DATE(detected_at), violation_type
-            ORDER BY date, violation_type
-        """), {"start_date": start_date, "end_date": end_date})
-        
-        return [
-            {
-                "date": row[0].isoformat(),
-                "violation_type": row[1],
-                "count": row[2]
-            }
-            for row in result
-        ]
+        result = self.db.execute(violation_trend_query(start_date, end_date))
+        return _violations_chart_rows(result)
     
     def get_compliance_trends(self, days: int = 30) -> List[Dict[str, Any]]:
-        """Get compliance trends over time"""
+        """Get compliance trends over time, from the daily rollups"""
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        result = self.db.execute(text("""
-            SELECT 
-                DATE(created_at) as date,
-                compliance_status,
-                COUNT(*) as count
-            FROM products 
-            WHERE created_at BETWEEN :start_date AND :end_date
-            GROUP BY DATE(created_at), compliance_status
-            ORDER BY date, compliance_status
-        """), {"start_date": start_date, "end_date": end_date})
-        
-        return [
-            {
-                "date": row[0].isoformat(),
-                "compliance_status": row[1],
-                "count": row[2]
-            }
-            for row in result
-        ]
+        result = self.db.execute(compliance_trend_query(start_date, end_date))
+        return _compliance_trend_rows(result)
+
+class AsyncDashboardService:
+    """DashboardService for async endpoints"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_dashboard_stats(self) -> Dict[str, Any]:
+        """Get comprehensive dashboard statistics, shared by all API workers for DASHBOARD_CACHE_TTL"""
+        return await result_cache.get_or_refresh(
+            "dashboard:stats", _load_dashboard_stats,
+            settings.DASHBOARD_CACHE_TTL, settings.STATS_CACHE_STALE_TTL
+        )
+    
+    async def get_violations_chart_data(self, days: int = 30) -> List[Dict[str, Any]]:
+        """Get violation trends for chart display, from the daily rollups"""
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        result = await self.db.execute(violation_trend_query(start_date, end_date))
+        return _violations_chart_rows(result)
+    
+    async def get_compliance_trends(self, days: int = 30) -> List[Dict[str, Any]]:
+        """Get compliance trends over time, from the daily rollups"""
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        result = await self.db.execute(compliance_trend_query(start_date, end_date))
+        return _compliance_trend_rows(result)
+
+
+async def _load_dashboard_stats() -> Dict[str, Any]:
+    # Runs in the cache's shared task, on a session of its own
+    async with AsyncSessionLocal() as db:
+        return _dashboard_stats(
+            (await db.execute(PRODUCT_COUNTS_QUERY)).one(),
+            (await db.execute(VIOLATION_COUNTS_QUERY)).one(),
+            (await db.execute(PLATFORM_COUNTS_QUERY)).one(),
+            await db.run_sync(lambda session: SamplingService(session).get_latest_estimates())
+        )
+
+def _dashboard_stats(products, violations, platforms, estimated_compliance: Dict[str, Any]) -> Dict[str, Any]:
+    # Calculate rates
+    compliance_rate = (products.compliant / products.total * 100) if products.total > 0 else 0
+    resolution_rate = (violations.resolved / violations.total * 100) if violations.total > 0 else 0
+    
+    return {
+        "products": {
+            "total": products.total,
+            "compliant": products.compliant,
+            "non_compliant": products.non_compliant,
+            "pending": products.pending,
+            "compliance_rate": round(compliance_rate, 2)
+        },
+        "violations": {
+            "total": violations.total,
+            "open": violations.open,
+            "resolved": violations.resolved,
+            "critical": violations.critical_open,
+            "resolution_rate": round(resolution_rate, 2)
+        },
+        "platforms": {
+            "total": platforms.total,
+            "active": platforms.active
+        },
+        # Latest stratified-sample estimates, fresher than statuses from the last full scan
+        "estimated_compliance": estimated_compliance
+    }
+
+def _violations_chart_rows(result) -> List[Dict[str, Any]]:
+    return [
+        {
+            "date": row[0].isoformat(),
+            "violation_type": row[1],
+            "count": row[2]
+        }
+        for row in result
+    ]
+
+def _compliance_trend_rows(result) -> List[Dict[str, Any]]:
+    return [
+        {
+            "date": row[0].isoformat(),
+            "compliance_status": row[1],
+            "count": row[2]
+        }
+        for row in result
+    ]
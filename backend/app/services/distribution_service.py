@@ -0,0 +1,175 @@
+from typing import Dict, Any, List, Optional, Tuple
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models.distribution_sketch import DistributionSketch as SketchRow
+from app.models.product_feature import ProductFeature
+from app.core.config import settings
+from app.services.sketches import DistributionSketch, MomentSketch, TDigest
+
+# Unit prices are per gram, millilitre or item, so each quantity unit has its own distribution
+UNIT_PRICE_METRICS = {"g": "unit_price_g", "ml": "unit_price_ml", "count": "unit_price_count"}
+SKETCH_METRICS = ("price", *UNIT_PRICE_METRICS.values())
+
+# (metric, platform_id, category_id, value) a product contributes to a segment sketch
+SketchValue = Tuple[str, Optional[int], Optional[int], float]
+
+class DistributionService:
+    """
+    Streaming price and unit-price distributions per (platform, category).
+    Each scan folds its values into the segment's stored sketch under a row
+    lock; platform, category and global distributions are merged from the
+    segment sketches when read.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def recorded_values(self, product_id: int) -> List[SketchValue]:
+        """Sketch values of a product's stored feature row, read before a scan refreshes it"""
+        row = self.db.query(
+            ProductFeature.platform_id, ProductFeature.category_id, ProductFeature.price,
+            ProductFeature.unit_price, ProductFeature.quantity_unit
+        ).filter(ProductFeature.product_id == product_id).one_or_none()
+        return _sketch_values(*row) if row else []
+
+    def record_product(self, feature: ProductFeature, previous: Optional[List[SketchValue]] = None,
+                       commit: bool = True):
+        """
+        Add a scanned product's feature values to its segment sketches. previous are
+        its recorded_values before the scan; values it already contributed are not
+        added again, so rescanning an unchanged product leaves the sketches as they
+        are. Sketches cannot remove a superseded value; rebuild drops them.
+        """
+        previous = set(previous or ())
+        for value in _sketch_values(feature.platform_id, feature.category_id, feature.price,
+                                    feature.unit_price, feature.quantity_unit):
+            if value not in previous:
+                metric, platform_id, category_id, number = value
+                self._add_values(metric, platform_id, category_id, [number])
+        if commit:
+            self.db.commit()
+
+    def get_sketch(self, metric: str, platform_id: Optional[int] = None,
+                   category_id: Optional[int] = None) -> DistributionSketch:
+        """Merged sketch of all segments matching the filters (None matches everything)"""
+        query = self.db.query(SketchRow).filter(SketchRow.metric == metric)
+        if platform_id is not None:
+            query = query.filter(SketchRow.platform_id == platform_id)
+        if category_id is not None:
+            query = query.filter(SketchRow.category_id == category_id)
+
+        merged = DistributionSketch(compression=settings.SKETCH_COMPRESSION)
+        for row in query.all():
+            merged.merge(self._to_sketch(row))
+        return merged
+
+    def get_distribution(self, metric: str = "price", platform_id: Optional[int] = None,
+                         category_id: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "metric": metric,
+            "platform_id": platform_id,
+            "category_id": category_id,
+            **self.get_sketch(metric, platform_id, category_id).summary()
+        }
+
+    def check_price_outlier(self, feature: ProductFeature) -> Optional[Dict[str, Any]]:
+        """
+        Percentile of a product's price within the narrowest scope with enough
+        observations: its segment, then its category, then all products.
+        """
+        if not feature.price or feature.price <= 0:
+            return None
+
+        for scope, platform_id, category_id in self._outlier_scopes(feature):
+            sketch = self.get_sketch("price", platform_id, category_id)
+            if sketch.moments.count >= settings.SKETCH_MIN_COUNT:
+                percentile = sketch.cdf(feature.price)
+                return {
+                    "scope": scope,
+                    "price_percentile": round(percentile, 4),
+                    "is_outlier": percentile < settings.PRICE_OUTLIER_LOW_QUANTILE or
+                                  percentile > settings.PRICE_OUTLIER_HIGH_QUANTILE,
+                    "scope_count": sketch.moments.count
+                }
+        return None
+
+    def rebuild(self, batch_size: int = 5000) -> int:
+        """Recompute every segment sketch from the feature store"""
+        sketches: Dict[Tuple[str, Optional[int], Optional[int]], DistributionSketch] = defaultdict(
+            lambda: DistributionSketch(compression=settings.SKETCH_COMPRESSION)
+        )
+        rows = self.db.query(
+            ProductFeature.platform_id, ProductFeature.category_id, ProductFeature.price,
+            ProductFeature.unit_price, ProductFeature.quantity_unit
+        ).yield_per(batch_size)
+        for platform_id, category_id, price, unit_price, quantity_unit in rows:
+            for metric, value in _metric_values(price, unit_price, quantity_unit):
+                sketches[(metric, platform_id, category_id)].add(value)
+
+        self.db.query(SketchRow).delete(synchronize_session=False)
+        self.db.add_all([
+            self._to_row(SketchRow(metric=metric, platform_id=platform_id, category_id=category_id,
+                                   key=_sketch_key(metric, platform_id, category_id)), sketch)
+            for (metric, platform_id, category_id), sketch in sketches.items()
+        ])
+        self.db.commit()
+        return len(sketches)
+
+    def _add_values(self, metric: str, platform_id: Optional[int], category_id: Optional[int],
+                    values: List[float]):
+        key = _sketch_key(metric, platform_id, category_id)
+        # Create the row if needed, then serialize concurrent writers on its lock
+        self.db.execute(
+            pg_insert(SketchRow)
+            .values(key=key, metric=metric, platform_id=platform_id, category_id=category_id,
+                    count=0, mean=0.0, m2=0.0)
+            .on_conflict_do_nothing(index_elements=["key"])
+        )
+        row = self.db.query(SketchRow).filter(SketchRow.key == key).with_for_update().one()
+        sketch = self._to_sketch(row)
+        for value in values:
+            sketch.add(value)
+        self._to_row(row, sketch)
+
+    def _to_sketch(self, row: SketchRow) -> DistributionSketch:
+        return DistributionSketch(
+            TDigest.from_bytes(row.digest, settings.SKETCH_COMPRESSION),
+            MomentSketch(row.count, row.mean, row.m2, row.min_value, row.max_value)
+        )
+
+    def _to_row(self, row: SketchRow, sketch: DistributionSketch) -> SketchRow:
+        row.count = sketch.moments.count
+        row.mean = sketch.moments.mean
+        row.m2 = sketch.moments.m2
+        row.min_value = sketch.moments.minimum
+        row.max_value = sketch.moments.maximum
+        row.digest = sketch.digest.to_bytes()
+        return row
+
+    def _outlier_scopes(self, feature: ProductFeature):
+        if feature.platform_id is not None and feature.category_id is not None:
+            yield "segment", feature.platform_id, feature.category_id
+        if feature.category_id is not None:
+            yield "category", None, feature.category_id
+        yield "global", None, None
+
+def _metric_values(price: Optional[float], unit_price: Optional[float],
+                   quantity_unit: Optional[str]) -> List[Tuple[str, float]]:
+    """(metric, value) pairs a feature row contributes to its segment sketches"""
+    values = []
+    if price is not None and price > 0:
+        values.append(("price", price))
+    if unit_price is not None and unit_price > 0 and quantity_unit in UNIT_PRICE_METRICS:
+        values.append((UNIT_PRICE_METRICS[quantity_unit], unit_price))
+    return values
+
+def _sketch_values(platform_id: Optional[int], category_id: Optional[int], price: Optional[float],
+                   unit_price: Optional[float], quantity_unit: Optional[str]) -> List[SketchValue]:
+    return [
+        (metric, platform_id, category_id, value)
+        for metric, value in _metric_values(price, unit_price, quantity_unit)
+    ]
+
+def _sketch_key(metric: str, platform_id: Optional[int], category_id: Optional[int]) -> str:
+    return f"{metric}:{platform_id if platform_id is not None else '-'}:{category_id if category_id is not None else '-'}"
@@ -0,0 +1,126 @@
+import re
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models.product import Product
+from app.models.product_feature import ProductFeature
+from app.services.compliance_engine import LegalMetrologyRuleEngine
+
+NUMERIC_FEATURES = (
+    "price", "mrp", "net_quantity", "unit_price", "discount_ratio", "compliance_score", "rule_bitmask"
+)
+AMOUNT_REGEX = re.compile(r'\d[\d,]*(?:\.\d+)?')
+
+class FeatureStoreService:
+    """
+    Per-product numeric features kept in product_features.
+    Rows are refreshed whenever a product is scanned, so ML, reports and
+    vectorized rule evaluation can read contiguous arrays instead of
+    re-parsing extracted_data on every run.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.compliance_engine = LegalMetrologyRuleEngine()
+
+    def compute_features(self, product: Product, violations: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Derive the feature row of a product; violations are evaluated when not given"""
+        if violations is None:
+            violations = self.compliance_engine.validate_product(product, include_evidence=False)
+
+        extracted = product.extracted_data or {}
+        price = product.price or _parse_amount(extracted.get('price'))
+        mrp = _parse_amount(extracted.get('mrp'))
+        net_quantity = product.net_quantity
+
+        return {
+            "product_id": product.id,
+            "price": price,
+            "mrp": mrp,
+            "net_quantity": net_quantity,
+            "quantity_unit": product.quantity_unit,
+            "unit_price": price / net_quantity if price and net_quantity else None,
+            "discount_ratio": (mrp - price) / mrp if price and mrp else None,
+            "compliance_score": self.compliance_engine.calculate_score(violations),
+            "rule_bitmask": self.compliance_engine.calculate_rule_bitmask(violations),
+            "platform_id": product.platform_id,
+            "category_id": product.category_id
+        }
+
+    def update_product_features(self, product: Product, violations: Optional[List[Dict[str, Any]]] = None,
+                                commit: bool = True) -> ProductFeature:
+        """
+        Refresh the feature row of a just-scanned product with one upsert.
+        With commit=False it joins the caller's transaction.
+        """
+        statement = self._upsert_statement([self.compute_features(product, violations)])
+        db_feature = self.db.scalars(
+            statement.returning(ProductFeature), execution_options={"populate_existing": True}
+        ).one()
+        if commit:
+            self.db.commit()
+        return db_feature
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Recompute features for every product, upserting them batch by batch"""
+        rows = []
+        total = 0
+        for product in self.db.query(Product).order_by(Product.id).yield_per(batch_size):
+            rows.append(self.compute_features(product))
+            if len(rows) == batch_size:
+                total += self._upsert(rows)
+                rows = []
+        if rows:
+            total += self._upsert(rows)
+        self.db.commit()
+        return total
+
+    def load_arrays(self, columns: Sequence[str] = NUMERIC_FEATURES, platform_id: Optional[int] = None,
+                    category_id: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Read feature columns as float arrays ordered by product id, plus a
+        'product_id' int array. Missing values are NaN; rule_bitmask is returned as int64.
+        """
+        query = select(ProductFeature.product_id, *[getattr(ProductFeature, c) for c in columns])
+        if platform_id:
+            query = query.where(ProductFeature.platform_id == platform_id)
+        if category_id:
+            query = query.where(ProductFeature.category_id == category_id)
+        rows = self.db.execute(query.order_by(ProductFeature.product_id)).all()
+
+        matrix = np.array(rows, dtype=float).reshape(len(rows), len(columns) + 1)
+        arrays = {"product_id": matrix[:, 0].astype(np.int64)}
+        for i, column in enumerate(columns, start=1):
+            if column == "rule_bitmask":
+                arrays[column] = np.nan_to_num(matrix[:, i]).astype(np.int64)
+            else:
+                arrays[column] = np.ascontiguousarray(matrix[:, i])
+        return arrays
+
+    def _upsert(self, rows: List[Dict[str, Any]]) -> int:
+        self.db.execute(self._upsert_statement(rows))
+        return len(rows)
+
+    def _upsert_statement(self, rows: List[Dict[str, Any]]):
+        statement = pg_insert(ProductFeature).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=["product_id"],
+            set_={
+                **{column: statement.excluded[column] for column in rows[0] if column != "product_id"},
+                "updated_at": func.now()
+            }
+        )
+
+def _parse_amount(value) -> Optional[float]:
+    """Parse amounts such as 1299, '1,299.00' or 'MRP: Rs. 1,299'"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    match = AMOUNT_REGEX.search(str(value))
+    if not match:
+        return None
+    amount = float(match.group().replace(',', ''))
+    return amount if amount > 0 else None
@@ -0,0 +1,473 @@
+from collections import defaultdict
+from typing import Dict, Any, Iterator, Optional, Tuple
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.pipeline import make_pipeline
+from joblib import Parallel, delayed
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from app.models.product import Product
+from app.models.product_feature import ProductFeature
+from app.models.ml_analysis import MLProductResult
+from app.core.config import settings
+from app.services.model_registry import model_registry, category_model_name, segment_model_name
+from app.services.quantity_parser import parse_quantity
+
+# Column layout of the streamed feature matrix
+PRICE, WEIGHT, COMPLIANCE, PLATFORM, CATEGORY = range(5)
+N_COLUMNS = 5
+
+ANOMALY_FEATURES = ['price', 'weight']
+CLUSTER_FEATURES = ['price', 'compliance_score']
+N_CLUSTERS = 3
+CONTAMINATION = 0.1
+
+class Reservoir:
+    """Fixed-size uniform random sample over a stream of feature rows"""
+
+    def __init__(self, size: int, n_columns: int, seed: int = 42):
+        self.size = size
+        self.rows = np.empty((size, n_columns))
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, rows: np.ndarray):
+        n = len(rows)
+        fill = min(max(self.size - self.seen, 0), n)
+        if fill:
+            self.rows[self.seen:self.seen + fill] = rows[:fill]
+        if fill < n:
+            positions = self.seen + np.arange(fill, n)
+            slots = self._rng.integers(0, positions + 1)
+            keep = slots < self.size
+            self.rows[slots[keep]] = rows[fill:][keep]
+        self.seen += n
+
+    @property
+    def sample(self) -> np.ndarray:
+        return self.rows[:min(self.seen, self.size)]
+
+class MLAnalysisService:
+    """
+    Out-of-core ML analysis over the full product catalog.
+    Features are streamed through a server-side cursor into fixed-size NumPy
+    chunks; scalers and MiniBatchKMeans learn incrementally and IsolationForest
+    is fitted on a reservoir sample, so memory stays bounded by the chunk and
+    sample sizes rather than the catalog size.
+    """
+
+    def __init__(self, db: Session, chunk_size: Optional[int] = None):
+        self.db = db
+        self.chunk_size = chunk_size or settings.ML_CHUNK_SIZE
+
+    def iter_feature_chunks(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Yield (product_ids, features) chunks; the arrays are reused between chunks.
+        Stored features are used where present, otherwise they are derived from the product.
+        """
+        ids = np.empty(self.chunk_size, dtype=np.int64)
+        features = np.empty((self.chunk_size, N_COLUMNS))
+
+        query = (
+            self.db.query(
+                Product.id,
+                ProductFeature.price,
+                ProductFeature.net_quantity,
+                Product.price,
+                Product.extracted_data['price'].as_string(),
+                Product.net_quantity,
+                Product.weight,
+                Product.compliance_score,
+                Product.platform_id,
+                Product.category_id
+            )
+            .outerjoin(ProductFeature, ProductFeature.product_id == Product.id)
+            .order_by(Product.id)
+            .yield_per(self.chunk_size)
+        )
+
+        n = 0
+        for (product_id, stored_price, stored_quantity, price, extracted_price, net_quantity,
+             weight, score, platform_id, category_id) in query:
+            ids[n] = product_id
+            row = features[n]
+            row[PRICE] = stored_price or price or _to_float(extracted_price)
+            if stored_quantity is not None:
+                row[WEIGHT] = stored_quantity
+            elif net_quantity is not None:
+                row[WEIGHT] = net_quantity
+            else:
+                quantity = parse_quantity(weight)
+                row[WEIGHT] = quantity.value if quantity else 0.0
+            row[COMPLIANCE] = score or 0.0
+            row[PLATFORM] = platform_id if platform_id is not None else np.nan
+            row[CATEGORY] = category_id if category_id is not None else np.nan
+            n += 1
+            if n == self.chunk_size:
+                yield ids, features
+                n = 0
+        if n:
+            yield ids[:n], features[:n]
+
+    def run(self, force_retrain: bool = False, run_id: Optional[int] = None) -> Dict[str, Any]:
+        stats = self._collect_statistics()
+        if stats["count"] == 0:
+            return {}
+
+        anomaly_model, anomaly_metadata = self._get_anomaly_model(stats, force_retrain)
+        cluster_model, cluster_metadata = self._get_cluster_model(stats, force_retrain)
+        segment_models = self._train_segment_models(stats, force_retrain)
+        scoring = self._score_catalog(anomaly_model, cluster_model, segment_models, run_id)
+
+        anomaly_detection = {
+            'contamination_rate': CONTAMINATION,
+            'total_products_analyzed': stats["priced_count"]
+        }
+        if anomaly_model is None:
+            anomaly_detection['message'] = 'Insufficient data for anomaly detection'
+        else:
+            anomaly_detection['model_version'] = anomaly_metadata['version']
+        anomaly_detection.update(scoring['anomalies'])
+
+        clustering = {'clusters': scoring['clusters']}
+        if cluster_model is None:
+            clustering['message'] = 'Insufficient data for clustering'
+        else:
+            clustering['cluster_centers'] = cluster_model[-1].cluster_centers_.tolist()
+            clustering['model_version'] = cluster_metadata['version']
+
+        return {
+            'products_analyzed': stats["count"],
+            'anomaly_detection': anomaly_detection,
+            'clustering': clustering,
+            'segment_models': segment_models,
+            'segments': scoring['segments'],
+            'insights': self._build_insights(stats)
+        }
+
+    def _collect_statistics(self) -> Dict[str, Any]:
+        """First pass: incremental scalers, reservoir samples and exact aggregates"""
+        anomaly_scaler = StandardScaler()
+        cluster_scaler = StandardScaler()
+        sample = Reservoir(settings.ML_SAMPLE_SIZE, N_COLUMNS)
+        category_samples: Dict[int, Reservoir] = {}
+        segment_samples: Dict[Tuple[int, int], Reservoir] = {}
+        platform_totals = defaultdict(lambda: [0.0, 0])
+        stats = {
+            "count": 0, "priced_count": 0,
+            "price_min": np.inf, "price_max": -np.inf,
+            "high_compliance_count": 0, "low_compliance_count": 0
+        }
+
+        for _, features in self.iter_feature_chunks():
+            stats["count"] += len(features)
+            cluster_scaler.partial_fit(features[:, [PRICE, COMPLIANCE]])
+            sample.add(features)
+            stats["high_compliance_count"] += int(np.count_nonzero(features[:, COMPLIANCE] >= 80))
+            stats["low_compliance_count"] += int(np.count_nonzero(features[:, COMPLIANCE] < 50))
+
+            for platform_id in np.unique(features[:, PLATFORM]):
+                rows = features[:, PLATFORM] == platform_id if not np.isnan(platform_id) \
+                    else np.isnan(features[:, PLATFORM])
+                totals = platform_totals[None if np.isnan(platform_id) else int(platform_id)]
+                totals[0] += float(features[rows, COMPLIANCE].sum())
+                totals[1] += int(rows.sum())
+
+            priced = features[features[:, PRICE] > 0]
+            if not len(priced):
+                continue
+            stats["priced_count"] += len(priced)
+            stats["price_min"] = min(stats["price_min"], float(priced[:, PRICE].min()))
+            stats["price_max"] = max(stats["price_max"], float(priced[:, PRICE].max()))
+            anomaly_scaler.partial_fit(priced[:, [PRICE, WEIGHT]])
+            for category_id in np.unique(priced[:, CATEGORY]):
+                if np.isnan(category_id):
+                    continue
+                reservoir = category_samples.setdefault(
+                    int(category_id), Reservoir(settings.ML_CATEGORY_SAMPLE_SIZE, N_COLUMNS)
+                )
+                reservoir.add(priced[priced[:, CATEGORY] == category_id])
+            for category_id, platform_id in np.unique(priced[:, [CATEGORY, PLATFORM]], axis=0):
+                if np.isnan(category_id) or np.isnan(platform_id):
+                    continue
+                reservoir = segment_samples.setdefault(
+                    (int(category_id), int(platform_id)), Reservoir(settings.ML_SEGMENT_SAMPLE_SIZE, N_COLUMNS)
+                )
+                reservoir.add(priced[(priced[:, CATEGORY] == category_id) & (priced[:, PLATFORM] == platform_id)])
+
+        stats.update({
+            "anomaly_scaler": anomaly_scaler,
+            "cluster_scaler": cluster_scaler,
+            "sample": sample.sample,
+            "category_samples": category_samples,
+            "segment_samples": segment_samples,
+            "platform_totals": platform_totals
+        })
+        return stats
+
+    def _get_anomaly_model(self, stats: Dict[str, Any], force_retrain: bool):
+        sample = stats["sample"]
+        priced_sample = sample[sample[:, PRICE] > 0][:, [PRICE, WEIGHT]]
+        if stats["priced_count"] < 10:
+            return None, None
+
+        stored = model_registry.load('price_anomaly')
+        metadata = stored[1] if stored else None
+        reason = "forced" if force_retrain else \
+            model_registry.needs_retraining(metadata, priced_sample, ANOMALY_FEATURES)
+        if reason is None:
+            return stored
+
+        # The scaler saw every priced product; the forest only needs a subsample
+        iso_forest = IsolationForest(contamination=CONTAMINATION, random_state=42)
+        iso_forest.fit(stats["anomaly_scaler"].transform(priced_sample))
+        model = make_pipeline(stats["anomaly_scaler"], iso_forest)
+        metadata = model_registry.save(
+            'price_anomaly', model, ANOMALY_FEATURES, priced_sample,
+            extra={"retrain_reason": reason, "catalog_size": stats["priced_count"]}
+        )
+        return model, metadata
+
+    def _get_cluster_model(self, stats: Dict[str, Any], force_retrain: bool):
+        sample = stats["sample"][:, [PRICE, COMPLIANCE]]
+        if stats["count"] < 5:
+            return None, None
+
+        stored = model_registry.load('product_clusters')
+        metadata = stored[1] if stored else None
+        reason = "forced" if force_retrain else \
+            model_registry.needs_retraining(metadata, sample, CLUSTER_FEATURES)
+        if reason is None:
+            return stored
+
+        # Second pass: mini-batch k-means over the whole catalog
+        scaler = stats["cluster_scaler"]
+        kmeans = MiniBatchKMeans(
+            n_clusters=N_CLUSTERS, random_state=42, n_init=3, batch_size=min(self.chunk_size, 4096)
+        )
+        kmeans.partial_fit(scaler.transform(sample))
+        for _, features in self.iter_feature_chunks():
+            kmeans.partial_fit(scaler.transform(features[:, [PRICE, COMPLIANCE]]))
+
+        model = make_pipeline(scaler, kmeans)
+        metadata = model_registry.save(
+            'product_clusters', model, CLUSTER_FEATURES, sample,
+            extra={"retrain_reason": reason, "catalog_size": stats["count"]}
+        )
+        return model, metadata
+
+    def _train_segment_models(self, stats: Dict[str, Any], force_retrain: bool) -> Dict[str, str]:
+        """
+        Fit price anomaly models per category and per (category, platform) segment
+        on their reservoir samples, in parallel across a process pool. Segments
+        smaller than ANOMALY_MIN_CATEGORY_SIZE get no model of their own and are
+        scored by their parent (category, then global) model.
+        """
+        candidates = [
+            (category_model_name(category_id), reservoir)
+            for category_id, reservoir in stats["category_samples"].items()
+        ] + [
+            (segment_model_name(category_id, platform_id), reservoir)
+            for (category_id, platform_id), reservoir in stats["segment_samples"].items()
+        ]
+
+        trained = {}
+        jobs = []
+        for name, reservoir in candidates:
+            if reservoir.seen < settings.ANOMALY_MIN_CATEGORY_SIZE:
+                continue
+            data = reservoir.sample[:, [PRICE, WEIGHT]]
+            stored = model_registry.load(name)
+            metadata = stored[1] if stored else None
+            reason = "forced" if force_retrain else \
+                model_registry.needs_retraining(metadata, data, ANOMALY_FEATURES)
+            if reason is None:
+                trained[name] = metadata['version']
+            else:
+                jobs.append((name, data, reason, reservoir.seen))
+
+        n_jobs = settings.ML_N_JOBS if len(jobs) > 1 else 1
+        models = Parallel(n_jobs=n_jobs, backend='loky')(
+            delayed(_fit_anomaly_model)(data) for _, data, _, _ in jobs
+        )
+        for (name, data, reason, seen), model in zip(jobs, models):
+            metadata = model_registry.save(
+                name, model, ANOMALY_FEATURES, data,
+                extra={"retrain_reason": reason, "catalog_size": seen}
+            )
+            trained[name] = metadata['version']
+        return trained
+
+    def _score_catalog(self, anomaly_model, cluster_model, segment_models: Dict[str, str],
+                       run_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Final pass: score every product chunk by chunk. With a run_id, each
+        product's anomaly score and cluster are written to ml_product_results.
+        Anomalies come from the segment scores that are persisted; the result
+        lists only the ML_RESULT_ID_LIMIT most anomalous, the rest are paged
+        from ml_product_results.
+        """
+        anomaly_count = 0
+        top_ids = np.empty(0, dtype=np.int64)
+        top_scores = np.empty(0)
+        segments: Dict[str, Dict[str, Any]] = {}
+        loaded_models = {name: model_registry.load(name)[0] for name in segment_models}
+        cluster_size = np.zeros(N_CLUSTERS, dtype=np.int64)
+        cluster_price = np.zeros(N_CLUSTERS)
+        cluster_compliance = np.zeros(N_CLUSTERS)
+        cluster_ids = [[] for _ in range(N_CLUSTERS)]
+        id_limit = settings.ML_RESULT_ID_LIMIT
+
+        if anomaly_model is not None or cluster_model is not None:
+            for ids, features in self.iter_feature_chunks():
+                labels = None
+                scores = self._score_segments(ids, features, loaded_models, anomaly_model, segments)
+                anomalous = scores > 0
+                anomaly_count += int(anomalous.sum())
+                top_ids = np.concatenate([top_ids, ids[anomalous]])
+                top_scores = np.concatenate([top_scores, scores[anomalous]])
+                if len(top_ids) > id_limit:
+                    keep = np.argpartition(-top_scores, id_limit)[:id_limit]
+                    top_ids, top_scores = top_ids[keep], top_scores[keep]
+                if cluster_model is not None:
+                    labels = cluster_model.predict(features[:, [PRICE, COMPLIANCE]])
+                    cluster_size += np.bincount(labels, minlength=N_CLUSTERS)
+                    cluster_price += np.bincount(labels, weights=features[:, PRICE], minlength=N_CLUSTERS)
+                    cluster_compliance += np.bincount(labels, weights=features[:, COMPLIANCE], minlength=N_CLUSTERS)
+                    for i in range(N_CLUSTERS):
+                        room = id_limit - len(cluster_ids[i])
+                        if room > 0:
+                            cluster_ids[i].extend(ids[labels == i][:room].tolist())
+                if run_id is not None:
+                    self._save_product_results(run_id, ids, scores, labels)
+
+        clusters = {}
+        if cluster_model is not None:
+            for i in range(N_CLUSTERS):
+                size = int(cluster_size[i])
+                clusters[f'cluster_{i}'] = {
+                    'size': size,
+                    'avg_price': cluster_price[i] / size if size else None,
+                    'avg_compliance': cluster_compliance[i] / size if size else None,
+                    'product_ids': cluster_ids[i],
+                    'product_ids_truncated': size > len(cluster_ids[i])
+                }
+
+        return {
+            'anomalies': {
+                'anomalies': top_ids[np.argsort(-top_scores, kind='stable')].tolist(),
+                'anomaly_count': anomaly_count,
+                'anomalies_truncated': anomaly_count > len(top_ids)
+            },
+            'clusters': clusters,
+            'segments': segments
+        }
+
+    def _score_segments(self, ids: np.ndarray, features: np.ndarray, loaded_models: Dict[str, Any],
+                        global_model, segments: Dict[str, Dict[str, Any]]) -> np.ndarray:
+        """
+        Score priced products with their segment's model, falling back to parent models.
+        Returns anomaly scores aligned with ids (> 0 is anomalous, NaN when unscored).
+        """
+        scores = np.full(len(ids), np.nan)
+        priced = features[:, PRICE] > 0
+        if not priced.any():
+            return scores
+        keys = np.nan_to_num(features[:, [CATEGORY, PLATFORM]], nan=-1).astype(np.int64)
+
+        for category_id, platform_id in np.unique(keys[priced], axis=0):
+            rows = priced & (keys[:, 0] == category_id) & (keys[:, 1] == platform_id)
+            name = resolve_anomaly_model_name(
+                None if category_id < 0 else int(category_id),
+                None if platform_id < 0 else int(platform_id),
+                loaded_models
+            )
+            model = loaded_models.get(name, global_model)
+            if model is None:
+                continue
+            # decision_function is negative for outliers; flip it so higher means more anomalous
+            scores[rows] = -model.decision_function(features[rows][:, [PRICE, WEIGHT]])
+            anomalous = ids[rows][scores[rows] > 0]
+
+            segment = segments.setdefault(f"{category_id}:{platform_id}", {
+                'category_id': None if category_id < 0 else int(category_id),
+                'platform_id': None if platform_id < 0 else int(platform_id),
+                'model': name,
+                'products': 0,
+                'anomaly_count': 0,
+                'anomalies': []
+            })
+            segment['products'] += int(rows.sum())
+            segment['anomaly_count'] += len(anomalous)
+            room = settings.ML_RESULT_ID_LIMIT - len(segment['anomalies'])
+            if room > 0:
+                segment['anomalies'].extend(anomalous[:room].tolist())
+        return scores
+
+    def _save_product_results(self, run_id: int, ids: np.ndarray, scores: np.ndarray,
+                              labels: Optional[np.ndarray]):
+        scored = ~np.isnan(scores)
+        self.db.execute(insert(MLProductResult), [
+            {
+                "run_id": run_id,
+                "product_id": int(ids[i]),
+                "anomaly_score": round(float(scores[i]), 4) if scored[i] else None,
+                "is_anomaly": bool(scored[i] and scores[i] > 0),
+                "cluster": int(labels[i]) if labels is not None else None
+            }
+            for i in range(len(ids))
+        ])
+
+    def _build_insights(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Distribution insights from the streamed aggregates and reservoir sample"""
+        insights = {}
+        sample = stats["sample"]
+
+        if stats["priced_count"]:
+            scaler = stats["anomaly_scaler"]
+            priced_sample = sample[sample[:, PRICE] > 0][:, PRICE]
+            insights['price_distribution'] = {
+                'mean': float(scaler.mean_[0]),
+                'median': float(np.median(priced_sample)) if len(priced_sample) else None,
+                'std': float(np.sqrt(scaler.var_[0])),
+                'range': f"{stats['price_min']:.2f} - {stats['price_max']:.2f}"
+            }
+
+        insights['compliance_distribution'] = {
+            'mean': float(stats["cluster_scaler"].mean_[1]),
+            'median': float(np.median(sample[:, COMPLIANCE])),
+            'high_compliance_count': stats["high_compliance_count"],
+            'low_compliance_count': stats["low_compliance_count"]
+        }
+
+        insights['platform_compliance'] = {
+            'mean': {str(p): total / count for p, (total, count) in stats["platform_totals"].items() if count},
+            'count': {str(p): count for p, (_, count) in stats["platform_totals"].items()}
+        }
+        return insights
+
+def _to_float(value) -> float:
+    try:
+        return float(value) if value else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+def resolve_anomaly_model_name(category_id: Optional[int], platform_id: Optional[int], available) -> str:
+    """Most specific anomaly model available: segment, then category, then global"""
+    if category_id is not None and platform_id is not None:
+        name = segment_model_name(category_id, platform_id)
+        if name in available:
+            return name
+    if category_id is not None:
+        name = category_model_name(category_id)
+        if name in available:
+            return name
+    return 'price_anomaly'
+
+def _fit_anomaly_model(data: np.ndarray):
+    # Runs in a loky worker process
+    return make_pipeline(
+        StandardScaler(), IsolationForest(contamination=CONTAMINATION, random_state=42)
+    ).fit(data)
@@ -0,0 +1,188 @@
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from app.models.ml_analysis import MLAnalysisRun, MLProductResult, MLRunStatus
+from app.models.product import Product
+from app.core.cache import result_cache
+from app.core.config import settings
+
+class MLResultService:
+    """
+    Stored ML analysis runs and their per-product results.
+    Results of a completed run never change, so pages are cached by run id.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_run(self) -> MLAnalysisRun:
+        db_run = MLAnalysisRun(status=MLRunStatus.RUNNING)
+        self.db.add(db_run)
+        self.db.commit()
+        self.db.refresh(db_run)
+        return db_run
+
+    def complete_run(self, run_id: int, ml_results: Dict[str, Any]) -> MLAnalysisRun:
+        """Mark a run completed and keep its aggregates; per-product rows were written during scoring"""
+        db_run = self.db.query(MLAnalysisRun).filter(MLAnalysisRun.id == run_id).first()
+        anomaly_detection = ml_results.get('anomaly_detection', {})
+        clustering = ml_results.get('clustering', {})
+
+        db_run.status = MLRunStatus.COMPLETED
+        db_run.completed_at = datetime.utcnow()
+        db_run.products_analyzed = ml_results.get('products_analyzed', 0)
+        db_run.anomaly_count = self.db.query(func.count(MLProductResult.id)).filter(
+            MLProductResult.run_id == run_id, MLProductResult.is_anomaly.is_(True)
+        ).scalar()
+        db_run.model_versions = {
+            'price_anomaly': anomaly_detection.get('model_version'),
+            'product_clusters': clustering.get('model_version'),
+            **ml_results.get('segment_models', {})
+        }
+        # Product id lists live in ml_product_results; keep only the aggregates here
+        db_run.summary = {
+            'contamination_rate': anomaly_detection.get('contamination_rate'),
+            'clusters': {
+                name: {k: v for k, v in cluster.items() if not k.startswith('product_ids')}
+                for name, cluster in clustering.get('clusters', {}).items()
+            },
+            'cluster_centers': clustering.get('cluster_centers'),
+            'segments': {
+                key: {k: v for k, v in segment.items() if k != 'anomalies'}
+                for key, segment in ml_results.get('segments', {}).items()
+            },
+            'insights': ml_results.get('insights', {})
+        }
+        self.db.commit()
+        self.db.refresh(db_run)
+        return db_run
+
+    def fail_run(self, run_id: int, error: str):
+        self.db.rollback()
+        db_run = self.db.query(MLAnalysisRun).filter(MLAnalysisRun.id == run_id).first()
+        if db_run:
+            db_run.status = MLRunStatus.FAILED
+            db_run.error = error[:1000]
+            db_run.completed_at = datetime.utcnow()
+            self.db.commit()
+
+    def prune_runs(self, keep: Optional[int] = None) -> int:
+        """
+        Delete runs older than the newest `keep` completed runs, with their per-product
+        results, so ml_product_results holds a bounded number of catalog-sized runs.
+        Runs still in progress are never deleted, and the latest completed run is always kept.
+        """
+        keep = settings.ML_KEEP_RUNS if keep is None else keep
+        if keep < 1:
+            raise ValueError("keep must be at least 1")
+        oldest_kept = self.db.query(MLAnalysisRun.id).filter(
+            MLAnalysisRun.status == MLRunStatus.COMPLETED
+        ).order_by(MLAnalysisRun.id.desc()).offset(keep - 1).limit(1).scalar()
+        if oldest_kept is None:
+            return 0
+
+        expired = MLAnalysisRun.id < oldest_kept, MLAnalysisRun.status != MLRunStatus.RUNNING
+        expired_runs = self.db.query(MLAnalysisRun.id).filter(*expired)
+        self.db.query(MLProductResult).filter(
+            MLProductResult.run_id.in_(expired_runs.scalar_subquery())
+        ).delete(synchronize_session=False)
+        deleted = self.db.query(MLAnalysisRun).filter(*expired).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
+
+    def get_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        runs = self.db.query(MLAnalysisRun).order_by(MLAnalysisRun.id.desc()).limit(limit).all()
+        return [self._run_dict(run, include_summary=False) for run in runs]
+
+    def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
+        db_run = self.db.query(MLAnalysisRun).filter(MLAnalysisRun.id == run_id).first()
+        if db_run is None:
+            return None
+        if db_run.status != MLRunStatus.COMPLETED:
+            return self._run_dict(db_run)
+        return result_cache.get_or_set(
+            f"ml:{run_id}:run", lambda: self._run_dict(db_run), settings.ML_RESULT_CACHE_TTL
+        )
+
+    def get_latest_run_id(self) -> Optional[int]:
+        return self.db.query(func.max(MLAnalysisRun.id)).filter(
+            MLAnalysisRun.status == MLRunStatus.COMPLETED
+        ).scalar()
+
+    def get_anomalies(self, run_id: int, skip: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Anomalous products of a run, most anomalous first"""
+        return self._cached_page(
+            run_id,
+            f"anomalies:{skip}:{limit}",
+            lambda: self._load_page(
+                run_id,
+                [MLProductResult.is_anomaly.is_(True)],
+                [MLProductResult.anomaly_score.desc(), MLProductResult.product_id],
+                skip, limit
+            )
+        )
+
+    def get_clusters(self, run_id: int, cluster: Optional[int] = None,
+                     skip: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """Cluster assignments of a run, optionally for a single cluster"""
+        filters = [MLProductResult.cluster.isnot(None)]
+        if cluster is not None:
+            filters.append(MLProductResult.cluster == cluster)
+        return self._cached_page(
+            run_id,
+            f"clusters:{cluster}:{skip}:{limit}",
+            lambda: self._load_page(
+                run_id, filters, [MLProductResult.cluster, MLProductResult.product_id], skip, limit
+            )
+        )
+
+    def _cached_page(self, run_id: int, key: str, loader) -> Dict[str, Any]:
+        # Only completed runs are immutable; a running run's rows are not committed yet
+        db_run = self.db.get(MLAnalysisRun, run_id)
+        if db_run is None or db_run.status != MLRunStatus.COMPLETED:
+            return loader()
+        return result_cache.get_or_set(f"ml:{run_id}:{key}", loader, settings.ML_RESULT_CACHE_TTL)
+
+    def _load_page(self, run_id: int, filters: List, order_by: List, skip: int, limit: int) -> Dict[str, Any]:
+        query = self.db.query(MLProductResult).filter(MLProductResult.run_id == run_id, *filters)
+        total = query.count()
+        rows = (
+            query.join(Product, Product.id == MLProductResult.product_id)
+            .with_entities(
+                MLProductResult.product_id,
+                MLProductResult.anomaly_score,
+                MLProductResult.is_anomaly,
+                MLProductResult.cluster,
+                Product.product_name,
+                Product.platform_id,
+                Product.category_id,
+                Product.price
+            )
+            .order_by(*order_by)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+        return {
+            "run_id": run_id,
+            "total": total,
+            "skip": skip,
+            "limit": limit,
+            "items": [dict(row._mapping) for row in rows]
+        }
+
+    def _run_dict(self, db_run: MLAnalysisRun, include_summary: bool = True) -> Dict[str, Any]:
+        run = {
+            "id": db_run.id,
+            "status": db_run.status.value,
+            "products_analyzed": db_run.products_analyzed,
+            "anomaly_count": db_run.anomaly_count,
+            "model_versions": db_run.model_versions,
+            "error": db_run.error,
+            "started_at": db_run.started_at.isoformat() if db_run.started_at else None,
+            "completed_at": db_run.completed_at.isoformat() if db_run.completed_at else None
+        }
+        if include_summary:
+            run["summary"] = db_run.summary
+        return run
@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np
+from app.core.config import settings
+
+class ModelRegistry:
+    """
+    Versioned on-disk store for fitted ML models.
+    Layout: <base_dir>/<name>/<version>/{model.joblib, metadata.json} plus a
+    <base_dir>/<name>/LATEST pointer. Models are loaded lazily, memory-mapped,
+    and cached per process until a newer version is published.
+    """
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir or settings.MODEL_STORE_DIR
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[str, Any, Dict[str, Any]]] = {}
+
+    def save(self, name: str, model: Any, features: List[str], training_data: np.ndarray,
+             extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Persist a fitted model as a new version and make it the latest"""
+        version = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        version_dir = os.path.join(self.base_dir, name, version)
+        os.makedirs(version_dir, exist_ok=True)
+
+        metadata = {
+            "name": name,
+            "version": version,
+            "trained_at": datetime.utcnow().isoformat(),
+            "training_size": int(len(training_data)),
+            "feature_schema": features,
+            "feature_means": np.nanmean(training_data, axis=0).tolist() if len(training_data) else [],
+            "feature_stds": np.nanstd(training_data, axis=0).tolist() if len(training_data) else [],
+            **(extra or {})
+        }
+        import joblib
+
+        joblib.dump(model, os.path.join(version_dir, "model.joblib"))
+        with open(os.path.join(version_dir, "metadata.json"), "w") as f:
+            json.dump(metadata, f)
+
+        # Publish atomically so concurrent readers never see a half-written pointer
+        pointer = os.path.join(self.base_dir, name, "LATEST")
+        with open(pointer + ".tmp", "w") as f:
+            f.write(version)
+        os.replace(pointer + ".tmp", pointer)
+
+        with self._lock:
+            self._cache[name] = (version, model, metadata)
+        self._prune(name)
+        return metadata
+
+    def load(self, name: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """Load the latest version of a model, or None if none was trained yet"""
+        version = self.latest_version(name)
+        if version is None:
+            return None
+
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached and cached[0] == version:
+                return cached[1], cached[2]
+
+        import joblib
+
+        version_dir = os.path.join(self.base_dir, name, version)
+        model = joblib.load(os.path.join(version_dir, "model.joblib"), mmap_mode="r")
+        with open(os.path.join(version_dir, "metadata.json")) as f:
+            metadata = json.load(f)
+
+        with self._lock:
+            self._cache[name] = (version, model, metadata)
+        return model, metadata
+
+    def latest_version(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.base_dir, name, "LATEST")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def needs_retraining(self, metadata: Optional[Dict[str, Any]], data: np.ndarray,
+                         features: List[str]) -> Optional[str]:
+        """Return the reason a model should be retrained on data, or None to keep it"""
+        if metadata is None:
+            return "no_model"
+        if metadata.get("feature_schema") != features:
+            return "feature_schema_changed"
+
+        trained_at = datetime.fromisoformat(metadata["trained_at"])
+        if datetime.utcnow() - trained_at > timedelta(hours=settings.MODEL_RETRAIN_INTERVAL_HOURS):
+            return "expired"
+
+        drift = self.drift_score(metadata, data)
+        if drift > settings.MODEL_DRIFT_THRESHOLD:
+            return "drift"
+        return None
+
+    def drift_score(self, metadata: Dict[str, Any], data: np.ndarray) -> float:
+        """Largest shift of a feature mean, in training standard deviations"""
+        if not len(data) or not metadata.get("feature_means"):
+            return 0.0
+        means = np.asarray(metadata["feature_means"])
+        stds = np.asarray(metadata["feature_stds"])
+        stds = np.where(stds > 0, stds, 1.0)
+        return float(np.max(np.abs(np.nanmean(data, axis=0) - means) / stds))
+
+    def _prune(self, name: str):
+        """Keep only the most recent MODEL_STORE_KEEP_VERSIONS versions"""
+        model_dir = os.path.join(self.base_dir, name)
+        versions = sorted(
+            v for v in os.listdir(model_dir)
+            if os.path.isdir(os.path.join(model_dir, v))
+        )
+        for version in versions[:-settings.MODEL_STORE_KEEP_VERSIONS]:
+            shutil.rmtree(os.path.join(model_dir, version), ignore_errors=True)
+
+def category_model_name(category_id: int) -> str:
+    return f'price_anomaly_category_{category_id}'
+
+def segment_model_name(category_id: int, platform_id: int) -> str:
+    return f'price_anomaly_segment_{category_id}_{platform_id}'
+
+# Process-wide registry shared by the rule engine and ML tasks
+model_registry = ModelRegistry()
@@ -0,0 +1,144 @@
+import gzip
+import os
+from datetime import date, datetime, time, timezone
+from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.partitions import (
+    PARTITIONED_TABLES, month_start, add_months, partition_bounds, list_partitions,
+    list_detached_partitions, create_monthly_partitions
+)
+
+class PartitionService:
+    """
+    Monthly partitions of violations and reports. Partitions are created ahead of
+    the inserts that need them; months past retention are detached, archived to
+    gzipped CSV and dropped instead of being deleted row by row.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_future_partitions(self, months_ahead: Optional[int] = None) -> Dict[str, List[str]]:
+        """Create any missing partition from the current month through months_ahead"""
+        if months_ahead is None:
+            months_ahead = settings.PARTITION_PREMAKE_MONTHS
+        current = month_start()
+        created = {
+            table: create_monthly_partitions(self.db.connection(), table, current, add_months(current, months_ahead))
+            for table in PARTITIONED_TABLES
+        }
+        self.db.commit()
+        return created
+
+    def retire_expired_partitions(self) -> Dict[str, Any]:
+        """
+        Detach, archive and drop the partitions that ended before their table's
+        retention window, oldest first. Open and in-progress violations of an expired
+        month are carried forward to the oldest retained month first, keeping their ids,
+        so a long-lived finding does not hold its month back.
+        """
+        retention = {
+            "violations": settings.VIOLATION_RETENTION_MONTHS,
+            "reports": settings.REPORT_RETENTION_MONTHS
+        }
+        results = {}
+        for table in PARTITIONED_TABLES:
+            cutoff = add_months(month_start(), -retention[table])
+            retired = []
+            held = {}
+            # Left detached by an interrupted run
+            for name, month in list_detached_partitions(self.db.connection(), table):
+                if add_months(month, 1) <= cutoff:
+                    retired.append(self._archive_and_drop(table, name))
+            for name, month in list_partitions(self.db.connection(), table):
+                if add_months(month, 1) > cutoff:
+                    continue
+                if table == "violations":
+                    carried = self._carry_forward_active_violations(month, cutoff)
+                self._detach(table, name)
+                if table == "violations":
+                    # Reopened or reassigned after the carry-forward; carried on the next run
+                    active = self._active_violations(name)
+                    if active:
+                        self._attach(table, name, month)
+                        held[name] = active
+                        # Months are retired oldest first, which RollupService.rebuild relies on
+                        break
+                entry = self._archive_and_drop(table, name)
+                if table == "violations":
+                    entry["carried_forward"] = carried
+                retired.append(entry)
+            results[table] = {"retired": retired, "held": held}
+        return results
+
+    def _carry_forward_active_violations(self, month: date, cutoff: date) -> int:
+        """
+        Move the month's open and in-progress violations to the start of the cutoff
+        month through the parent table, so the rollup triggers move their counts too
+        """
+        result = self.db.execute(text(
+            "UPDATE violations SET detected_at = :cutoff "
+            "WHERE detected_at >= :start AND detected_at < :end AND status IN ('OPEN', 'IN_PROGRESS')"
+        ), {"cutoff": _utc(cutoff), "start": _utc(month), "end": _utc(add_months(month, 1))})
+        self.db.commit()
+        return result.rowcount
+
+    def _active_violations(self, partition: str) -> int:
+        active = self.db.scalar(text(
+            f"SELECT count(*) FROM {partition} WHERE status IN ('OPEN', 'IN_PROGRESS')"
+        ))
+        self.db.commit()
+        return active
+
+    def _archive_and_drop(self, table: str, partition: str) -> Dict[str, Any]:
+        # Detached, so nothing writes to it between the COPY and the DROP
+        archive, rows = self._archive(table, partition)
+        self.db.execute(text(f"DROP TABLE {partition}"))
+        self.db.commit()
+        return {"partition": partition, "archived_rows": rows, "archive": archive}
+
+    def _archive(self, table: str, partition: str):
+        """COPY the partition to PARTITION_ARCHIVE_DIR/<table>/<partition>.csv.gz and return (path, rows)"""
+        directory = os.path.join(settings.PARTITION_ARCHIVE_DIR, table)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{partition}.csv.gz")
+        partial = path + ".partial"
+
+        cursor = self.db.connection().connection.cursor()
+        try:
+            with gzip.open(partial, "wt", newline="") as f:
+                cursor.copy_expert(f"COPY {partition} TO STDOUT WITH (FORMAT csv, HEADER)", f)
+            rows = cursor.rowcount
+        finally:
+            cursor.close()
+        self.db.commit()
+        with open(partial, "rb") as f:
+            os.fsync(f.fileno())
+        # Only a complete archive gets the final name; the partition is dropped after this
+        os.replace(partial, path)
+        return path, rows
+
+    def _detach(self, table: str, partition: str):
+        # DETACH ... CONCURRENTLY only takes a SHARE UPDATE EXCLUSIVE lock on the parent,
+        # so scans keep writing, and it returns once no transaction can still write to the
+        # partition; it cannot run inside a transaction block
+        self.db.commit()
+        with self.db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            pending = conn.scalar(
+                text("SELECT inhdetachpending FROM pg_inherits WHERE inhrelid = CAST(:partition AS regclass)"),
+                {"partition": partition}
+            )
+            # A detach interrupted on an earlier run is completed with FINALIZE
+            conn.execute(text(
+                f"ALTER TABLE {table} DETACH PARTITION {partition} "
+                + ("FINALIZE" if pending else "CONCURRENTLY")
+            ))
+
+    def _attach(self, table: str, partition: str, month: date):
+        self.db.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {partition} {partition_bounds(month)}"))
+        self.db.commit()
+
+def _utc(month: date) -> datetime:
+    return datetime.combine(month, time(), timezone.utc)
@@ -1,5 +1,7 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from app.models.platform import Platform
 
 class PlatformService:
@@ -11,3 +13,13 @@ class PlatformService:
 
     def get_platform(self, platform_id: int) -> Optional[Platform]:
         return self.db.query(Platform).filter(Platform.id == platform_id).first()
+
+class AsyncPlatformService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_platforms(self, skip: int = 0, limit: int = 100) -> List[Platform]:
+        return (await self.db.scalars(select(Platform).order_by(Platform.id).offset(skip).limit(limit))).all()
+
+    async def get_platform(self, platform_id: int) -> Optional[Platform]:
+        return await self.db.get(Platform, platform_id)
@@ -0,0 +1,97 @@
+import hashlib
+import re
+import unicodedata
+import zlib
+from typing import Dict, List, Optional
+import numpy as np
+from app.services.quantity_parser import parse_quantity
+
+SHINGLE_SIZE = 3
+# Mersenne prime for the universal hash family h(x) = (a * x + b) mod P
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+NON_ALNUM_REGEX = re.compile(r'[^a-z0-9]+')
+ASIN_REGEX = re.compile(r'^[A-Z0-9]{10}$')
+
+def normalize_gtin(value) -> Optional[str]:
+    """Normalize a GTIN-8/12/13/14 (EAN, UPC) to 14 digits; None if the check digit is invalid"""
+    if value is None:
+        return None
+    digits = re.sub(r'\D', '', str(value))
+    if len(digits) not in (8, 12, 13, 14):
+        return None
+    digits = digits.zfill(14)
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(digits[:-1]))
+    if (10 - total % 10) % 10 != int(digits[-1]):
+        return None
+    return digits
+
+def normalize_asin(value) -> Optional[str]:
+    if value is None:
+        return None
+    asin = str(value).strip().upper()
+    return asin if ASIN_REGEX.match(asin) else None
+
+def extract_identifiers(extracted_data: Optional[Dict]) -> Dict[str, str]:
+    """Exact product identifiers found in scraped data"""
+    data = extracted_data or {}
+    identifiers = {}
+    for field in ('gtin', 'ean', 'upc', 'barcode'):
+        gtin = normalize_gtin(data.get(field))
+        if gtin:
+            identifiers['gtin'] = gtin
+            break
+    asin = normalize_asin(data.get('asin'))
+    if asin:
+        identifiers['asin'] = asin
+    return identifiers
+
+def normalize_listing_text(name: Optional[str], brand: Optional[str], quantity_text: Optional[str]) -> str:
+    """Lowercased, accent- and punctuation-free name + brand + normalized quantity"""
+    parts = [name or '', brand or '']
+    quantity = parse_quantity(quantity_text)
+    if quantity:
+        parts.append(f"{quantity.value:g}{quantity.unit}")
+    text = unicodedata.normalize('NFKD', ' '.join(parts)).encode('ascii', 'ignore').decode().lower()
+    return NON_ALNUM_REGEX.sub(' ', text).strip()
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles with LSH banding.
+    Listings whose Jaccard similarity is above roughly (1 / bands) ** (1 / rows)
+    share at least one band key with high probability.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Fixed seed: signatures must be comparable across processes and restarts
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        # a, x < 2**32 so a * x + b cannot overflow uint64
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> List[str]:
+        return [
+            f"lsh:{band}:" + hashlib.blake2b(
+                signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8
+            ).hexdigest()
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the underlying shingle sets"""
+        return float(np.mean(signature == other))
@@ -0,0 +1,171 @@
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert
+from app.models.product import Product
+from app.models.product_match import ProductFingerprint, ProductMatchKey
+from app.core.config import settings
+from app.services.product_matching import (
+    MinHasher, extract_identifiers, normalize_listing_text
+)
+
+# Signatures must be built with the same permutations everywhere
+minhasher = MinHasher(settings.MATCH_MINHASH_PERMUTATIONS, settings.MATCH_LSH_BANDS)
+
+class ProductMatchingService:
+    """
+    Groups listings of the same physical product across platforms and sellers.
+    Exact identifiers (GTIN/EAN/UPC, ASIN) and MinHash LSH band keys over
+    normalized name + brand + quantity are stored in an indexed key table, so
+    a lookup is a single indexed IN query plus a signature comparison.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def compute_keys(self, product: Product) -> Tuple[List[str], str, np.ndarray]:
+        """Return (match keys, normalized text, MinHash signature) of a listing"""
+        extracted = product.extracted_data or {}
+        text = normalize_listing_text(
+            product.product_name,
+            product.brand,
+            product.weight or extracted.get('weight') or extracted.get('extracted_weight')
+        )
+        signature = minhasher.signature(text)
+        keys = [f"{kind}:{value}" for kind, value in sorted(extract_identifiers(extracted).items())]
+        keys.extend(minhasher.band_keys(signature))
+        return keys, text, signature
+
+    def index_product(self, product: Product, commit: bool = True) -> Tuple[List[str], str, np.ndarray]:
+        """
+        (Re)index a scanned listing and return its compute_keys result, which
+        find_matches can reuse. With commit=False it joins the caller's transaction.
+        """
+        computed = keys, text, signature = self.compute_keys(product)
+        self.db.query(ProductMatchKey).filter(ProductMatchKey.product_id == product.id).delete(
+            synchronize_session=False
+        )
+        self.db.add_all([ProductMatchKey(product_id=product.id, key=key) for key in keys])
+        self.db.merge(ProductFingerprint(
+            product_id=product.id, normalized_text=text, signature=signature.tobytes()
+        ))
+        if commit:
+            self.db.commit()
+        return computed
+
+    def find_matches(self, product: Product, min_similarity: Optional[float] = None,
+                     computed: Optional[Tuple[List[str], str, np.ndarray]] = None) -> List[Dict[str, Any]]:
+        """
+        Listings matching a product: identifier matches first, then near duplicates
+        whose estimated Jaccard similarity is at least min_similarity. computed is
+        the product's compute_keys result when the caller already has it.
+        """
+        min_similarity = settings.MATCH_SIMILARITY_THRESHOLD if min_similarity is None else min_similarity
+        keys, _, signature = computed or self.compute_keys(product)
+
+        # One indexed round trip returns the candidates together with their signatures
+        rows = self.db.execute(
+            select(ProductMatchKey.product_id, ProductMatchKey.key, ProductFingerprint.signature)
+            .join(ProductFingerprint, ProductFingerprint.product_id == ProductMatchKey.product_id)
+            .where(ProductMatchKey.key.in_(keys), ProductMatchKey.product_id != product.id)
+        ).all()
+
+        identifier_matches: Dict[int, List[str]] = {}
+        lsh_candidates = {}
+        for product_id, key, stored in rows:
+            if key.startswith("lsh:"):
+                lsh_candidates[product_id] = stored
+            else:
+                identifier_matches.setdefault(product_id, []).append(key.split(":", 1)[0])
+
+        matches = [
+            {"product_id": product_id, "match_type": "identifier", "matched_on": sorted(kinds), "similarity": 1.0}
+            for product_id, kinds in identifier_matches.items()
+        ]
+
+        for product_id, stored in lsh_candidates.items():
+            if product_id in identifier_matches:
+                continue
+            similarity = minhasher.similarity(signature, np.frombuffer(stored, dtype=np.uint32))
+            if similarity >= min_similarity:
+                matches.append({
+                    "product_id": product_id,
+                    "match_type": "near_duplicate",
+                    "matched_on": ["name_brand_quantity"],
+                    "similarity": round(similarity, 4)
+                })
+
+        return sorted(matches, key=lambda m: (m["match_type"] != "identifier", -m["similarity"], m["product_id"]))
+
+    def compare_declarations(self, product: Product, matches: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Compare the declarations of a listing with those of its matches"""
+        listings = {p.id: p for p in self.db.query(Product).filter(
+            Product.id.in_([m["product_id"] for m in matches])
+        ).all()} if matches else {}
+
+        compared = []
+        for match in matches:
+            other = listings.get(match["product_id"])
+            if other is None:
+                continue
+            compared.append({
+                **match,
+                "platform_id": other.platform_id,
+                "product_name": other.product_name,
+                "price": other.price,
+                "net_quantity": other.net_quantity,
+                "quantity_unit": other.quantity_unit,
+                "compliance_score": other.compliance_score,
+                "discrepancies": self._declaration_discrepancies(product, other)
+            })
+
+        return {
+            "product_id": product.id,
+            "match_count": len(compared),
+            "matches": compared
+        }
+
+    def rebuild(self, batch_size: int = 1000) -> int:
+        """Reindex every product"""
+        self.db.query(ProductMatchKey).delete(synchronize_session=False)
+        self.db.query(ProductFingerprint).delete(synchronize_session=False)
+
+        key_rows = []
+        fingerprint_rows = []
+        total = 0
+        for product in self.db.query(Product).order_by(Product.id).yield_per(batch_size):
+            keys, text, signature = self.compute_keys(product)
+            key_rows.extend({"product_id": product.id, "key": key} for key in keys)
+            fingerprint_rows.append({
+                "product_id": product.id, "normalized_text": text, "signature": signature.tobytes()
+            })
+            total += 1
+            if len(fingerprint_rows) == batch_size:
+                self._bulk_insert(key_rows, fingerprint_rows)
+                key_rows, fingerprint_rows = [], []
+        self._bulk_insert(key_rows, fingerprint_rows)
+        self.db.commit()
+        return total
+
+    def _bulk_insert(self, key_rows: List[Dict[str, Any]], fingerprint_rows: List[Dict[str, Any]]):
+        if fingerprint_rows:
+            self.db.execute(insert(ProductFingerprint), fingerprint_rows)
+        if key_rows:
+            self.db.execute(insert(ProductMatchKey), key_rows)
+
+    def _declaration_discrepancies(self, product: Product, other: Product) -> List[str]:
+        discrepancies = []
+        if product.net_quantity and other.net_quantity and product.quantity_unit == other.quantity_unit:
+            if abs(product.net_quantity - other.net_quantity) / product.net_quantity > settings.WEIGHT_TOLERANCE:
+                discrepancies.append("net_quantity")
+        elif product.quantity_unit and other.quantity_unit and product.quantity_unit != other.quantity_unit:
+            discrepancies.append("quantity_unit")
+        for field in ("manufacturer", "country_of_origin"):
+            ours = _normalized(getattr(product, field))
+            theirs = _normalized(getattr(other, field))
+            if ours and theirs and ours != theirs:
+                discrepancies.append(field)
+        return discrepancies
+
+def _normalized(value: Optional[str]) -> str:
+    return " ".join((value or "").lower().split())
@@ -1,12 +1,27 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from typing import List, Optional, Dict, Iterator, Tuple
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, update, select, values, column, Integer, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.product import Product, ComplianceStatus
+from app.models.product_feature import ProductFeature
 from app.models.platform import Platform
 from app.models.category import Category
 from app.schemas.product import ProductCreate, ProductUpdate
+from app.services.quantity_parser import parse_quantity
+from app.core.pagination import paginate
 from datetime import datetime
 
+# Columns a scan rewrites on an existing product
+SCANNED_PRODUCT_COLUMNS = (
+    "product_name", "brand", "price", "weight", "net_quantity", "quantity_unit", "country_of_origin",
+    "manufacturer", "extracted_data", "compliance_status", "violation_count", "compliance_score",
+    "anomaly_score"
+)
+
+# Listing order, newest first; the primary key keeps keyset pages on its index
+PRODUCT_PAGE_KEYS = (Product.id,)
+
 class ProductService:
     def __init__(self, db: Session):
         self.db = db
@@ -23,7 +38,8 @@ class ProductService:
         limit: int = 100,
         compliance_status: Optional[ComplianceStatus] = None,
         platform_id: Optional[int] = None,
-        category_id: Optional[int] = None
+        category_id: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[Product]:
         query = self.db.query(Product)
         
@@ -34,9 +50,19 @@ class ProductService:
         if category_id:
             query = query.filter(Product.category_id == category_id)
         
-        return query.offset(skip).limit(limit).all()
+        return paginate(query, PRODUCT_PAGE_KEYS, skip, limit, cursor).all()
     
     def create_product(self, product: ProductCreate) -> Product:
+        db_product = self.build_product(product)
+        
+        self.db.add(db_product)
+        self.db.commit()
+        self.db.refresh(db_product)
+        return db_product
+    
+    @staticmethod
+    def build_product(product: ProductCreate) -> Product:
+        """Unsaved pending product with its quantity normalized"""
         db_product = Product(
             product_id=product.product_id,
             product_name=product.product_name,
@@ -51,12 +77,36 @@ class ProductService:
             category_id=product.category_id,
             compliance_status=ComplianceStatus.PENDING
         )
-        
-        self.db.add(db_product)
-        self.db.commit()
-        self.db.refresh(db_product)
+        _apply_normalized_quantity(db_product)
         return db_product
     
+    def upsert_scanned_product(self, product: Product) -> Product:
+        """
+        Store a scanned product and its compliance results in one INSERT ... ON CONFLICT
+        (product_id) DO UPDATE, stamping last_scanned, and return the stored row. An
+        existing product keeps its source, platform and category. Not committed.
+        """
+        values = {column: getattr(product, column) for column in SCANNED_PRODUCT_COLUMNS}
+        stmt = pg_insert(Product).values(
+            product_id=product.product_id,
+            source=product.source,
+            platform_id=product.platform_id,
+            category_id=product.category_id,
+            last_scanned=func.now(),
+            **values
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.product_id],
+            set_={
+                **{column: stmt.excluded[column] for column in SCANNED_PRODUCT_COLUMNS},
+                "last_scanned": func.now(),
+                "updated_at": func.now()
+            }
+        )
+        return self.db.scalars(
+            stmt.returning(Product), execution_options={"populate_existing": True}
+        ).one()
+    
     def update_product(self, product_id: int, product_update: ProductUpdate) -> Optional[Product]:
         db_product = self.get_product(product_id)
         if not db_product:
@@ -65,6 +115,8 @@ class ProductService:
         update_data = product_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_product, field, value)
+        if 'weight' in update_data or 'extracted_data' in update_data:
+            _apply_normalized_quantity(db_product)
         
         db_product.updated_at = datetime.utcnow()
         self.db.commit()
@@ -80,8 +132,120 @@ class ProductService:
         self.db.commit()
         return True
     
-    def update_last_scanned(self, product_id: int):
-        db_product = self.get_product(product_id)
-        if db_product:
-            db_product.last_scanned = datetime.utcnow()
-            self.db.commit()
+    def count_stale_products(self, scanned_before: datetime) -> int:
+        """Products not scanned since scanned_before, or never scanned"""
+        return self.db.query(func.count(Product.id)).filter(
+            or_(Product.last_scanned < scanned_before, Product.last_scanned.is_(None))
+        ).scalar()
+    
+    def get_product_id_bounds(self) -> Tuple[Optional[int], Optional[int]]:
+        return self.db.query(func.min(Product.id), func.max(Product.id)).one()
+    
+    def iter_products_in_id_range(self, start_id: int, end_id: int, batch_size: int = 500) -> Iterator[Product]:
+        """Stream products with start_id <= id < end_id without loading the range at once"""
+        return (
+            self.db.query(Product)
+            .filter(Product.id >= start_id, Product.id < end_id)
+            .order_by(Product.id)
+            .yield_per(batch_size)
+        )
+    
+    def bulk_update_compliance_scores(self, scores: Dict[int, float]) -> int:
+        """
+        Write compliance scores keyed by product id with one set-based
+        UPDATE ... FROM (VALUES ...) per table and a single commit
+        """
+        if not scores:
+            return 0
+        
+        changed = values(
+            column("id", Integer), column("compliance_score", Float), name="changed"
+        ).data(list(scores.items()))
+        self.db.execute(
+            update(Product)
+            .where(Product.id == changed.c.id)
+            .values(compliance_score=changed.c.compliance_score)
+            .execution_options(synchronize_session=False)
+        )
+        # Keep existing feature rows in step; products without one are filled by a rebuild
+        self.db.execute(
+            update(ProductFeature)
+            .where(ProductFeature.product_id == changed.c.id)
+            .values(compliance_score=changed.c.compliance_score)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return len(scores)
+
+class AsyncProductService:
+    """ProductService for async endpoints; reads and CRUD only, scans stay on the sync path"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_product(self, product_id: int) -> Optional[Product]:
+        return await self.db.scalar(
+            select(Product).options(selectinload(Product.violations)).where(Product.id == product_id)
+        )
+    
+    async def get_products(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        compliance_status: Optional[ComplianceStatus] = None,
+        platform_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> List[Product]:
+        query = select(Product).options(selectinload(Product.violations))
+        
+        if compliance_status:
+            query = query.where(Product.compliance_status == compliance_status)
+        if platform_id:
+            query = query.where(Product.platform_id == platform_id)
+        if category_id:
+            query = query.where(Product.category_id == category_id)
+        
+        return (await self.db.scalars(paginate(query, PRODUCT_PAGE_KEYS, skip, limit, cursor))).all()
+    
+    async def create_product(self, product: ProductCreate) -> Product:
+        db_product = ProductService.build_product(product)
+        
+        self.db.add(db_product)
+        await self.db.commit()
+        return await self.get_product(db_product.id)
+    
+    async def update_product(self, product_id: int, product_update: ProductUpdate) -> Optional[Product]:
+        db_product = await self.get_product(product_id)
+        if not db_product:
+            return None
+        
+        update_data = product_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_product, field, value)
+        if 'weight' in update_data or 'extracted_data' in update_data:
+            _apply_normalized_quantity(db_product)
+        
+        db_product.updated_at = datetime.utcnow()
+        await self.db.commit()
+        await self.db.refresh(db_product)
+        return db_product
+    
+    async def delete_product(self, product_id: int) -> bool:
+        db_product = await self.get_product(product_id)
+        if not db_product:
+            return False
+        
+        await self.db.delete(db_product)
+        await self.db.commit()
+        return True
+
+def _apply_normalized_quantity(db_product: Product):
+    """
+    Store the declared quantity in base units (g, ml or count). Only the declared
+    weight counts; a weight found in the description is what LM006 checks it against.
+    """
+    extracted = db_product.extracted_data or {}
+    quantity = parse_quantity(db_product.weight or extracted.get('weight'))
+    db_product.net_quantity = quantity.value if quantity else None
+    db_product.quantity_unit = quantity.unit if quantity else None
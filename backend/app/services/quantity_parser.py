@@ -0,0 +1,107 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+# Base units: mass in grams, volume in millilitres, discrete items as count
+UNIT_FACTORS = {
+    'mg': ('g', 0.001),
+    'milligram': ('g', 0.001),
+    'milligrams': ('g', 0.001),
+    'g': ('g', 1.0),
+    'gm': ('g', 1.0),
+    'gms': ('g', 1.0),
+    'gr': ('g', 1.0),
+    'gram': ('g', 1.0),
+    'grams': ('g', 1.0),
+    'gramme': ('g', 1.0),
+    'grammes': ('g', 1.0),
+    'kg': ('g', 1000.0),
+    'kgs': ('g', 1000.0),
+    'kilo': ('g', 1000.0),
+    'kilos': ('g', 1000.0),
+    'kilogram': ('g', 1000.0),
+    'kilograms': ('g', 1000.0),
+    'oz': ('g', 28.3495),
+    'lb': ('g', 453.592),
+    'lbs': ('g', 453.592),
+    'ml': ('ml', 1.0),
+    'millilitre': ('ml', 1.0),
+    'millilitres': ('ml', 1.0),
+    'milliliter': ('ml', 1.0),
+    'milliliters': ('ml', 1.0),
+    'cl': ('ml', 10.0),
+    'l': ('ml', 1000.0),
+    'ltr': ('ml', 1000.0),
+    'ltrs': ('ml', 1000.0),
+    'litre': ('ml', 1000.0),
+    'litres': ('ml', 1000.0),
+    'liter': ('ml', 1000.0),
+    'liters': ('ml', 1000.0),
+    'pc': ('count', 1.0),
+    'pcs': ('count', 1.0),
+    'piece': ('count', 1.0),
+    'pieces': ('count', 1.0),
+    'unit': ('count', 1.0),
+    'units': ('count', 1.0),
+    'nos': ('count', 1.0),
+    'count': ('count', 1.0),
+}
+
+_UNIT_PATTERN = '|'.join(sorted((re.escape(u) for u in UNIT_FACTORS), key=len, reverse=True))
+_NUMBER = r'\d+(?:\.\d+)?'
+_MULTIPLY = r'\s*[x×*]\s*'
+
+# "2 x 500 g", "500 g x 2", "500g"
+QUANTITY_REGEX = re.compile(
+    rf'(?:(?P<lead>\d+){_MULTIPLY})?'
+    rf'(?P<value>{_NUMBER})\s*(?P<unit>{_UNIT_PATTERN})(?=$|[^a-z]|[x×]\s*\d)'
+    rf'(?:{_MULTIPLY}(?P<trail>\d+)\b)?'
+)
+PACK_OF_REGEX = re.compile(r'pack\s*of\s*(\d+)')
+THOUSANDS_REGEX = re.compile(r'(?<=\d),(?=\d{3}\b)')
+
+@dataclass(frozen=True)
+class Quantity:
+    value: float  # total quantity in base units
+    unit: str  # 'g', 'ml' or 'count'
+    pack_count: int = 1
+
+    def is_comparable(self, other: 'Quantity') -> bool:
+        return self.unit == other.unit
+
+    def relative_difference(self, other: 'Quantity') -> float:
+        """Relative difference against this (declared) quantity"""
+        if self.value == 0:
+            return 0.0 if other.value == 0 else float('inf')
+        return abs(self.value - other.value) / self.value
+
+def parse_quantity(text: Optional[str]) -> Optional[Quantity]:
+    """
+    Parse a free-text quantity declaration and normalize it to base units.
+    Returns None when no recognizable quantity is present.
+    """
+    if text is None:
+        return None
+    text = str(text).strip().lower()
+    if not text:
+        return None
+    return _parse_normalized(text)
+
+@lru_cache(maxsize=8192)
+def _parse_normalized(text: str) -> Optional[Quantity]:
+    text = THOUSANDS_REGEX.sub('', text)
+    match = QUANTITY_REGEX.search(text)
+    if not match:
+        return None
+
+    base_unit, factor = UNIT_FACTORS[match.group('unit')]
+    pack_count = int(match.group('lead') or match.group('trail') or 1)
+    if pack_count == 1:
+        pack_match = PACK_OF_REGEX.search(text)
+        if pack_match:
+            pack_count = int(pack_match.group(1))
+    pack_count = max(pack_count, 1)
+
+    value = float(match.group('value')) * factor * pack_count
+    return Quantity(value=round(value, 6), unit=base_unit, pack_count=pack_count)
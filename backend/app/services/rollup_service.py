@@ -0,0 +1,126 @@
+from typing import Dict, Any
+from datetime import date, datetime
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select, case, delete, insert, cast, text, String, Date
+from app.models.daily_rollup import ViolationDailyRollup, ProductDailyRollup
+from app.models.violation import Violation
+from app.models.product import Product
+
+# Rollup keys are UTC days; both ends of a chart window are inclusive
+def _day(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+def violation_trend_query(start_date, end_date):
+    """Violations per detection day and type"""
+    total = func.sum(ViolationDailyRollup.count)
+    return select(
+        ViolationDailyRollup.day, ViolationDailyRollup.violation_type, total.label("count")
+    ).where(
+        ViolationDailyRollup.day.between(_day(start_date), _day(end_date))
+    ).group_by(
+        ViolationDailyRollup.day, ViolationDailyRollup.violation_type
+    ).having(total > 0).order_by(ViolationDailyRollup.day, ViolationDailyRollup.violation_type)
+
+def compliance_trend_query(start_date, end_date):
+    """Products per creation day and current compliance status"""
+    total = func.sum(ProductDailyRollup.count)
+    return select(
+        ProductDailyRollup.day, ProductDailyRollup.compliance_status, total.label("count")
+    ).where(
+        ProductDailyRollup.day.between(_day(start_date), _day(end_date))
+    ).group_by(
+        ProductDailyRollup.day, ProductDailyRollup.compliance_status
+    ).having(total > 0).order_by(ProductDailyRollup.day, ProductDailyRollup.compliance_status)
+
+def top_violation_types_query(start_date, end_date, limit: int = 10):
+    """Most frequent violation types with their count-weighted average severity (1-4)"""
+    total = func.sum(ViolationDailyRollup.count)
+    weight = case(
+        (ViolationDailyRollup.severity == "CRITICAL", 4),
+        (ViolationDailyRollup.severity == "HIGH", 3),
+        (ViolationDailyRollup.severity == "MEDIUM", 2),
+        else_=1
+    )
+    return select(
+        ViolationDailyRollup.violation_type,
+        total.label("count"),
+        (func.sum(weight * ViolationDailyRollup.count) / func.nullif(total, 0)).label("avg_severity")
+    ).where(
+        ViolationDailyRollup.day.between(_day(start_date), _day(end_date))
+    ).group_by(ViolationDailyRollup.violation_type).having(total > 0).order_by(total.desc()).limit(limit)
+
+def platform_totals_query(start_date, end_date):
+    """Products created and violations detected per platform, with the compliance mix of those products"""
+    products = select(
+        ProductDailyRollup.platform_id,
+        func.sum(ProductDailyRollup.count).label("total_products"),
+        func.sum(case((ProductDailyRollup.compliance_status == "COMPLIANT", 100),
+                      (ProductDailyRollup.compliance_status == "NON_COMPLIANT", 0),
+                      else_=50) * ProductDailyRollup.count).label("score")
+    ).where(
+        ProductDailyRollup.day.between(_day(start_date), _day(end_date))
+    ).group_by(ProductDailyRollup.platform_id).subquery()
+    violations = select(
+        ViolationDailyRollup.platform_id,
+        func.sum(ViolationDailyRollup.count).label("total_violations")
+    ).where(
+        ViolationDailyRollup.day.between(_day(start_date), _day(end_date))
+    ).group_by(ViolationDailyRollup.platform_id).subquery()
+    return select(
+        products.c.platform_id,
+        products.c.total_products,
+        func.coalesce(violations.c.total_violations, 0).label("total_violations"),
+        (products.c.score / func.nullif(products.c.total_products, 0)).label("compliance_rate")
+    ).outerjoin(violations, violations.c.platform_id == products.c.platform_id)
+
+class RollupService:
+    """
+    Daily rollup tables behind the trend charts and reports. Triggers keep them in
+    step with every write; rebuild recomputes them from the raw tables.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def rebuild(self) -> Dict[str, Any]:
+        """
+        Recompute both rollups from scratch, e.g. after products were moved between platforms.
+        Violation rollups of months whose partitions were archived and dropped are kept.
+        """
+        utc_day = lambda column: cast(func.timezone("UTC", column), Date)
+
+        violation_key = [
+            utc_day(Violation.detected_at), Product.platform_id, Product.category_id,
+            cast(Violation.violation_type, String), cast(Violation.severity, String),
+            cast(Violation.status, String)
+        ]
+        product_key = [
+            utc_day(Product.created_at), Product.platform_id, Product.category_id,
+            cast(Product.compliance_status, String)
+        ]
+        # Table locks keep trigger updates from interleaving with the recount
+        self.db.execute(text(
+            "LOCK TABLE violations, products, violation_daily_rollups, product_daily_rollups "
+            "IN SHARE ROW EXCLUSIVE MODE"
+        ))
+        # Partitions are dropped by whole UTC months, so no day is split between kept and dropped rows
+        oldest_day = self.db.scalar(select(utc_day(func.min(Violation.detected_at))))
+        if oldest_day is not None:
+            self.db.execute(delete(ViolationDailyRollup).where(ViolationDailyRollup.day >= oldest_day))
+        self.db.execute(delete(ProductDailyRollup))
+        self.db.execute(insert(ViolationDailyRollup).from_select(
+            ["day", "platform_id", "category_id", "violation_type", "severity", "status", "count"],
+            select(*violation_key, func.count()).select_from(Violation).outerjoin(
+                Product, Product.id == Violation.product_id
+            ).group_by(*violation_key)
+        ))
+        self.db.execute(insert(ProductDailyRollup).from_select(
+            ["day", "platform_id", "category_id", "compliance_status", "count"],
+            select(*product_key, func.count()).group_by(*product_key)
+        ))
+        self.db.commit()
+
+        return {
+            "violation_rollups": self.db.scalar(select(func.count()).select_from(ViolationDailyRollup)),
+            "product_rollups": self.db.scalar(select(func.count()).select_from(ProductDailyRollup))
+        }
@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Any, Optional, Tuple
+import redis
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of evaluation time buckets in microseconds
+LATENCY_BUCKETS_US = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BUCKET_NAMES = [f"le_{bound}us" for bound in LATENCY_BUCKETS_US] + ["inf"]
+
+class RuleStats:
+    """Aggregated statistics for a single compliance rule"""
+
+    def __init__(self):
+        self.evaluations = 0
+        self.failures = 0
+        self.total_time_us = 0.0
+        self.max_time_us = 0.0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS_US) + 1)
+        self.evidence_bytes = 0
+        self.outcomes: Dict[Tuple[Optional[int], Optional[int]], Dict[str, int]] = defaultdict(
+            lambda: {"passed": 0, "failed": 0}
+        )
+
+    def record(self, elapsed_us: float, passed: bool, platform_id: Optional[int],
+               category_id: Optional[int], evidence_bytes: int = 0):
+        self.evaluations += 1
+        self.total_time_us += elapsed_us
+        self.max_time_us = max(self.max_time_us, elapsed_us)
+        self.latency_histogram[bisect_left(LATENCY_BUCKETS_US, elapsed_us)] += 1
+        self.outcomes[(platform_id, category_id)]["passed" if passed else "failed"] += 1
+        if not passed:
+            self.failures += 1
+            self.evidence_bytes += evidence_bytes
+
+    def counters(self) -> Dict[str, int]:
+        """Integer counters as Redis hash fields, for HINCRBY"""
+        fields = {
+            "evaluations": self.evaluations,
+            "failures": self.failures,
+            "evidence_bytes": self.evidence_bytes,
+        }
+        fields.update(
+            (f"bucket:{name}", count) for name, count in zip(BUCKET_NAMES, self.latency_histogram) if count
+        )
+        for (platform_id, category_id), counts in self.outcomes.items():
+            segment = f"segment:{_segment_part(platform_id)}:{_segment_part(category_id)}"
+            fields.update((f"{segment}:{outcome}", count) for outcome, count in counts.items() if count)
+        return fields
+
+    @classmethod
+    def from_hash(cls, fields: Dict[bytes, bytes], max_time_us: Optional[float]) -> 'RuleStats':
+        stats = cls()
+        stats.max_time_us = max_time_us or 0.0
+        for key, value in fields.items():
+            key = key.decode()
+            if key == "total_time_us":
+                stats.total_time_us = float(value)
+            elif key.startswith("bucket:"):
+                stats.latency_histogram[BUCKET_NAMES.index(key[len("bucket:"):])] = int(value)
+            elif key.startswith("segment:"):
+                _, platform_id, category_id, outcome = key.split(":")
+                stats.outcomes[(_segment_id(platform_id), _segment_id(category_id))][outcome] = int(value)
+            else:
+                setattr(stats, key, int(value))
+        return stats
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "evaluations": self.evaluations,
+            "failures": self.failures,
+            "hit_rate": round(self.failures / self.evaluations, 4) if self.evaluations else 0,
+            "total_time_ms": round(self.total_time_us / 1000, 3),
+            "avg_time_us": round(self.total_time_us / self.evaluations, 2) if self.evaluations else 0,
+            "max_time_us": round(self.max_time_us, 2),
+            "latency_histogram": dict(zip(BUCKET_NAMES, self.latency_histogram)),
+            "avg_evidence_bytes": round(self.evidence_bytes / self.failures, 1) if self.failures else 0,
+            "by_segment": [
+                {"platform_id": platform_id, "category_id": category_id, **counts}
+                for (platform_id, category_id), counts in sorted(
+                    self.outcomes.items(), key=lambda item: (_segment_part(item[0][0]), _segment_part(item[0][1]))
+                )
+            ]
+        }
+
+def _segment_part(value: Optional[int]) -> str:
+    return "" if value is None else str(value)
+
+def _segment_id(part: str) -> Optional[int]:
+    return int(part) if part else None
+
+class RuleMetrics:
+    """
+    Per-rule evaluation metrics shared by the API and every Celery worker through Redis.
+    Evaluations are buffered in process and added to one Redis hash per rule with
+    HINCRBY at most every RULE_METRICS_FLUSH_SECONDS, so profiling costs a pipeline
+    round trip per interval rather than per rule. Redis failures drop the buffered
+    counts instead of failing the scan.
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "rule_metrics",
+                 flush_interval: Optional[float] = None):
+        self.url = url or settings.REDIS_URL
+        self.prefix = prefix
+        self.flush_interval = (settings.RULE_METRICS_FLUSH_SECONDS
+                               if flush_interval is None else flush_interval)
+        self._client = None
+        self._lock = threading.Lock()
+        self._pending: Dict[str, RuleStats] = defaultdict(RuleStats)
+        self._last_flush = time.monotonic()
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        return self._client
+
+    def record(self, rule_id: str, elapsed_us: float, passed: bool,
+               platform_id: Optional[int] = None, category_id: Optional[int] = None,
+               evidence_bytes: int = 0):
+        with self._lock:
+            self._pending[rule_id].record(elapsed_us, passed, platform_id, category_id, evidence_bytes)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Add the buffered evaluations to the shared counters"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(RuleStats)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for rule_id, stats in pending.items():
+                key = self._rule_key(rule_id)
+                for field, count in stats.counters().items():
+                    pipe.hincrby(key, field, count)
+                pipe.hincrbyfloat(key, "total_time_us", stats.total_time_us)
+                pipe.zadd(self._max_time_key(), {rule_id: stats.max_time_us}, gt=True)
+                pipe.sadd(self._rules_key(), rule_id)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Dropped rule metrics for {len(pending)} rules: {str(e)}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrics of all processes, including this process's buffered evaluations"""
+        self.flush()
+        try:
+            rule_ids = sorted(rule_id.decode() for rule_id in self.client.smembers(self._rules_key()))
+            pipe = self.client.pipeline(transaction=False)
+            for rule_id in rule_ids:
+                pipe.hgetall(self._rule_key(rule_id))
+            pipe.zrange(self._max_time_key(), 0, -1, withscores=True)
+            *hashes, max_times = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Rule metrics read failed: {str(e)}")
+            return {"rules": {}, "total_evaluations": 0, "total_time_ms": 0, "available": False}
+
+        max_times = {rule_id.decode(): score for rule_id, score in max_times}
+        rules = {
+            rule_id: RuleStats.from_hash(fields, max_times.get(rule_id)).to_dict()
+            for rule_id, fields in zip(rule_ids, hashes)
+        }
+        return {
+            "rules": rules,
+            "total_evaluations": sum(r["evaluations"] for r in rules.values()),
+            "total_time_ms": round(sum(r["total_time_ms"] for r in rules.values()), 3),
+            "available": True
+        }
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+        rule_ids = [rule_id.decode() for rule_id in self.client.smembers(self._rules_key())]
+        self.client.delete(
+            self._rules_key(), self._max_time_key(), *(self._rule_key(rule_id) for rule_id in rule_ids)
+        )
+
+    def _rules_key(self) -> str:
+        return f"{self.prefix}:rules"
+
+    def _rule_key(self, rule_id: str) -> str:
+        return f"{self.prefix}:rule:{rule_id}"
+
+    def _max_time_key(self) -> str:
+        return f"{self.prefix}:max_time_us"
+
+# Process-wide collector used when RULE_PROFILING_ENABLED is set
+rule_metrics = RuleMetrics()
@@ -0,0 +1,228 @@
+import math
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime
+from statistics import NormalDist
+from sqlalchemy.orm import Session
+from sqlalchemy import func, case
+from app.models.product import Product, ComplianceStatus
+from app.models.platform import Platform
+from app.models.sampling_run import SamplingRun
+from app.core.config import settings
+
+class SamplingService:
+    """
+    Stratified random sampling of a platform's catalog for compliance rate estimates.
+    Categories are the strata; the sample is Neyman-allocated using each category's
+    historical violation rate, so volatile categories get more of the scan budget.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def build_plan(self, platform_id: int, sample_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Population, historical violation rate and sample allocation of each category"""
+        sample_size = sample_size or settings.SAMPLING_SAMPLE_SIZE
+        rows = self.db.query(
+            Product.category_id,
+            func.count(Product.id),
+            func.sum(case((Product.compliance_status == ComplianceStatus.NON_COMPLIANT, 1), else_=0)),
+            func.sum(case((Product.compliance_status.in_(
+                [ComplianceStatus.COMPLIANT, ComplianceStatus.NON_COMPLIANT]
+            ), 1), else_=0))
+        ).filter(Product.platform_id == platform_id).group_by(Product.category_id).all()
+
+        strata = []
+        for category_id, population, non_compliant, assessed in rows:
+            # Laplace-smoothed so unassessed categories still get a non-zero share
+            violation_rate = ((non_compliant or 0) + 1) / ((assessed or 0) + 2)
+            strata.append({
+                "category_id": category_id,
+                "population": population,
+                "historical_violation_rate": round(violation_rate, 4),
+                "allocation": 0
+            })
+        self._allocate(strata, sample_size)
+        return strata
+
+    def draw_sample(self, platform_id: int, plan: List[Dict[str, Any]]) -> Dict[Optional[int], List[Product]]:
+        """Simple random sample without replacement within each stratum"""
+        sample = {}
+        for stratum in plan:
+            if not stratum["allocation"]:
+                continue
+            category_id = stratum["category_id"]
+            category_filter = Product.category_id.is_(None) if category_id is None else Product.category_id == category_id
+            sample[category_id] = self.db.query(Product).filter(
+                Product.platform_id == platform_id, category_filter
+            ).order_by(func.random()).limit(stratum["allocation"]).all()
+        return sample
+
+    def estimate(self, strata: List[Dict[str, Any]],
+                 confidence_level: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Stratified estimate of the compliance rate. Each stratum needs population,
+        scanned (successful scans) and compliant; strata whose scans all failed
+        fall back to their historical rate at maximum variance.
+        """
+        confidence_level = confidence_level or settings.SAMPLING_CONFIDENCE_LEVEL
+        population = sum(s["population"] for s in strata)
+        scanned = sum(s["scanned"] for s in strata)
+        if not population or not scanned:
+            return self._estimate_dict(None, None, scanned, confidence_level)
+
+        rate = 0.0
+        variance = 0.0
+        for stratum in strata:
+            weight = stratum["population"] / population
+            n, size = stratum["scanned"], stratum["population"]
+            if n:
+                p = stratum["compliant"] / n
+                stratum_variance = (1 - n / size) * (p * (1 - p) / (n - 1) if n > 1 else 0.25)
+            else:
+                p = 1 - stratum.get("historical_violation_rate", 0.5)
+                stratum_variance = 0.25
+            stratum["estimated_compliance_rate"] = round(p, 4)
+            rate += weight * p
+            variance += weight * weight * stratum_variance
+
+        if all(s["scanned"] == s["population"] for s in strata):
+            return {**self._estimate_dict(rate, 0.0, scanned, confidence_level), "ci_lower": rate, "ci_upper": rate}
+        return self._estimate_dict(rate, variance, scanned, confidence_level)
+
+    def save_run(self, platform_id: int, strata: List[Dict[str, Any]], started_at: datetime) -> SamplingRun:
+        estimate = self.estimate(strata)
+        db_run = SamplingRun(
+            platform_id=platform_id,
+            population_size=sum(s["population"] for s in strata),
+            sample_size=sum(s["allocation"] for s in strata),
+            scanned_count=estimate["scanned"],
+            confidence_level=estimate["confidence_level"],
+            estimated_compliance_rate=estimate["estimated_compliance_rate"],
+            variance=estimate["variance"],
+            ci_lower=estimate["ci_lower"],
+            ci_upper=estimate["ci_upper"],
+            strata=strata,
+            started_at=started_at
+        )
+        self.db.add(db_run)
+        self.db.commit()
+        self.db.refresh(db_run)
+        return db_run
+
+    def get_latest_estimates(self) -> Dict[str, Any]:
+        """Latest estimate of every platform, and their population-weighted combination"""
+        latest = self.db.query(func.max(SamplingRun.id)).group_by(SamplingRun.platform_id)
+        runs = self._query_runs().filter(SamplingRun.id.in_(latest)).order_by(SamplingRun.platform_id).all()
+        return {
+            "overall": self._combine(runs),
+            "platforms": [self.run_summary(run, name) for run, name in runs]
+        }
+
+    def get_estimate_history(self, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
+        runs = self._query_runs().filter(
+            SamplingRun.completed_at.between(start_date, end_date)
+        ).order_by(SamplingRun.completed_at).all()
+        return [self.run_summary(run, name) for run, name in runs]
+
+    def run_summary(self, run: SamplingRun, platform_name: str) -> Dict[str, Any]:
+        return {
+            "platform_id": run.platform_id,
+            "platform_name": platform_name,
+            **self._percentages({
+                "estimated_compliance_rate": run.estimated_compliance_rate,
+                "ci_lower": run.ci_lower,
+                "ci_upper": run.ci_upper
+            }),
+            "confidence_level": run.confidence_level,
+            "population": run.population_size,
+            "sample_size": run.sample_size,
+            "scanned": run.scanned_count,
+            "estimated_at": run.completed_at.isoformat() if run.completed_at else None
+        }
+
+    def _query_runs(self):
+        return self.db.query(SamplingRun, Platform.name).join(Platform, Platform.id == SamplingRun.platform_id)
+
+    def _combine(self, runs: List[Tuple[SamplingRun, str]]) -> Optional[Dict[str, Any]]:
+        # Platforms are sampled independently, so they combine as strata of one estimate
+        runs = [run for run, _ in runs if run.estimated_compliance_rate is not None]
+        population = sum(run.population_size for run in runs)
+        if not population:
+            return None
+        rate = sum(run.population_size / population * run.estimated_compliance_rate for run in runs)
+        variance = sum((run.population_size / population) ** 2 * run.variance for run in runs)
+        estimate = self._estimate_dict(
+            rate, variance, sum(run.scanned_count for run in runs), settings.SAMPLING_CONFIDENCE_LEVEL
+        )
+        return {
+            **self._percentages(estimate),
+            "population": population,
+            "scanned": estimate["scanned"],
+            "confidence_level": estimate["confidence_level"]
+        }
+
+    def _percentages(self, estimate: Dict[str, Any]) -> Dict[str, Any]:
+        # Same 0-100 scale as the dashboard's compliance_rate
+        return {
+            key: round(estimate[key] * 100, 2) if estimate[key] is not None else None
+            for key in ("estimated_compliance_rate", "ci_lower", "ci_upper")
+        }
+
+    def _estimate_dict(self, rate: Optional[float], variance: Optional[float], scanned: int,
+                       confidence_level: float) -> Dict[str, Any]:
+        ci_lower, ci_upper = _wilson_interval(rate, variance, scanned, confidence_level) if rate is not None else (None, None)
+        return {
+            "estimated_compliance_rate": rate,
+            "variance": variance,
+            "ci_lower": ci_lower,
+            "ci_upper": ci_upper,
+            "scanned": scanned,
+            "confidence_level": confidence_level
+        }
+
+    def _allocate(self, strata: List[Dict[str, Any]], sample_size: int):
+        """Neyman allocation, n_h proportional to N_h * S_h, capped at each stratum's population"""
+        for stratum in strata:
+            stratum["allocation"] = min(stratum["population"], settings.SAMPLING_MIN_PER_STRATUM)
+        remaining = sample_size - sum(s["allocation"] for s in strata)
+
+        while remaining > 0:
+            open_strata = [s for s in strata if s["allocation"] < s["population"]]
+            if not open_strata:
+                break
+            weights = [
+                s["population"] * math.sqrt(s["historical_violation_rate"] * (1 - s["historical_violation_rate"]))
+                for s in open_strata
+            ]
+            total_weight = sum(weights)
+            given = 0
+            for stratum, weight in zip(open_strata, weights):
+                extra = min(stratum["population"] - stratum["allocation"], int(remaining * weight / total_weight))
+                stratum["allocation"] += extra
+                given += extra
+            if not given:
+                # Fewer units left than any stratum's share rounds to; hand them to the heaviest strata
+                ranked = sorted(zip(weights, range(len(open_strata))), reverse=True)[:remaining]
+                for _, index in ranked:
+                    open_strata[index]["allocation"] += 1
+                    given += 1
+            remaining -= given
+
+def _wilson_interval(rate: float, variance: float, scanned: int,
+                     confidence_level: float) -> Tuple[float, float]:
+    """
+    Wilson score interval on the design-effect adjusted sample size; unlike the
+    normal interval it does not collapse to a point when every sampled product
+    is compliant.
+    """
+    if variance == 0 and 0 < rate < 1:
+        return rate, rate  # every stratum was scanned completely
+    if variance > 0 and 0 < rate < 1:
+        n = rate * (1 - rate) / variance
+    else:
+        n = scanned
+    z = NormalDist().inv_cdf(0.5 + confidence_level / 2)
+    denominator = 1 + z * z / n
+    center = (rate + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
@@ -1,33 +1,38 @@
 import asyncio
 import re
-from typing import Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Optional, List
 from urllib.parse import urljoin, urlparse
-import httpx
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
 class WebScrapingService:
     """
     Advanced web scraping service for e-commerce product data extraction
     """
     
     def __init__(self):
-        self.session = httpx.AsyncClient(
-            timeout=30.0,
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        )
-        self.selenium_options = self._setup_selenium_options()
+        self._session = None
     
-    def _setup_selenium_options(self) -> Options:
+    @property
+    def session(self):
+        """HTTP client, created on the first scrape; httpx stays off the API's import path"""
+        if self._session is None:
+            import httpx
+
+            self._session = httpx.AsyncClient(
+                timeout=30.0,
+                headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+                }
+            )
+        return self._session
+    
+    def _setup_selenium_options(self):
         """Setup Chrome options for Selenium"""
+        from selenium.webdriver.chrome.options import Options
+
         options = Options()
         options.add_argument('--headless')
         options.add_argument('--no-sandbox')
@@ -56,6 +61,9 @@ class WebScrapingService:
     
     async def _scrape_with_httpx(self, url: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Scrape using HTTP requests (faster for static content)"""
+        import httpx
+        from bs4 import BeautifulSoup
+
         try:
             response = await self.session.get(url)
             response.raise_for_status()
@@ -68,9 +76,17 @@ class WebScrapingService:
     
     async def _scrape_with_selenium(self, url: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Scrape using Selenium (for JavaScript-heavy sites)"""
+        # Selenium is only needed for JS-heavy platforms; keep it off the import path
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        from bs4 import BeautifulSoup
+
         driver = None
         try:
-            driver = webdriver.Chrome(options=self.selenium_options)
+            driver = webdriver.Chrome(options=self._setup_selenium_options())
             driver.get(url)
             
             # Wait for page to load
@@ -90,7 +106,7 @@ class WebScrapingService:
             if driver:
                 driver.quit()
     
-    def _extract_product_data(self, soup: BeautifulSoup, url: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    def _extract_product_data(self, soup: 'BeautifulSoup', url: str, config: Dict[str, Any]) -> Dict[str, Any]:
         """Extract product data using CSS selectors from platform config"""
         selectors = config.get('selectors', {})
         
@@ -112,9 +128,14 @@ class WebScrapingService:
         # Extract images
         extracted_data['images'] = self._extract_images(soup, url, selectors)
         
+        # Amazon listings carry the ASIN in the URL
+        asin_match = re.search(r'/(?:dp|gp/product)/([A-Z0-9]{10})', url)
+        if asin_match and not extracted_data.get('asin'):
+            extracted_data['asin'] = asin_match.group(1)
+        
         return extracted_data
     
-    def _extract_basic_info(self, soup: BeautifulSoup, selectors: Dict[str, str]) -> Dict[str, Any]:
+    def _extract_basic_info(self, soup: 'BeautifulSoup', selectors: Dict[str, str]) -> Dict[str, Any]:
         """Extract basic product information"""
         data = {}
         
@@ -135,7 +156,7 @@ class WebScrapingService:
         
         return data
     
-    def _extract_pricing_info(self, soup: BeautifulSoup, selectors: Dict[str, str]) -> Dict[str, Any]:
+    def _extract_pricing_info(self, soup: 'BeautifulSoup', selectors: Dict[str, str]) -> Dict[str, Any]:
         """Extract pricing information"""
         data = {}
         
@@ -157,7 +178,7 @@ class WebScrapingService:
         
         return data
     
-    def _extract_compliance_info(self, soup: BeautifulSoup, selectors: Dict[str, str]) -> Dict[str, Any]:
+    def _extract_compliance_info(self, soup: 'BeautifulSoup', selectors: Dict[str, str]) -> Dict[str, Any]:
         """Extract compliance-related information"""
         data = {}
         
@@ -217,9 +238,20 @@ class WebScrapingService:
                 data['extracted_country'] = match.group(1).strip()
                 break
         
+        # Product identifiers used for cross-listing matching
+        identifier_patterns = {
+            'gtin': r'(?:gtin|ean|upc|barcode)(?:\s*(?:code|number|no\.?))?[:\s]*(\d{8,14})\b',
+            'asin': r'asin[:\s]*([a-z0-9]{10})\b'
+        }
+        
+        for field, pattern in identifier_patterns.items():
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                data[field] = match.group(1).upper()
+        
         return data
     
-    def _extract_images(self, soup: BeautifulSoup, base_url: str, selectors: Dict[str, str]) -> List[str]:
+    def _extract_images(self, soup: 'BeautifulSoup', base_url: str, selectors: Dict[str, str]) -> List[str]:
         """Extract product images"""
         image_selector = selectors.get('images', '.product-image img, .gallery img, [data-testid="product-image"]')
         image_elements = soup.select(image_selector)
@@ -272,7 +304,9 @@ class WebScrapingService:
     
     async def close(self):
         """Close the HTTP session"""
-        await self.session.aclose()
+        if self._session is not None:
+            await self._session.aclose()
+            self._session = None
 
 # Platform-specific configurations
 PLATFORM_CONFIGS = {
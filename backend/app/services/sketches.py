@@ -0,0 +1,192 @@
+import math
+from typing import Iterable, Optional
+import numpy as np
+
+class TDigest:
+    """
+    Merging t-digest (Dunning) for streaming quantile estimates.
+    Centroids are sized by the arcsine scale function, so tails stay accurate;
+    digests built on different workers merge into one of the same accuracy.
+    """
+
+    def __init__(self, compression: float = 100, means: Optional[np.ndarray] = None,
+                 weights: Optional[np.ndarray] = None):
+        self.compression = compression
+        self.means = np.asarray(means if means is not None else [], dtype=float)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=float)
+        self._buffer_means = []
+        self._buffer_weights = []
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum()) + sum(self._buffer_weights)
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer_means.append(value)
+        self._buffer_weights.append(weight)
+        if len(self._buffer_means) >= self.compression * 5:
+            self.compress()
+
+    def update(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        other.compress()
+        self._buffer_means.extend(other.means.tolist())
+        self._buffer_weights.extend(other.weights.tolist())
+        self.compress()
+        return self
+
+    def compress(self):
+        if not self._buffer_means:
+            return
+        means = np.concatenate([self.means, self._buffer_means])
+        weights = np.concatenate([self.weights, self._buffer_weights])
+        self._buffer_means, self._buffer_weights = [], []
+
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+
+        merged_means, merged_weights = [], []
+        q0 = 0.0
+        q_limit = self._q_limit(q0)
+        current_mean, current_weight = means[0], weights[0]
+        for mean, weight in zip(means[1:], weights[1:]):
+            if q0 + (current_weight + weight) / total <= q_limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                merged_means.append(current_mean)
+                merged_weights.append(current_weight)
+                q0 += current_weight / total
+                q_limit = self._q_limit(q0)
+                current_mean, current_weight = mean, weight
+        merged_means.append(current_mean)
+        merged_weights.append(current_weight)
+
+        self.means = np.array(merged_means)
+        self.weights = np.array(merged_weights)
+
+    def quantile(self, q: float, minimum: float, maximum: float) -> Optional[float]:
+        """Value at quantile q; the exact minimum and maximum anchor the tails"""
+        self.compress()
+        if not len(self.means):
+            return None
+        positions, values = self._interpolation_points(minimum, maximum)
+        return float(np.interp(q * positions[-1], positions, values))
+
+    def cdf(self, value: float, minimum: float, maximum: float) -> Optional[float]:
+        """Fraction of observations at or below value"""
+        self.compress()
+        if not len(self.means):
+            return None
+        positions, values = self._interpolation_points(minimum, maximum)
+        return float(np.interp(value, values, positions) / positions[-1])
+
+    def _interpolation_points(self, minimum: float, maximum: float):
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centers, [self.weights.sum()]])
+        values = np.concatenate([[minimum], self.means, [maximum]])
+        return positions, values
+
+    def _q_limit(self, q: float) -> float:
+        # k1 scale: k(q) = delta / (2 pi) * asin(2q - 1); a centroid spans at most one unit of k
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        if k >= self.compression / 4:
+            return 1.0
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def to_bytes(self) -> bytes:
+        self.compress()
+        return np.concatenate([self.means, self.weights]).astype(np.float64).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes], compression: float = 100) -> 'TDigest':
+        if not data:
+            return cls(compression)
+        values = np.frombuffer(data, dtype=np.float64)
+        half = len(values) // 2
+        return cls(compression, values[:half].copy(), values[half:].copy())
+
+class MomentSketch:
+    """Welford running mean/variance with min and max; merged with Chan's formula"""
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0,
+                 minimum: Optional[float] = None, maximum: Optional[float] = None):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def merge(self, other: 'MomentSketch') -> 'MomentSketch':
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def variance(self) -> Optional[float]:
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def std(self) -> Optional[float]:
+        variance = self.variance
+        return math.sqrt(variance) if variance is not None else None
+
+class DistributionSketch:
+    """Quantile digest plus exact moments of one metric"""
+
+    def __init__(self, digest: Optional[TDigest] = None, moments: Optional[MomentSketch] = None,
+                 compression: float = 100):
+        self.digest = digest or TDigest(compression)
+        self.moments = moments or MomentSketch()
+
+    def add(self, value: float):
+        self.digest.add(value)
+        self.moments.add(value)
+
+    def merge(self, other: 'DistributionSketch') -> 'DistributionSketch':
+        self.digest.merge(other.digest)
+        self.moments.merge(other.moments)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.moments.count:
+            return None
+        return self.digest.quantile(q, self.moments.minimum, self.moments.maximum)
+
+    def cdf(self, value: float) -> Optional[float]:
+        if not self.moments.count:
+            return None
+        return self.digest.cdf(value, self.moments.minimum, self.moments.maximum)
+
+    def summary(self, quantiles: Iterable[float] = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)):
+        return {
+            "count": self.moments.count,
+            "mean": self.moments.mean if self.moments.count else None,
+            "std": self.moments.std,
+            "min": self.moments.minimum,
+            "max": self.moments.maximum,
+            "percentiles": {f"p{round(q * 100):g}": self.quantile(q) for q in quantiles}
+        }
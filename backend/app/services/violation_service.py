@@ -1,11 +1,39 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, select, func, insert, update, values, column, cast, literal, all_, Integer, String, JSON
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY
 from datetime import datetime
 from app.models.violation import Violation, ViolationStatus, ViolationType, ViolationSeverity
 from app.models.product import Product
 from app.models.user import User
+from app.models.product_snapshot import ProductSnapshot
 from app.schemas.violation import ViolationCreate, ViolationUpdate
+from app.core.cache import result_cache
+from app.core.database import AsyncSessionLocal
+from app.core.config import settings
+from app.core.pagination import paginate
+
+# Listing order, newest first; keyset pages use ix_violations_detected_at_id
+VIOLATION_PAGE_KEYS = (Violation.detected_at, Violation.id)
+
+# Rows per multi-row INSERT, well under the driver's bind parameter limit
+VIOLATION_INSERT_BATCH = 1000
+
+AUTO_RESOLVED_NOTE = "Auto-resolved: no longer detected on rescan"
+
+# Every violation count the dashboard and stats endpoints need, in one scan of the table
+VIOLATION_COUNTS_QUERY = select(
+    func.count(Violation.id).label("total"),
+    func.count(Violation.id).filter(Violation.status == ViolationStatus.OPEN).label("open"),
+    func.count(Violation.id).filter(Violation.status == ViolationStatus.IN_PROGRESS).label("in_progress"),
+    func.count(Violation.id).filter(Violation.status == ViolationStatus.RESOLVED).label("resolved"),
+    func.count(Violation.id).filter(Violation.severity == ViolationSeverity.CRITICAL).label("critical"),
+    func.count(Violation.id).filter(Violation.severity == ViolationSeverity.HIGH).label("high"),
+    func.count(Violation.id).filter(
+        Violation.severity == ViolationSeverity.CRITICAL, Violation.status == ViolationStatus.OPEN
+    ).label("critical_open")
+)
 
 class ViolationService:
     def __init__(self, db: Session):
@@ -13,20 +41,138 @@ class ViolationService:
     
     def create_violation(self, violation_data: Dict[str, Any], product_id: int) -> Violation:
         """Create a new violation from compliance engine results"""
-        db_violation = Violation(
-            product_id=product_id,
-            violation_type=violation_data["violation_type"],
-            severity=violation_data["severity"],
-            description=violation_data["description"],
-            rule_reference=violation_data["rule_reference"],
-            evidence=violation_data["evidence"],
-            status=ViolationStatus.OPEN
+        violation_id, = self.create_violations([(product_id, violation_data)])
+        return self.get_violation(violation_id)
+    
+    def create_violations(self, product_violations: List[Tuple[int, Dict[str, Any]]],
+                          commit: bool = True) -> List[int]:
+        """
+        Write (product_id, violation_data) pairs from compliance engine results with
+        multi-row INSERT ... RETURNING statements of up to VIOLATION_INSERT_BATCH rows,
+        and return the new ids in order. With commit=False they join the caller's transaction.
+        """
+        rows = [_violation_row(product_id, violation_data) for product_id, violation_data in product_violations]
+        ids = []
+        for start in range(0, len(rows), VIOLATION_INSERT_BATCH):
+            ids.extend(self.db.scalars(
+                insert(Violation).values(rows[start:start + VIOLATION_INSERT_BATCH]).returning(Violation.id)
+            ).all())
+        if commit:
+            self.db.commit()
+        return ids
+    
+    def record_violations(self, product_violations: List[Tuple[int, Dict[str, Any]]],
+                          product_ids: Optional[List[int]] = None, rule_ids: Optional[List[str]] = None,
+                          commit: bool = True) -> Dict[str, int]:
+        """
+        Write the results of a rescan by fingerprint: unresolved violations that were
+        found again get their last_seen_at bumped, new findings are inserted, and when
+        product_ids and rule_ids (the rules that were evaluated) are given, whatever
+        those rules no longer find on those products is resolved. violation_ids are
+        the bumped and inserted violations.
+        """
+        # Serialize concurrent scans of a product so a finding is inserted once
+        for product_id in sorted(set(product_ids or [])):
+            self.db.execute(select(func.pg_advisory_xact_lock(func.hashtext("violations"), product_id)))
+        
+        seen = set()
+        seen_ids = []
+        for start in range(0, len(product_violations), VIOLATION_INSERT_BATCH):
+            candidates = values(
+                column("idx", Integer), column("product_id", Integer),
+                column("violation_type", String), column("evidence", JSON),
+                name="candidates"
+            ).data([
+                (idx, product_id, violation_data["violation_type"].name, violation_data.get("evidence"))
+                for idx, (product_id, violation_data)
+                in enumerate(product_violations[start:start + VIOLATION_INSERT_BATCH], start)
+            ])
+            bumped = self.db.execute(
+                update(Violation)
+                .where(
+                    Violation.product_id == candidates.c.product_id,
+                    Violation.fingerprint == fingerprint_sql(
+                        candidates.c.product_id, candidates.c.violation_type, candidates.c.evidence
+                    ),
+                    Violation.status != ViolationStatus.RESOLVED
+                )
+                .values(last_seen_at=func.now())
+                .returning(candidates.c.idx, Violation.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            seen.update(idx for idx, _ in bumped)
+            seen_ids.extend(violation_id for _, violation_id in bumped)
+        
+        inserted = self.create_violations(
+            [pair for idx, pair in enumerate(product_violations) if idx not in seen], commit=False
         )
+        violation_ids = seen_ids + inserted
+        resolved = (self.resolve_undetected(product_ids, rule_ids, violation_ids)
+                    if product_ids and rule_ids else 0)
+        if commit:
+            self.db.commit()
+        return {"inserted": len(inserted), "seen": len(seen), "resolved": resolved, "violation_ids": violation_ids}
+    
+    def resolve_undetected(self, product_ids, rule_ids: List[str], detected_ids: List[int]) -> int:
+        """
+        Resolve the open and in-progress violations of the given rules on product_ids
+        (a list or a select of ids), except detected_ids, the violations this scan
+        bumped or inserted. Timestamps can't tell them apart: the scan's transaction
+        may have started before a concurrent scan of the same products committed.
+        """
+        result = self.db.execute(
+            update(Violation)
+            .where(
+                Violation.product_id.in_(product_ids),
+                Violation.status.in_([ViolationStatus.OPEN, ViolationStatus.IN_PROGRESS]),
+                Violation.evidence["rule_id"].as_string().in_(rule_ids),
+                # One array parameter however many violations a sweep detected
+                Violation.id != all_(literal(list(detected_ids), ARRAY(Integer)))
+            )
+            .values(
+                status=ViolationStatus.RESOLVED,
+                resolved_at=func.now(),
+                resolution_notes=AUTO_RESOLVED_NOTE
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
+    def save_product_snapshot(self, snapshot: Dict[str, Any], product_id: int, commit: bool = True) -> str:
+        """Store a product snapshot once per content hash and return the hash"""
+        # Snapshots stored concurrently by another scan are left as they are
+        self.db.execute(
+            pg_insert(ProductSnapshot)
+            .values(content_hash=snapshot["content_hash"], data=snapshot["data"], product_id=product_id)
+            .on_conflict_do_nothing(index_elements=["content_hash"])
+        )
+        if commit:
+            self.db.commit()
+        return snapshot["content_hash"]
+    
+    def get_violation_evidence(self, violation_id: int) -> Optional[Dict[str, Any]]:
+        """Re-materialize full evidence (product data and extracted data) for a violation"""
+        violation = self.get_violation(violation_id)
+        if not violation:
+            return None
         
-        self.db.add(db_violation)
-        self.db.commit()
-        self.db.refresh(db_violation)
-        return db_violation
+        evidence = violation.evidence or {}
+        snapshot_hash = evidence.get("snapshot_hash")
+        if not snapshot_hash:
+            # Legacy violations carry the full evidence inline
+            return evidence
+        
+        snapshot = self.db.query(ProductSnapshot).filter(
+            ProductSnapshot.content_hash == snapshot_hash
+        ).first()
+        snapshot_data = snapshot.data if snapshot else {}
+        return {
+            "rule_id": evidence.get("rule_id"),
+            "snapshot_hash": snapshot_hash,
+            "fields": evidence.get("fields", {}),
+            "product_data": snapshot_data.get("product_data", {}),
+            "extracted_data": snapshot_data.get("extracted_data", {})
+        }
     
     def get_violation(self, violation_id: int) -> Optional[Violation]:
         return self.db.query(Violation).filter(Violation.id == violation_id).first()
@@ -38,7 +184,8 @@ class ViolationService:
         status: Optional[ViolationStatus] = None,
         severity: Optional[ViolationSeverity] = None,
         violation_type: Optional[ViolationType] = None,
-        assigned_officer_id: Optional[int] = None
+        assigned_officer_id: Optional[int] = None,
+        cursor: Optional[str] = None
     ) -> List[Violation]:
         query = self.db.query(Violation)
         
@@ -51,7 +198,7 @@ class ViolationService:
         if assigned_officer_id:
             query = query.filter(Violation.assigned_officer_id == assigned_officer_id)
         
-        return query.offset(skip).limit(limit).all()
+        return paginate(query, VIOLATION_PAGE_KEYS, skip, limit, cursor).all()
     
     def assign_violation(self, violation_id: int, officer_id: int) -> Optional[Violation]:
         violation = self.get_violation(violation_id)
@@ -80,31 +227,126 @@ class ViolationService:
     
     def get_violation_stats(self) -> Dict[str, Any]:
         """Get violation statistics"""
-        total_violations = self.db.query(Violation).count()
-        open_violations = self.db.query(Violation).filter(
-            Violation.status == ViolationStatus.OPEN
-        ).count()
-        in_progress_violations = self.db.query(Violation).filter(
-            Violation.status == ViolationStatus.IN_PROGRESS
-        ).count()
-        resolved_violations = self.db.query(Violation).filter(
-            Violation.status == ViolationStatus.RESOLVED
-        ).count()
-        
-        # Violations by severity
-        critical_violations = self.db.query(Violation).filter(
-            Violation.severity == ViolationSeverity.CRITICAL
-        ).count()
-        high_violations = self.db.query(Violation).filter(
-            Violation.severity == ViolationSeverity.HIGH
-        ).count()
+        return violation_stats(self.db.execute(VIOLATION_COUNTS_QUERY).one())
+
+def fingerprint_sql(product_id, violation_type, evidence):
+    """Server-side fingerprint of a candidate violation, as stored in Violation.fingerprint"""
+    return func.violation_fingerprint(
+        product_id, cast(violation_type, Violation.violation_type.type), cast(evidence, JSON)
+    )
+
+def _violation_row(product_id: int, violation_data: Dict[str, Any]) -> Dict[str, Any]:
+    # Every row needs the same keys to share one multi-row VALUES list
+    return {
+        "product_id": product_id,
+        "violation_type": violation_data["violation_type"],
+        "severity": violation_data["severity"],
+        "description": violation_data["description"],
+        "rule_reference": violation_data.get("rule_reference"),
+        "evidence": violation_data.get("evidence"),
+        "status": ViolationStatus.OPEN
+    }
+
+class AsyncViolationService:
+    """ViolationService for async endpoints; violations are created by the sync scan path"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_violation(self, violation_id: int) -> Optional[Violation]:
+        return await self.db.get(Violation, violation_id)
+    
+    async def get_violations(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[ViolationStatus] = None,
+        severity: Optional[ViolationSeverity] = None,
+        violation_type: Optional[ViolationType] = None,
+        assigned_officer_id: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> List[Violation]:
+        query = select(Violation)
+        
+        if status:
+            query = query.where(Violation.status == status)
+        if severity:
+            query = query.where(Violation.severity == severity)
+        if violation_type:
+            query = query.where(Violation.violation_type == violation_type)
+        if assigned_officer_id:
+            query = query.where(Violation.assigned_officer_id == assigned_officer_id)
+        
+        return (await self.db.scalars(paginate(query, VIOLATION_PAGE_KEYS, skip, limit, cursor))).all()
+    
+    async def get_violation_evidence(self, violation_id: int) -> Optional[Dict[str, Any]]:
+        """Re-materialize full evidence (product data and extracted data) for a violation"""
+        violation = await self.get_violation(violation_id)
+        if not violation:
+            return None
         
+        evidence = violation.evidence or {}
+        snapshot_hash = evidence.get("snapshot_hash")
+        if not snapshot_hash:
+            # Legacy violations carry the full evidence inline
+            return evidence
+        
+        snapshot_data = await self.db.scalar(
+            select(ProductSnapshot.data).where(ProductSnapshot.content_hash == snapshot_hash)
+        ) or {}
         return {
-            "total_violations": total_violations,
-            "open_violations": open_violations,
-            "in_progress_violations": in_progress_violations,
-            "resolved_violations": resolved_violations,
-            "critical_violations": critical_violations,
-            "high_violations": high_violations,
-            "resolution_rate": (resolved_violations / total_violations * 100) if total_violations > 0 else 0
+            "rule_id": evidence.get("rule_id"),
+            "snapshot_hash": snapshot_hash,
+            "fields": evidence.get("fields", {}),
+            "product_data": snapshot_data.get("product_data", {}),
+            "extracted_data": snapshot_data.get("extracted_data", {})
         }
+    
+    async def assign_violation(self, violation_id: int, officer_id: int) -> Optional[Violation]:
+        violation = await self.get_violation(violation_id)
+        if not violation:
+            return None
+        
+        violation.assigned_officer_id = officer_id
+        violation.status = ViolationStatus.IN_PROGRESS
+        
+        await self.db.commit()
+        await self.db.refresh(violation)
+        return violation
+    
+    async def resolve_violation(self, violation_id: int, resolution_notes: str) -> Optional[Violation]:
+        violation = await self.get_violation(violation_id)
+        if not violation:
+            return None
+        
+        violation.status = ViolationStatus.RESOLVED
+        violation.resolution_notes = resolution_notes
+        violation.resolved_at = datetime.utcnow()
+        
+        await self.db.commit()
+        await self.db.refresh(violation)
+        return violation
+    
+    async def get_violation_stats(self) -> Dict[str, Any]:
+        """Get violation statistics, shared by all API workers for VIOLATION_STATS_CACHE_TTL"""
+        return await result_cache.get_or_refresh(
+            "violations:stats", _load_violation_stats,
+            settings.VIOLATION_STATS_CACHE_TTL, settings.STATS_CACHE_STALE_TTL
+        )
+
+async def _load_violation_stats() -> Dict[str, Any]:
+    # The shared load can outlive the request, so it does not use the request's session
+    async with AsyncSessionLocal() as db:
+        return violation_stats((await db.execute(VIOLATION_COUNTS_QUERY)).one())
+
+def violation_stats(counts) -> Dict[str, Any]:
+    """Statistics from a VIOLATION_COUNTS_QUERY row"""
+    return {
+        "total_violations": counts.total,
+        "open_violations": counts.open,
+        "in_progress_violations": counts.in_progress,
+        "resolved_violations": counts.resolved,
+        "critical_violations": counts.critical,
+        "high_violations": counts.high,
+        "resolution_rate": (counts.resolved / counts.total * 100) if counts.total > 0 else 0
+    }
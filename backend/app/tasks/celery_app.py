@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.core.config import settings
 
 # Create Celery instance
@@ -29,8 +30,12 @@ celery_app.conf.update(
 
 # Periodic tasks configuration
 celery_app.conf.beat_schedule = {
-    'daily-compliance-scan': {
+    'full-compliance-scan': {
         'task': 'app.tasks.compliance_tasks.daily_compliance_scan',
+        'schedule': settings.FULL_SCAN_INTERVAL_HOURS * 3600.0,
+    },
+    'daily-sampled-compliance-scan': {
+        'task': 'app.tasks.compliance_tasks.sampled_compliance_scan',
         'schedule': 86400.0,  # Run daily (24 hours)
     },
     'hourly-monitoring-check': {
@@ -41,8 +46,32 @@ celery_app.conf.beat_schedule = {
         'task': 'app.tasks.reporting_tasks.generate_weekly_report',
         'schedule': 604800.0,  # Run weekly (7 days)
     },
+    'weekly-rollup-rebuild': {
+        'task': 'app.tasks.reporting_tasks.rebuild_daily_rollups',
+        'schedule': 604800.0,  # Run weekly (7 days)
+    },
+    'weekly-ml-model-retrain': {
+        'task': 'app.tasks.compliance_tasks.retrain_ml_models',
+        'schedule': 604800.0,  # Run weekly (7 days)
+    },
+    'daily-partition-premake': {
+        'task': 'app.tasks.monitoring_tasks.create_future_partitions',
+        'schedule': 86400.0,  # Run daily; partitions are kept PARTITION_PREMAKE_MONTHS ahead
+    },
     'cleanup-old-data': {
         'task': 'app.tasks.monitoring_tasks.cleanup_old_data',
         'schedule': 86400.0,  # Run daily
     }
 }
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    """Prefork children must not reuse connections opened by the parent process"""
+    from app.core.database import engine
+    engine.dispose(close=False)
+
+@worker_process_shutdown.connect
+def flush_rule_metrics(**kwargs):
+    """Evaluations buffered since the last flush would otherwise be lost with the process"""
+    from app.services.rule_metrics import rule_metrics
+    rule_metrics.flush()
@@ -1,13 +1,17 @@
-from celery import current_task
+from celery import current_task, chord
 from app.tasks.celery_app import celery_app
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.services.compliance_service import ComplianceService
 from app.services.platform_service import PlatformService
 from app.services.product_service import ProductService
 from app.models.product import ComplianceStatus
 from typing import Dict, Any
+from datetime import datetime
 import logging
 import asyncio
+import uuid
+import redis
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +90,43 @@ def daily_compliance_scan(self):
     finally:
         db.close()
 
+@celery_app.task
+def sampled_compliance_scan(sample_size: int = None):
+    """Estimate each active platform's compliance rate from a stratified sample scan"""
+    db = SessionLocal()
+    try:
+        compliance_service = ComplianceService(db)
+        platforms = PlatformService(db).get_active_platforms()
+        
+        results = []
+        for platform in platforms:
+            try:
+                platform_result = asyncio.run(compliance_service.sample_scan_platform(platform.id, sample_size))
+                results.append({
+                    "platform_id": platform.id,
+                    "platform_name": platform.name,
+                    "sampling_run_id": platform_result.get("sampling_run_id"),
+                    "total_scanned": platform_result.get("total_scanned", 0),
+                    "estimate": platform_result.get("estimate")
+                })
+                logger.info(f"Sampled compliance scan completed for platform: {platform.name}")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error sample scanning platform {platform.name}: {str(e)}")
+                results.append({
+                    "platform_id": platform.id,
+                    "platform_name": platform.name,
+                    "error": str(e)
+                })
+        
+        return {"total_platforms": len(platforms), "platform_results": results}
+        
+    except Exception as e:
+        logger.error(f"Sampled compliance scan failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
 @celery_app.task(bind=True)
 def scan_single_product(self, product_url: str, platform_id: int, category_id: int):
     """Background task to scan a single product"""
@@ -112,8 +153,75 @@ def scan_single_product(self, product_url: str, platform_id: int, category_id: i
         db.close()
 
 @celery_app.task
-def update_compliance_scores():
-    """Task to recalculate compliance scores for all products"""
+def update_compliance_scores(run_id: str = None, chunk_size: int = None):
+    """
+    Task to recalculate compliance scores for all products.
+    Partitions the catalog into product id ranges and fans them out as a chord of
+    chunk tasks, so the rescore scales with the number of worker processes.
+    Passing the run_id of an interrupted run resumes it, skipping finished chunks.
+    Finished chunks are identified by their start id, so a resumed run keeps the
+    chunk_size and first product id it was started with.
+    """
+    db = SessionLocal()
+    try:
+        product_service = ProductService(db)
+        run_id = run_id or uuid.uuid4().hex
+        redis_client = _get_redis()
+        progress_key = _rescore_key(run_id, "progress")
+        layout = redis_client.hmget(progress_key, "chunk_size", "min_id")
+
+        min_id, max_id = product_service.get_product_id_bounds()
+        if min_id is None:
+            logger.info("No products found for compliance score update")
+            return {"run_id": run_id, "chunks": 0, "updated_products": 0}
+
+        if layout[0] is not None:
+            resumed_chunk_size, min_id = int(layout[0]), int(layout[1])
+            if chunk_size and chunk_size != resumed_chunk_size:
+                raise ValueError(
+                    f"Compliance score update {run_id} was started with chunk_size={resumed_chunk_size}, "
+                    f"cannot resume it with chunk_size={chunk_size}"
+                )
+            chunk_size = resumed_chunk_size
+        chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+
+        done_key = _rescore_key(run_id, "done")
+        completed = {int(start) for start in redis_client.smembers(done_key)}
+
+        # Products created since the run started only add chunks past the old end
+        ranges = [
+            (start, min(start + chunk_size, max_id + 1))
+            for start in range(min_id, max_id + 1, chunk_size)
+        ]
+        pending = [(start, end) for start, end in ranges if start not in completed]
+
+        redis_client.hset(progress_key, mapping={
+            "total_chunks": len(ranges),
+            "chunk_size": chunk_size,
+            "min_id": min_id,
+            **({} if layout[0] is not None else {"started_at": datetime.utcnow().isoformat()})
+        })
+        redis_client.expire(progress_key, settings.RESCORE_PROGRESS_TTL)
+
+        if not pending:
+            return {"run_id": run_id, "chunks": len(ranges), "pending_chunks": 0}
+
+        chord(
+            recompute_compliance_scores_chunk.s(run_id, start, end) for start, end in pending
+        )(summarize_compliance_score_update.s(run_id))
+
+        logger.info(f"Compliance score update {run_id}: dispatched {len(pending)}/{len(ranges)} chunks")
+        return {"run_id": run_id, "chunks": len(ranges), "pending_chunks": len(pending)}
+
+    except Exception as e:
+        logger.error(f"Compliance score update failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task(bind=True)
+def recompute_compliance_scores_chunk(self, run_id: str, start_id: int, end_id: int):
+    """Recompute scores for products with start_id <= id < end_id and write changes in bulk"""
     db = SessionLocal()
     try:
         from app.services.compliance_engine import LegalMetrologyRuleEngine
@@ -121,76 +229,182 @@ def update_compliance_scores():
         product_service = ProductService(db)
         compliance_engine = LegalMetrologyRuleEngine()
 
-        # Get all products
-        products = product_service.get_products(limit=10000)
-
-        updated_count = 0
-        for product in products:
+        scanned = 0
+        changed_scores = {}
+        for product in product_service.iter_products_in_id_range(start_id, end_id):
+            scanned += 1
             try:
-                # Recalculate compliance score
                 compliance_score = compliance_engine.get_compliance_score(product)
-
-                # Update product compliance_score field and extracted_data
-                if abs(product.compliance_score - compliance_score) > 5:
-                    extracted_data = product.extracted_data or {}
-                    extracted_data['compliance_score'] = compliance_score
-
-                    from app.schemas.product import ProductUpdate
-                    product_service.update_product(
-                        product.id,
-                        ProductUpdate(
-                            compliance_score=compliance_score,
-                            extracted_data=extracted_data
-                        )
-                    )
-                    updated_count += 1
-
+                if product.compliance_score is None or \
+                        abs(product.compliance_score - compliance_score) > settings.RESCORE_MIN_SCORE_CHANGE:
+                    changed_scores[product.id] = compliance_score
             except Exception as e:
                 logger.error(f"Error updating compliance score for product {product.id}: {str(e)}")
 
-        logger.info(f"Updated compliance scores for {updated_count} products")
-        return {"updated_products": updated_count}
+        updated_count = product_service.bulk_update_compliance_scores(changed_scores)
+
+        # Record the checkpoint only after the chunk's writes are committed
+        redis_client = _get_redis()
+        pipe = redis_client.pipeline()
+        pipe.sadd(_rescore_key(run_id, "done"), start_id)
+        pipe.expire(_rescore_key(run_id, "done"), settings.RESCORE_PROGRESS_TTL)
+        pipe.hincrby(_rescore_key(run_id, "progress"), "completed_chunks", 1)
+        pipe.hincrby(_rescore_key(run_id, "progress"), "scanned_products", scanned)
+        pipe.hincrby(_rescore_key(run_id, "progress"), "updated_products", updated_count)
+        pipe.execute()
+
+        return {"start_id": start_id, "end_id": end_id, "scanned": scanned, "updated": updated_count}
 
     except Exception as e:
-        logger.error(f"Compliance score update failed: {str(e)}")
+        db.rollback()
+        logger.error(f"Compliance score chunk {start_id}-{end_id} failed: {str(e)}")
         raise
     finally:
         db.close()
 
 @celery_app.task
-def run_ml_analysis():
+def summarize_compliance_score_update(chunk_results, run_id: str):
+    """Chord callback aggregating chunk results of a compliance score update"""
+    progress = get_compliance_score_update_progress(run_id)
+    _get_redis().hset(_rescore_key(run_id, "progress"), "finished_at", datetime.utcnow().isoformat())
+
+    logger.info(
+        f"Compliance score update {run_id} completed: "
+        f"{sum(r['updated'] for r in chunk_results)} products updated in this pass, "
+        f"{progress.get('updated_products', 0)} in total"
+    )
+    return progress
+
+def get_compliance_score_update_progress(run_id: str) -> Dict[str, Any]:
+    """Get progress of a (possibly still running) compliance score update"""
+    progress = _get_redis().hgetall(_rescore_key(run_id, "progress"))
+    result = {key.decode(): value.decode() for key, value in progress.items()}
+    for field in ("total_chunks", "completed_chunks", "scanned_products", "updated_products", "chunk_size", "min_id"):
+        result[field] = int(result.get(field, 0))
+    result["run_id"] = run_id
+    return result
+
+def _rescore_key(run_id: str, suffix: str) -> str:
+    return f"compliance_rescore:{run_id}:{suffix}"
+
+def _get_redis():
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+@celery_app.task
+def sweep_platform_compliance(platform_id: int, category_id: int = None):
+    """Set-based compliance sweep of a platform's stored products without re-scraping"""
+    db = SessionLocal()
+    try:
+        from app.services.compliance_sweep_service import ComplianceSweepService
+
+        result = ComplianceSweepService(db).sweep_platform(platform_id, category_id)
+        logger.info(f"Compliance sweep completed for platform {platform_id}: {result}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Compliance sweep failed for platform {platform_id}: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def run_ml_analysis(force_retrain: bool = False):
     """Task to run ML analysis on products for anomaly detection and insights"""
     db = SessionLocal()
+    run_id = None
     try:
-        from app.services.compliance_engine import LegalMetrologyRuleEngine
+        from app.services.ml_analysis_service import MLAnalysisService
+        from app.services.ml_result_service import MLResultService
 
-        product_service = ProductService(db)
-        compliance_engine = LegalMetrologyRuleEngine()
+        result_service = MLResultService(db)
+        run_id = result_service.create_run().id
 
-        # Get all products for ML analysis
-        products = product_service.get_products(limit=10000)
+        # Stream the whole catalog in bounded memory, storing per-product results under the run
+        ml_results = MLAnalysisService(db).run(force_retrain=force_retrain, run_id=run_id)
+        db_run = result_service.complete_run(run_id, ml_results)
+        pruned = result_service.prune_runs()
+        if pruned:
+            logger.info(f"Deleted {pruned} old ML analysis runs")
 
-        if not products:
+        if not ml_results:
             logger.info("No products found for ML analysis")
-            return {"message": "No products to analyze"}
-
-        # Run ML analysis
-        ml_results = compliance_engine.analyze_with_ml(products)
+            return {"run_id": run_id, "message": "No products to analyze"}
 
-        # Log insights
-        logger.info(f"ML Analysis completed: {ml_results}")
+        logger.info(f"ML analysis run {run_id} completed: {db_run.products_analyzed} products, "
+                    f"{db_run.anomaly_count} anomalies")
 
-        # Store ML results in database or cache (for now, just return)
         return {
             "analysis_completed": True,
-            "products_analyzed": len(products),
-            "anomalies_detected": len(ml_results.get('anomaly_detection', {}).get('anomalies', [])),
+            "run_id": run_id,
+            "products_analyzed": db_run.products_analyzed,
+            "anomalies_detected": db_run.anomaly_count,
             "clusters_found": len(ml_results.get('clustering', {}).get('clusters', {})),
-            "insights": ml_results.get('insights', {})
+            "model_versions": db_run.model_versions
         }
 
     except Exception as e:
         logger.error(f"ML analysis failed: {str(e)}")
+        if run_id is not None:
+            MLResultService(db).fail_run(run_id, str(e))
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def retrain_ml_models():
+    """Scheduled task to refit and publish ML models regardless of drift"""
+    return run_ml_analysis(force_retrain=True)
+
+@celery_app.task
+def rebuild_feature_store():
+    """Recompute the numeric feature rows of every product"""
+    db = SessionLocal()
+    try:
+        from app.services.feature_store_service import FeatureStoreService
+
+        rebuilt = FeatureStoreService(db).rebuild()
+        logger.info(f"Rebuilt features for {rebuilt} products")
+        return {"rebuilt_products": rebuilt}
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Feature store rebuild failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def rebuild_product_matching_index():
+    """Reindex identifiers and MinHash signatures of every product"""
+    db = SessionLocal()
+    try:
+        from app.services.product_matching_service import ProductMatchingService
+
+        indexed = ProductMatchingService(db).rebuild()
+        logger.info(f"Indexed {indexed} products for cross-listing matching")
+        return {"indexed_products": indexed}
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Product matching index rebuild failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def rebuild_distribution_sketches():
+    """Recompute price and unit-price sketches from the feature store"""
+    db = SessionLocal()
+    try:
+        from app.services.distribution_service import DistributionService
+
+        segments = DistributionService(db).rebuild()
+        logger.info(f"Rebuilt {segments} distribution sketches")
+        return {"sketches": segments}
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Distribution sketch rebuild failed: {str(e)}")
         raise
     finally:
         db.close()
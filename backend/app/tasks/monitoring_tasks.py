@@ -3,6 +3,7 @@ from app.tasks.celery_app import celery_app
 from app.core.database import SessionLocal, engine
 from app.services.violation_service import ViolationService
 from app.services.product_service import ProductService
+from app.services.partition_service import PartitionService
 from sqlalchemy import text
 from datetime import datetime, timedelta
 import psutil
@@ -70,7 +71,8 @@ def _check_database_health():
             "status": "healthy" if response_time < 1000 else "slow",
             "response_time_ms": response_time,
             "product_count": product_count,
-            "violation_count": violation_count
+            "violation_count": violation_count,
+            "pool": engine.pool.status()
         }
         
     except Exception as e:
@@ -112,10 +114,7 @@ def _check_application_health():
         
         # Check for stuck processes (products not scanned in 24 hours)
         yesterday = datetime.utcnow() - timedelta(days=1)
-        stale_products = db.execute(
-            text("SELECT COUNT(*) FROM products WHERE last_scanned < :yesterday OR last_scanned IS NULL"),
-            {"yesterday": yesterday}
-        ).scalar()
+        stale_products = product_service.count_stale_products(yesterday)
         
         return {
             "recent_products": recent_products,
@@ -142,18 +141,6 @@ def cleanup_old_data():
             "cleaned_items": {}
         }
         
-        # Clean up old resolved violations (older than 6 months)
-        six_months_ago = datetime.utcnow() - timedelta(days=180)
-        old_violations = db.execute(
-            text("""
-                DELETE FROM violations 
-                WHERE status = 'resolved' AND resolved_at < :six_months_ago
-                RETURNING id
-            """),
-            {"six_months_ago": six_months_ago}
-        )
-        cleanup_results["cleaned_items"]["old_violations"] = old_violations.rowcount
-        
         # Clean up old product scan data (keep only latest scan data)
         db.execute(text("""
             UPDATE products 
@@ -167,16 +154,13 @@ def cleanup_old_data():
             AND char_length(extracted_data::text) > 10000
         """))
         
-        # Clean up old reports (older than 1 year)
-        one_year_ago = datetime.utcnow() - timedelta(days=365)
-        old_reports = db.execute(
-            text("DELETE FROM reports WHERE generated_at < :one_year_ago RETURNING id"),
-            {"one_year_ago": one_year_ago}
-        )
-        cleanup_results["cleaned_items"]["old_reports"] = old_reports.rowcount
-        
         db.commit()
         
+        # Old violations and reports go a month at a time: archive, detach and drop the partition
+        partitions = PartitionService(db).retire_expired_partitions()
+        cleanup_results["cleaned_items"]["violation_partitions"] = partitions["violations"]
+        cleanup_results["cleaned_items"]["report_partitions"] = partitions["reports"]
+        
         logger.info(f"Data cleanup completed: {cleanup_results}")
         return cleanup_results
         
@@ -187,6 +171,22 @@ def cleanup_old_data():
     finally:
         db.close()
 
+@celery_app.task
+def create_future_partitions():
+    """Create the violation and report partitions for the coming months"""
+    db = SessionLocal()
+    try:
+        created = PartitionService(db).create_future_partitions()
+        logger.info(f"Partitions created: {created}")
+        return {"timestamp": datetime.utcnow().isoformat(), "created": created}
+        
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Partition creation failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
 @celery_app.task
 def alert_critical_violations():
     """Send alerts for critical violations"""
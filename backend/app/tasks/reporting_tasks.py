@@ -3,7 +3,14 @@ from app.core.database import SessionLocal
 from app.services.violation_service import ViolationService
 from app.services.product_service import ProductService
 from app.services.dashboard_service import DashboardService
+from app.services.sampling_service import SamplingService
+from app.services.rollup_service import (
+    RollupService, violation_trend_query, top_violation_types_query, platform_totals_query
+)
 from app.models.report import Report, ReportType
+from app.models.platform import Platform
+from app.models.violation import ViolationType
+from sqlalchemy import select
 from datetime import datetime, timedelta
 import logging
 
@@ -29,6 +36,7 @@ def generate_weekly_report():
             "summary": dashboard_service.get_dashboard_stats(),
             "violations": dashboard_service.get_violations_chart_data(7),
             "compliance_trends": dashboard_service.get_compliance_trends(7),
+            "compliance_estimates": SamplingService(db).get_estimate_history(start_date, end_date),
             "top_violations": _get_top_violations(db, start_date, end_date),
             "platform_performance": _get_platform_performance(db, start_date, end_date)
         }
@@ -80,6 +88,7 @@ def generate_monthly_report():
             "detailed_stats": dashboard_service.get_dashboard_stats(),
             "violation_analysis": _get_detailed_violation_analysis(db, start_date, end_date),
             "compliance_trends": dashboard_service.get_compliance_trends(30),
+            "compliance_estimates": SamplingService(db).get_estimate_history(start_date, end_date),
             "platform_comparison": _get_platform_comparison(db, start_date, end_date),
             "recommendations": _generate_recommendations(db, start_date, end_date)
         }
@@ -110,24 +119,25 @@ def generate_monthly_report():
     finally:
         db.close()
 
+@celery_app.task
+def rebuild_daily_rollups():
+    """Recompute the daily rollups, correcting drift from products that changed platform or category"""
+    db = SessionLocal()
+    try:
+        result = RollupService(db).rebuild()
+        logger.info(f"Daily rollups rebuilt: {result}")
+        return result
+        
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Daily rollup rebuild failed: {str(e)}")
+        raise
+    finally:
+        db.close()
+
 def _get_top_violations(db, start_date, end_date):
     """Get top violations for the period"""
-    from sqlalchemy import text
-    
-    result = db.execute(text("""
-        SELECT 
-            violation_type,
-            COUNT(*) as count,
-            AVG(CASE WHEN severity = 'critical' THEN 4
-                     WHEN severity = 'high' THEN 3
-                     WHEN severity = 'medium' THEN 2
-                     ELSE 1 END) as avg_severity
-        FROM violations 
-        WHERE detected_at BETWEEN :start_date AND :end_date
-        GROUP BY violation_type
-        ORDER BY count DESC
-        LIMIT 10
-    """), {"start_date": start_date, "end_date": end_date})
+    result = db.execute(top_violation_types_query(start_date, end_date))
     
     return [
         {
@@ -140,24 +150,12 @@ def _get_top_violations(db, start_date, end_date):
 
 def _get_platform_performance(db, start_date, end_date):
     """Get platform performance metrics"""
-    from sqlalchemy import text
-    
-    result = db.execute(text("""
-        SELECT 
-            p.name,
-            COUNT(DISTINCT pr.id) as total_products,
-            COUNT(v.id) as total_violations,
-            AVG(CASE WHEN pr.compliance_status = 'compliant' THEN 100
-                     WHEN pr.compliance_status = 'non_compliant' THEN 0
-                     ELSE 50 END) as compliance_rate
-        FROM platforms p
-        LEFT JOIN products pr ON p.id = pr.platform_id
-        LEFT JOIN violations v ON pr.id = v.product_id 
-            AND v.detected_at BETWEEN :start_date AND :end_date
-        WHERE pr.created_at BETWEEN :start_date AND :end_date
-        GROUP BY p.id, p.name
-        ORDER BY compliance_rate DESC
-    """), {"start_date": start_date, "end_date": end_date})
+    totals = platform_totals_query(start_date, end_date).subquery()
+    result = db.execute(
+        select(Platform.name, totals.c.total_products, totals.c.total_violations, totals.c.compliance_rate)
+        .join(totals, totals.c.platform_id == Platform.id)
+        .order_by(totals.c.compliance_rate.desc())
+    )
     
     return [
         {
@@ -187,25 +185,14 @@ def _generate_executive_summary(db, start_date, end_date):
 
 def _get_detailed_violation_analysis(db, start_date, end_date):
     """Get detailed violation analysis"""
-    from sqlalchemy import text
-    
     # Violation trends by type
-    trends = db.execute(text("""
-        SELECT 
-            violation_type,
-            DATE(detected_at) as date,
-            COUNT(*) as count
-        FROM violations 
-        WHERE detected_at BETWEEN :start_date AND :end_date
-        GROUP BY violation_type, DATE(detected_at)
-        ORDER BY date, violation_type
-    """), {"start_date": start_date, "end_date": end_date})
+    trends = db.execute(violation_trend_query(start_date, end_date))
     
     return {
         "trends": [
             {
-                "violation_type": row[0],
-                "date": row[1].isoformat(),
+                "violation_type": row[1],
+                "date": row[0].isoformat(),
                 "count": row[2]
             }
             for row in trends
@@ -223,14 +210,14 @@ def _generate_recommendations(db, start_date, end_date):
     recommendations = []
     
     for violation in top_violations[:3]:  # Top 3 violations
-        if violation["violation_type"] == "weight_declaration":
+        if violation["violation_type"] == ViolationType.WEIGHT_DECLARATION.name:
             recommendations.append({
                 "priority": "high",
                 "category": "Weight Declaration",
                 "recommendation": "Implement automated weight validation checks for product listings",
                 "impact": "Could reduce weight declaration violations by up to 70%"
             })
-        elif violation["violation_type"] == "price_display":
+        elif violation["violation_type"] == ViolationType.PRICE_DISPLAY.name:
             recommendations.append({
                 "priority": "critical",
                 "category": "Price Display",
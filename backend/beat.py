@@ -2,6 +2,10 @@
 """
 Celery beat scheduler entry point
 """
+import os
+
+os.environ.setdefault("DB_POOL_PROFILE", "beat")
+
 from app.tasks.celery_app import celery_app
 
 if __name__ == '__main__':
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Concurrent request throughput of the previous single shared connection
+(StaticPool) against a pooled engine profile. Each simulated request opens a
+session, runs a query of fixed server-side latency and closes the session,
+like a request through get_db.
+
+    DATABASE_URL=postgresql://... python benchmark_db_pool.py [--profile api] [--concurrency 32]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.config import settings
+from app.core.database import create_db_engine
+
+def run_load(engine, concurrency: int, requests: int, query_ms: float) -> dict:
+    Session = sessionmaker(bind=engine)
+    latencies = []
+
+    def request(_):
+        start = time.perf_counter()
+        db = Session()
+        try:
+            db.execute(text("SELECT pg_sleep(:seconds)"), {"seconds": query_ms / 1000}).scalar()
+        finally:
+            db.close()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(request, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", default="api", choices=sorted(settings.DB_POOL_PROFILES))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--query-ms", type=float, default=5.0, help="server-side latency of each query")
+    args = parser.parse_args()
+
+    engines = {
+        "static": create_engine(settings.DATABASE_URL, poolclass=StaticPool),
+        args.profile: create_db_engine(args.profile)
+    }
+    for name, engine in engines.items():
+        # Warm up so connection setup is not part of the measurement
+        run_load(engine, args.concurrency, args.concurrency, args.query_ms)
+        result = run_load(engine, args.concurrency, args.requests, args.query_ms)
+        print(f"{name:8} {result['throughput']:8.0f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+              f"p99 {result['p99_ms']:7.1f} ms  pool: {engine.pool.status()}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark and import budget for the API and Celery worker.
+Each target is imported in a fresh interpreter. A target that fails to import
+is reported as such and not checked against its budget, since a partial import
+says nothing about startup time.
+
+Exit status: 0 if every target imports within budget without a heavy ML/scraping
+dependency, 1 if a target is over budget or loads one, 2 if a target fails to import.
+
+    python benchmark_startup.py [--repeat N]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Only needed by ML analysis and scraping, which import them on first use;
+# tests/test_startup_imports.py checks the same modules
+HEAVY_MODULES = ("pandas", "sklearn", "scipy", "joblib", "selenium", "httpx", "bs4")
+
+# (name, import statement, budget in ms)
+TARGETS = [
+    ("api", "from main import app", 1500),
+    ("worker", "from app.tasks.celery_app import celery_app; "
+               "[__import__(name) for name in celery_app.conf.include]", 1500),
+]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+try:
+    exec({statement!r})
+    error = None
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+print(json.dumps({{
+    "import_ms": (time.perf_counter() - start) * 1000,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy!r})),
+    "error": error
+}}))
+"""
+
+def measure(statement: str) -> dict:
+    probe = PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per target; the fastest is reported")
+    args = parser.parse_args()
+
+    import_failed = over_budget = False
+    for name, statement, budget_ms in TARGETS:
+        runs = [measure(statement) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["import_ms"])
+        if best["error"]:
+            print(f"{name:8} import failed: {best['error']}")
+            import_failed = True
+            continue
+
+        problems = []
+        if best["import_ms"] > budget_ms:
+            problems.append(f"over budget of {budget_ms} ms")
+        if best["heavy_modules"]:
+            problems.append(f"loaded {', '.join(best['heavy_modules'])}")
+
+        print(f"{name:8} {best['import_ms']:8.0f} ms {best['max_rss_mb']:8.1f} MB  "
+              f"{'; '.join(problems) or 'ok'}")
+        over_budget = over_budget or bool(problems)
+
+    if import_failed:
+        return 2
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Per-product violation write latency of the scan path: one transaction and
+refresh per violation (previous create_violation loop) against the batched
+ViolationService.create_violations writer. Writes go to a throwaway product
+and are deleted afterwards.
+
+    DATABASE_URL=postgresql://... python benchmark_violation_writes.py [--products 200] [--violations 4]
+"""
+import argparse
+import time
+from sqlalchemy import delete
+from app.core.database import SessionLocal
+from app.models import user, platform, category, product, violation, product_snapshot  # noqa: F401
+from app.models.product import Product
+from app.models.violation import Violation, ViolationStatus, ViolationType, ViolationSeverity
+from app.services.violation_service import ViolationService
+
+def violation_data(index: int) -> dict:
+    return {
+        "violation_type": list(ViolationType)[index % len(ViolationType)],
+        "severity": ViolationSeverity.HIGH,
+        "description": f"Benchmark rule {index}: missing declaration",
+        "rule_reference": "Legal Metrology (Packaged Commodities) Rules, 2011",
+        "evidence": {"rule_id": f"B{index:03d}", "snapshot_hash": "0" * 64, "fields": {"weight": None}}
+    }
+
+def write_per_violation(db, product_id: int, violations: list):
+    for data in violations:
+        db_violation = Violation(product_id=product_id, status=ViolationStatus.OPEN, **data)
+        db.add(db_violation)
+        db.commit()
+        db.refresh(db_violation)
+
+def write_batched(db, product_id: int, violations: list):
+    ViolationService(db).create_violations([(product_id, data) for data in violations])
+
+def run(write, products: int, violations: list, product_id: int) -> dict:
+    db = SessionLocal()
+    latencies = []
+    try:
+        for _ in range(products):
+            start = time.perf_counter()
+            write(db, product_id, violations)
+            latencies.append(time.perf_counter() - start)
+        db.execute(delete(Violation).where(Violation.product_id == product_id))
+        db.commit()
+    finally:
+        db.close()
+
+    latencies.sort()
+    return {
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=200, help="products written per mode")
+    parser.add_argument("--violations", type=int, default=4, help="violations per product")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    bench_product = Product(product_id="benchmark-violation-writes", product_name="Benchmark", source="benchmark")
+    db.add(bench_product)
+    db.commit()
+    product_id = bench_product.id
+    db.close()
+
+    violations = [violation_data(i) for i in range(args.violations)]
+    try:
+        for name, write in (("per-violation", write_per_violation), ("batched", write_batched)):
+            # Warm up connections and statement caches
+            run(write, 5, violations, product_id)
+            result = run(write, args.products, violations, product_id)
+            print(f"{name:14} {result['mean_ms']:7.2f} ms/product  p50 {result['p50_ms']:7.2f} ms  "
+                  f"p99 {result['p99_ms']:7.2f} ms  ({args.violations} violations per product)")
+    finally:
+        db = SessionLocal()
+        db.execute(delete(Product).where(Product.id == product_id))
+        db.commit()
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Query plan check for the service queries behind listings, filters, alerts and
+scoped scans. Each case calls the real service method while its SQL is
+captured, then every captured SELECT is EXPLAINed; the script exits non-zero
+if any plan sequentially scans a large table.
+
+Point it at a scratch database; unless --no-seed is given the tables are
+created and filled with a production-shaped data set first.
+
+    DATABASE_URL=postgresql://.../scratch python explain_queries.py [--products 50000] [--no-seed]
+"""
+import argparse
+import json
+import re
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from sqlalchemy import event, text
+from app.core.database import Base, engine, SessionLocal
+from app.models import (  # noqa: F401  register every table with Base.metadata
+    user, platform, category, product, violation, report, product_snapshot, product_feature,
+    product_match, ml_analysis, distribution_sketch, sampling_run, daily_rollup
+)
+from app.models.product import ComplianceStatus
+from app.models.violation import ViolationStatus, ViolationSeverity, ViolationType
+from app.services.product_service import ProductService, PRODUCT_PAGE_KEYS
+from app.services.violation_service import ViolationService, VIOLATION_PAGE_KEYS
+from app.services.sampling_service import SamplingService
+from app.core.pagination import next_cursor
+from app.core.partitions import PARTITIONED_TABLES, month_start, add_months, create_monthly_partitions
+
+LARGE_TABLES = {"products", "violations"}
+
+PLATFORMS = 10
+CATEGORIES = 20
+OFFICERS = 25
+
+def _second_page(get_page, keys, **filters):
+    return get_page(limit=100, cursor=next_cursor(get_page(limit=100, **filters), keys, 100), **filters)
+
+# (name, call); whole-table aggregates such as the dashboard counts are expected to scan and are not listed
+CASES = [
+    ("products: newest page", lambda db: ProductService(db).get_products(limit=100)),
+    ("products: keyset page", lambda db: _second_page(ProductService(db).get_products, PRODUCT_PAGE_KEYS)),
+    ("products: by platform", lambda db: ProductService(db).get_products(platform_id=3, limit=100)),
+    ("products: by category", lambda db: ProductService(db).get_products(category_id=7, limit=100)),
+    ("products: by platform and category",
+     lambda db: ProductService(db).get_products(platform_id=3, category_id=7, limit=100)),
+    ("products: non-compliant", lambda db: ProductService(db).get_products(
+        compliance_status=ComplianceStatus.NON_COMPLIANT, limit=100)),
+    ("products: by external id", lambda db: ProductService(db).get_product_by_product_id("P-1234")),
+    ("products: stale count", lambda db: ProductService(db).count_stale_products(
+        datetime.utcnow() - timedelta(days=1))),
+    ("products: violations of one", lambda db: ProductService(db).get_product(1234).violations),
+    ("sampling: strata of a platform", lambda db: SamplingService(db).build_plan(3)),
+    ("sampling: draw", lambda db: SamplingService(db).draw_sample(
+        3, [{"category_id": 7, "allocation": 20}])),
+    ("violations: newest page", lambda db: ViolationService(db).get_violations(limit=100)),
+    ("violations: keyset page",
+     lambda db: _second_page(ViolationService(db).get_violations, VIOLATION_PAGE_KEYS)),
+    ("violations: open", lambda db: ViolationService(db).get_violations(
+        status=ViolationStatus.OPEN, limit=100)),
+    ("violations: open keyset page", lambda db: _second_page(
+        ViolationService(db).get_violations, VIOLATION_PAGE_KEYS, status=ViolationStatus.OPEN)),
+    ("violations: open critical alert", lambda db: ViolationService(db).get_violations(
+        severity=ViolationSeverity.CRITICAL, status=ViolationStatus.OPEN, limit=100)),
+    ("violations: by type", lambda db: ViolationService(db).get_violations(
+        violation_type=ViolationType.UNIT_PRICING, limit=100)),
+    ("violations: officer queue", lambda db: ViolationService(db).get_violations(
+        assigned_officer_id=5, status=ViolationStatus.IN_PROGRESS, limit=100)),
+]
+
+SEED_SQL = [
+    f"INSERT INTO users (email, hashed_password, full_name, role, is_active) "
+    f"SELECT 'officer' || i || '@example.com', 'x', 'Officer ' || i, 'OFFICER', true "
+    f"FROM generate_series(1, {OFFICERS}) i",
+    f"INSERT INTO platforms (name, url, is_active) "
+    f"SELECT 'Platform ' || i, 'https://platform' || i || '.example.com', true FROM generate_series(1, {PLATFORMS}) i",
+    f"INSERT INTO categories (name, is_active) SELECT 'Category ' || i, true FROM generate_series(1, {CATEGORIES}) i",
+    # Mostly compliant and recently scanned, like a catalog under a weekly full scan with daily sampling
+    f"""INSERT INTO products (product_id, product_name, source, compliance_status, platform_id, category_id,
+                              last_scanned, created_at)
+        SELECT 'P-' || i, 'Product ' || i, 'https://example.com/p/' || i,
+               (ARRAY['COMPLIANT','COMPLIANT','COMPLIANT','COMPLIANT','COMPLIANT','COMPLIANT','COMPLIANT',
+                      'NON_COMPLIANT','PENDING','UNDER_REVIEW'])[1 + i % 10]::compliancestatus,
+               1 + i % {PLATFORMS}, 1 + (i / {PLATFORMS}) % {CATEGORIES},
+               CASE WHEN i % 50 = 0 THEN NULL ELSE now() - (i % 20) * interval '1 hour' END,
+               now() - (:products - i) * interval '1 minute'
+        FROM generate_series(1, :products) i""",
+    # Most violations end up resolved; open and critical ones are the minority the alerts look for
+    f"""INSERT INTO violations (violation_type, severity, status, description, detected_at, resolved_at,
+                                product_id, assigned_officer_id)
+        SELECT (ARRAY['WEIGHT_DECLARATION','PRICE_DISPLAY','COUNTRY_OF_ORIGIN','MANUFACTURER_INFO',
+                      'UNIT_PRICING','QUANTITY_DECLARATION','LABELING','PRICING_ANOMALY'])[1 + i % 8]::violationtype,
+               (CASE WHEN i % 20 = 0 THEN 'CRITICAL' WHEN i % 5 = 0 THEN 'HIGH'
+                     WHEN i % 2 = 0 THEN 'MEDIUM' ELSE 'LOW' END)::violationseverity,
+               s.status::violationstatus, 'Seeded violation',
+               now() - (:violations - i) * interval '20 seconds',
+               CASE WHEN s.status = 'RESOLVED' THEN now() - (:violations - i) * interval '10 seconds' END,
+               1 + (i * 7919) % :products,
+               CASE WHEN s.status IN ('IN_PROGRESS', 'RESOLVED') THEN 1 + i % {OFFICERS} END
+        FROM generate_series(1, :violations) i,
+             LATERAL (SELECT CASE WHEN i % 20 < 15 THEN 'RESOLVED' WHEN i % 20 < 17 THEN 'DISMISSED'
+                                  WHEN i % 20 < 19 THEN 'OPEN' ELSE 'IN_PROGRESS' END AS status) s""",
+]
+
+def seed(products: int, violations: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT EXISTS (SELECT 1 FROM products)")).scalar():
+            raise SystemExit("products is not empty; seed a scratch database or pass --no-seed")
+        # Violations are seeded 20 seconds apart, ending now
+        first_month = month_start(datetime.utcnow() - timedelta(seconds=20 * violations))
+        for table in PARTITIONED_TABLES:
+            create_monthly_partitions(conn, table, first_month, add_months(month_start(), 1))
+        for statement in SEED_SQL:
+            conn.execute(text(statement), {"products": products, "violations": violations})
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+@contextmanager
+def capture_selects():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def parent_table(relation):
+    # Monthly partitions such as violations_2024_01 are checked as their table
+    return re.sub(r"_\d{4}_\d{2}$", "", relation) if relation else relation
+
+def is_empty(db, relation) -> bool:
+    return not db.execute(text(f"SELECT EXISTS (SELECT 1 FROM {relation})")).scalar()
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+def explain_case(db, call, verbose: bool = False) -> Tuple[List[str], List[str]]:
+    """Run one case and EXPLAIN its SELECTs; returns the problems and the scans of large tables"""
+    with capture_selects() as statements:
+        call(db)
+    db.rollback()
+
+    problems = []
+    scans = []
+    for statement, parameters in statements:
+        plan = db.connection().exec_driver_sql(
+            "EXPLAIN (FORMAT JSON) " + statement, parameters
+        ).scalar()
+        root = (plan if isinstance(plan, list) else json.loads(plan))[0]["Plan"]
+        for node in plan_nodes(root):
+            if parent_table(node.get("Relation Name")) in LARGE_TABLES:
+                indexes = [n["Index Name"] for n in plan_nodes(node) if "Index Name" in n]
+                scans.append(f"{node['Node Type']} on {node['Relation Name']}"
+                             + (f" using {', '.join(indexes)}" if indexes else ""))
+                # Partitions created ahead of time are empty until their month starts
+                if node["Node Type"] == "Seq Scan" and not is_empty(db, node["Relation Name"]):
+                    problems.append(f"sequential scan on {node['Relation Name']}")
+        if verbose:
+            print(json.dumps(root, indent=1))
+    db.rollback()
+    return problems, scans
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--violations", type=int, default=200000)
+    parser.add_argument("--no-seed", action="store_true", help="explain against the existing data")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        seed(args.products, args.violations)
+
+    failed = False
+    db = SessionLocal()
+    try:
+        for name, call in CASES:
+            problems, scans = explain_case(db, call, args.verbose)
+            print(f"{name:36} {'; '.join(problems) or 'ok':32} {', '.join(scans)}")
+            failed = failed or bool(problems)
+    finally:
+        db.close()
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
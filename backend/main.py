@@ -1,11 +1,10 @@
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer
-import uvicorn
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, async_engine, Base
 from app.api.v1.api import api_router
 from app.core.auth import get_current_user
 
@@ -18,6 +17,7 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("Shutting down...")
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Automated Compliance Checker API",
@@ -33,6 +33,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include API router
@@ -51,6 +52,9 @@ async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
+    # Servers import main:app themselves; only running this file needs uvicorn
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
@@ -0,0 +1,115 @@
+import importlib.util
+import os
+from contextlib import contextmanager
+from pathlib import Path
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+# Database tests need a throwaway Postgres database; its schema is dropped and recreated,
+# e.g. TEST_DATABASE_URL=postgresql://postgres@localhost/compliance_test
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+from sqlalchemy import event, select, text
+from app.core.database import Base, engine, SessionLocal
+from app.core.partitions import PARTITIONED_TABLES, month_start, add_months, create_monthly_partitions
+# Every model is mapped before the first query, as in alembic/env.py
+from app.models import user, platform, category, product, violation, report, product_snapshot, product_feature, product_match, ml_analysis, distribution_sketch, sampling_run, daily_rollup
+
+def create_schema(before_create=None):
+    """
+    Recreate the public schema from the models, with monthly partitions around today.
+    before_create(connection) runs on the empty schema, e.g. to create older enum types.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+        if before_create:
+            before_create(conn)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        current = month_start()
+        for table in PARTITIONED_TABLES:
+            create_monthly_partitions(conn, table, add_months(current, -24), add_months(current, 3))
+
+VERSIONS = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+def run_migration(connection, filename, function="upgrade"):
+    """Run a function of a migration script, e.g. upgrade, in an Alembic operations context"""
+    spec = importlib.util.spec_from_file_location(filename, VERSIONS / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    context = MigrationContext.configure(connection)
+    with Operations.context(context), context.begin_transaction():
+        getattr(module, function)()
+
+@contextmanager
+def captured(db, prefix):
+    """SQL statements starting with prefix that db executes inside the block"""
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(prefix):
+            statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", before_cursor_execute)
+
+def rollups(db):
+    """Non-zero rollup counts by key"""
+    violations, products = daily_rollup.ViolationDailyRollup, daily_rollup.ProductDailyRollup
+    return (
+        {tuple(row[:-1]): row[-1] for row in db.execute(select(
+            violations.day, violations.platform_id, violations.violation_type,
+            violations.severity, violations.status, violations.count
+        ).where(violations.count != 0))},
+        {tuple(row[:-1]): row[-1] for row in db.execute(select(
+            products.day, products.platform_id, products.compliance_status,
+            products.count
+        ).where(products.count != 0))}
+    )
+
+@pytest.fixture(scope="session")
+def db_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    create_schema()
+    return engine
+
+@pytest.fixture
+def db(db_engine):
+    session = SessionLocal()
+    yield session
+    session.close()
+    tables = ", ".join(table.name for table in Base.metadata.sorted_tables)
+    with db_engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """In-memory Redis returned by every redis.Redis.from_url"""
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr("redis.Redis.from_url", lambda *args, **kwargs: client)
+    return client
+
+@pytest.fixture
+def catalog(db):
+    """Platform 1 and category 1 for products created by the tests"""
+    db.add_all([
+        platform.Platform(name="Shop", url="https://shop.example.com"),
+        category.Category(name="Grocery")
+    ])
+    db.commit()
+
+@pytest.fixture
+def rollup_triggers(db_engine):
+    """The rollup triggers of migration 0011, which create_all does not install"""
+    with db_engine.connect() as conn:
+        run_migration(conn, "0011_add_daily_rollups.py", "create_rollup_triggers")
+    yield
+    with db_engine.connect() as conn:
+        run_migration(conn, "0011_add_daily_rollups.py", "drop_rollup_triggers")
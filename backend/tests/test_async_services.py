@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from app.core.cache import result_cache
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.product import ComplianceStatus
+from app.schemas.product import ProductCreate
+from app.services.dashboard_service import AsyncDashboardService
+from app.services.product_service import AsyncProductService
+from app.services.violation_service import AsyncViolationService
+
+def run(coroutine_function):
+    """Run against a fresh async pool, since pooled asyncpg connections belong to one event loop"""
+    async def main():
+        try:
+            async with AsyncSessionLocal() as session:
+                return await coroutine_function(session)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(main())
+
+def test_create_product_matches_sync_build(db, catalog):
+    async def create(session):
+        return await AsyncProductService(session).create_product(ProductCreate(
+            product_id="p1", product_name="Tea", source="https://shop.example.com/p/1",
+            price=100.0, weight="1.5 kg", platform_id=1, category_id=1
+        ))
+
+    product = run(create)
+    assert product.id is not None
+    assert (product.net_quantity, product.quantity_unit) == (1500.0, "g")
+    assert product.compliance_status == ComplianceStatus.PENDING
+    assert product.violations == []
+
+def test_cached_stats_load_on_their_own_session(db, catalog, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(result_cache, "_async_client", fakeredis.FakeAsyncRedis())
+    async def stats(session):
+        # Without the request's session: the shared load may outlive the request
+        return (await AsyncViolationService(None).get_violation_stats(),
+                await AsyncDashboardService(None).get_dashboard_stats())
+
+    violation_stats, dashboard_stats = run(stats)
+    assert violation_stats["total_violations"] == 0
+    assert dashboard_stats["platforms"] == {"total": 1, "active": 1}
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import time
+import pytest
+import redis
+from app.core.cache import ResultCache
+
+@pytest.fixture
+def cache():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    cache = ResultCache(prefix="test")
+    cache._client = fakeredis.FakeRedis(server=server)
+    cache._async_client = fakeredis.FakeAsyncRedis(server=server)
+    return cache
+
+class Loader:
+    def __init__(self, value="v1", delay=0.0):
+        self.value, self.delay, self.calls = value, delay, 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+def test_get_or_set_loads_once(cache):
+    calls = []
+    load = lambda: calls.append(1) or {"total": 3}
+    assert cache.get_or_set("stats", load, 30) == {"total": 3}
+    assert cache.get_or_set("stats", load, 30) == {"total": 3}
+    assert len(calls) == 1
+
+def test_concurrent_misses_share_one_load(cache):
+    loader = Loader(delay=0.05)
+    async def main():
+        return await asyncio.gather(*(cache.get_or_refresh("stats", loader, 30, 300) for _ in range(10)))
+    assert asyncio.run(main()) == ["v1"] * 10
+    assert loader.calls == 1
+
+def test_cancelled_caller_does_not_cancel_the_shared_load(cache):
+    loader = Loader(delay=0.05)
+    async def main():
+        first = asyncio.create_task(cache.get_or_refresh("stats", loader, 30, 300))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(cache.get_or_refresh("stats", loader, 30, 300))
+        await asyncio.sleep(0.01)
+        # The caller that started the load and holds the refresh lock goes away
+        first.cancel()
+        return await second
+    assert asyncio.run(main()) == "v1"
+    assert loader.calls == 1
+    assert json.loads(cache.client.get("test:stats"))["value"] == "v1"
+    assert not cache.client.exists("test:stats:refresh")
+
+def test_stale_value_served_while_another_worker_refreshes(cache):
+    cache.client.set("test:stats", json.dumps({"value": "old", "fresh_until": time.time() - 1}))
+    cache.client.set("test:stats:refresh", "1")  # another process holds the refresh lock
+    loader = Loader("new")
+    async def main():
+        stale = await cache.get_or_refresh("stats", loader, 30, 300)
+        calls_while_locked = loader.calls
+        await cache.async_client.delete("test:stats:refresh")
+        return stale, calls_while_locked, await cache.get_or_refresh("stats", loader, 30, 300)
+
+    # Async clients belong to one event loop, so both reads run in the same one
+    assert asyncio.run(main()) == ("old", 0, "new")
+    assert json.loads(cache.client.get("test:stats"))["value"] == "new"
+    assert not cache.client.exists("test:stats:refresh")
+
+def test_redis_failure_falls_back_to_loader(cache, monkeypatch):
+    async def unavailable(*args, **kwargs):
+        raise redis.ConnectionError("down")
+    monkeypatch.setattr(cache.async_client, "get", unavailable)
+    monkeypatch.setattr(cache.client, "get", lambda *args: (_ for _ in ()).throw(redis.ConnectionError("down")))
+
+    assert asyncio.run(cache.get_or_refresh("stats", Loader("live"), 30, 300)) == "live"
+    assert cache.get_or_set("stats", lambda: "live", 30) == "live"
@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import insert, delete, update
+from app.models.product import Product
+from app.models.product_feature import ProductFeature
+from app.services.compliance_engine import LegalMetrologyRuleEngine
+from app.tasks import compliance_tasks
+from tests.conftest import captured
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Chunk ranges each update_compliance_scores call hands to the chord"""
+    calls = []
+    def chord(header):
+        calls.append([signature.args[1:] for signature in header])
+        return lambda callback: None
+    monkeypatch.setattr(compliance_tasks, "chord", chord)
+    return calls
+
+def _products(db, count, first=0):
+    db.execute(insert(Product), [
+        {"product_id": f"p{i}", "product_name": "Tea", "source": f"https://shop.example.com/p/{i}"}
+        for i in range(first, first + count)
+    ])
+    db.commit()
+
+def test_rescore_partitions_catalog(db, redis_client, dispatched):
+    _products(db, 10)
+    result = compliance_tasks.update_compliance_scores(run_id="run", chunk_size=4)
+    assert result == {"run_id": "run", "chunks": 3, "pending_chunks": 3}
+    assert dispatched[0] == [(1, 5), (5, 9), (9, 11)]
+    progress = compliance_tasks.get_compliance_score_update_progress("run")
+    assert (progress["chunk_size"], progress["min_id"], progress["total_chunks"]) == (4, 1, 3)
+
+def test_resume_keeps_chunk_layout(db, redis_client, dispatched):
+    _products(db, 10)
+    compliance_tasks.update_compliance_scores(run_id="run", chunk_size=4)
+    redis_client.sadd(compliance_tasks._rescore_key("run", "done"), 1)
+
+    # The lowest product is gone and new products were added since the run started
+    db.execute(delete(Product).where(Product.id == 1))
+    _products(db, 3, first=10)
+    result = compliance_tasks.update_compliance_scores(run_id="run")
+    assert result["pending_chunks"] == 3
+    assert dispatched[1] == [(5, 9), (9, 13), (13, 14)]
+
+def test_resume_refuses_other_chunk_size(db, redis_client, dispatched):
+    _products(db, 10)
+    compliance_tasks.update_compliance_scores(run_id="run", chunk_size=4)
+    with pytest.raises(ValueError, match="chunk_size=4"):
+        compliance_tasks.update_compliance_scores(run_id="run", chunk_size=5)
+    assert len(dispatched) == 1
+
+def test_finished_chunks_are_recorded(db, redis_client):
+    _products(db, 3)
+    result = compliance_tasks.recompute_compliance_scores_chunk("run", 1, 4)
+    assert result["scanned"] == 3
+    assert redis_client.smembers(compliance_tasks._rescore_key("run", "done")) == {b"1"}
+
+def test_only_scores_past_the_threshold_are_written(db, redis_client):
+    _products(db, 3)
+    score = LegalMetrologyRuleEngine().get_compliance_score(db.get(Product, 1))
+    # Within the threshold, past it, and never scored
+    db.execute(update(Product).where(Product.id == 1).values(compliance_score=score + 1))
+    db.execute(update(Product).where(Product.id == 2).values(compliance_score=score + 10))
+    db.add_all([ProductFeature(product_id=1, compliance_score=score + 1),
+                ProductFeature(product_id=2, compliance_score=score + 10)])
+    db.commit()
+
+    with captured(db, "UPDATE") as updates:
+        result = compliance_tasks.recompute_compliance_scores_chunk("run", 1, 4)
+    assert result["updated"] == 2
+    # One set-based statement for products and one for their features
+    assert len(updates) == 2
+
+    db.expire_all()
+    assert [p.compliance_score for p in db.query(Product).order_by(Product.id)] == [score + 1, score, score]
+    assert [f.compliance_score for f in db.query(ProductFeature).order_by(ProductFeature.product_id)] == [score + 1, score]
@@ -0,0 +1,40 @@
+from sqlalchemy import insert
+from app.models.product import Product, ComplianceStatus
+from app.models.violation import Violation, ViolationType, ViolationSeverity, ViolationStatus
+from app.services.dashboard_service import DashboardService
+from app.services.violation_service import ViolationService
+
+def _products(db, *statuses):
+    db.execute(insert(Product), [
+        {"product_id": str(i), "product_name": "Tea", "source": f"https://shop.example.com/{i}",
+         "platform_id": 1, "category_id": 1, "compliance_status": status}
+        for i, status in enumerate(statuses)
+    ])
+
+def _violation(product_id, severity, status, rule_id):
+    return {"product_id": product_id, "violation_type": ViolationType.LABELING, "severity": severity,
+            "status": status, "description": "Missing label", "evidence": {"rule_id": rule_id}}
+
+def test_dashboard_stats(db, catalog):
+    _products(db, ComplianceStatus.COMPLIANT, ComplianceStatus.COMPLIANT, ComplianceStatus.COMPLIANT,
+              ComplianceStatus.NON_COMPLIANT, ComplianceStatus.PENDING)
+    db.execute(insert(Violation), [
+        _violation(4, ViolationSeverity.CRITICAL, ViolationStatus.OPEN, "LM001"),
+        _violation(4, ViolationSeverity.CRITICAL, ViolationStatus.RESOLVED, "LM002"),
+        _violation(4, ViolationSeverity.HIGH, ViolationStatus.IN_PROGRESS, "LM003"),
+        _violation(4, ViolationSeverity.LOW, ViolationStatus.RESOLVED, "LM004"),
+    ])
+    db.commit()
+
+    stats = DashboardService(db).get_dashboard_stats()
+    assert stats["products"] == {
+        "total": 5, "compliant": 3, "non_compliant": 1, "pending": 1, "compliance_rate": 60.0
+    }
+    assert stats["violations"] == {
+        "total": 4, "open": 1, "resolved": 2, "critical": 1, "resolution_rate": 50.0
+    }
+    assert stats["platforms"] == {"total": 1, "active": 1}
+
+    violation_stats = ViolationService(db).get_violation_stats()
+    assert (violation_stats["in_progress_violations"], violation_stats["critical_violations"],
+            violation_stats["high_violations"]) == (1, 2, 1)
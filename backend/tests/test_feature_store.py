@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from sqlalchemy import event
+from app.models.product import Product
+from app.models.product_feature import ProductFeature
+from app.models.violation import Violation
+from app.schemas.product import ProductCreate, ProductScanRequest
+from app.services.compliance_service import ComplianceService
+from app.services.distribution_service import DistributionService
+from app.services.feature_store_service import FeatureStoreService
+from app.services.product_service import ProductService
+
+def _create(db, product_id, weight, price=100.0, category_id=1):
+    return ProductService(db).create_product(ProductCreate(
+        product_id=product_id, product_name="Tea", source=f"https://shop.example.com/{product_id}",
+        price=price, weight=weight, platform_id=1, category_id=category_id
+    ))
+
+def test_unit_price_is_per_base_unit(db, catalog):
+    store = FeatureStoreService(db)
+    grams = store.update_product_features(_create(db, "a", "500 g"))
+    litres = store.update_product_features(_create(db, "b", "1 l", price=50.0))
+    assert (grams.unit_price, grams.quantity_unit) == (0.2, "g")
+    assert (litres.unit_price, litres.quantity_unit) == (0.05, "ml")
+
+def test_unit_price_sketches_do_not_mix_units(db, catalog):
+    store, distributions = FeatureStoreService(db), DistributionService(db)
+    for i, weight in enumerate(["500 g", "1 kg", "250 g", "1 l", "6 pcs"]):
+        distributions.record_product(store.update_product_features(_create(db, f"p{i}", weight)))
+
+    assert distributions.get_sketch("unit_price_g").moments.count == 3
+    assert distributions.get_sketch("unit_price_ml").moments.count == 1
+    assert distributions.get_sketch("unit_price_count").moments.count == 1
+    assert distributions.get_distribution("unit_price_g")["max"] == pytest.approx(0.4)
+
+    # A rebuild from the feature store gives the same split
+    distributions.rebuild()
+    assert distributions.get_sketch("unit_price_g").moments.count == 3
+    assert distributions.get_sketch("unit_price_ml").moments.count == 1
+
+def test_feature_refresh_stamps_updated_at(db, catalog):
+    store = FeatureStoreService(db)
+    product = _create(db, "a", "500 g")
+    first = store.update_product_features(product).updated_at
+    product.price = 120.0
+    feature = store.update_product_features(product)
+    assert feature.price == 120.0
+    assert feature.updated_at > first
+
+@pytest.fixture
+def scan_service(db, catalog):
+    service = ComplianceService(db)
+    async def scrape(url, config):
+        return {"scraped_successfully": True, "product_name": "Tea", "price": 100.0, "weight": "500 g"}
+    service.scraping_service.scrape_product_data = scrape
+    return service
+
+def _scan(service):
+    return asyncio.run(service.scan_product_from_url(
+        ProductScanRequest(url="https://shop.example.com/p/1", platform_id=1, category_id=1)
+    ))
+
+def test_scan_commits_once(db, scan_service):
+    commits = []
+    event.listen(db, "after_commit", commits.append)
+    scrape = scan_service.scraping_service.scrape_product_data
+    async def scrape_outside_transaction(url, config):
+        assert not db.in_transaction()
+        return await scrape(url, config)
+    scan_service.scraping_service.scrape_product_data = scrape_outside_transaction
+
+    result = _scan(scan_service)
+    assert "error" not in result
+    # The platform lookup ends before the scrape, then every write is committed together
+    assert len(commits) == 2
+    assert db.get(ProductFeature, result["product_id"]).unit_price == 0.2
+
+def test_failed_scan_keeps_nothing(db, scan_service, monkeypatch):
+    def fail(feature, previous=None, commit=True):
+        raise RuntimeError("sketch store unavailable")
+    monkeypatch.setattr(scan_service.distribution_service, "record_product", fail)
+    assert "error" in _scan(scan_service)
+    assert db.query(Product).count() == 0
+    assert db.query(Violation).count() == 0
+    assert db.query(ProductFeature).count() == 0
+
+def test_rescan_records_only_changed_values(db, scan_service):
+    first, second = _scan(scan_service), _scan(scan_service)
+    assert first["product_id"] == second["product_id"]
+    distributions = DistributionService(db)
+    assert distributions.get_sketch("price").moments.count == 1
+    assert distributions.get_sketch("unit_price_g").moments.count == 1
+
+    async def repriced(url, config):
+        return {"scraped_successfully": True, "product_name": "Tea", "price": 120.0, "weight": "500 g"}
+    scan_service.scraping_service.scrape_product_data = repriced
+    assert "error" not in _scan(scan_service)
+    assert distributions.get_sketch("price").moments.count == 2
+    assert distributions.get_distribution("price")["max"] == 120.0
@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import text
+from app.models.product import Product
+from app.models.violation import Violation, ViolationType
+from app.services.compliance_engine import ANOMALY_RULE_ID, LegalMetrologyRuleEngine
+from app.services.violation_service import ViolationService
+from tests.conftest import create_schema, run_migration
+
+@pytest.fixture
+def pre_anomaly_schema(db_engine):
+    """The schema as of 0004: violationtype without PRICING_ANOMALY, no products.anomaly_score"""
+    old_types = ", ".join(f"'{t.name}'" for t in ViolationType if t is not ViolationType.PRICING_ANOMALY)
+    create_schema(lambda conn: conn.execute(text(f"CREATE TYPE violationtype AS ENUM ({old_types})")))
+    with db_engine.begin() as conn:
+        conn.execute(text("ALTER TABLE products DROP COLUMN anomaly_score"))
+    yield db_engine
+    # Later tests get the schema of the models again
+    create_schema()
+
+def test_anomaly_violation_after_0005(pre_anomaly_schema, db):
+    with pre_anomaly_schema.connect() as conn:
+        run_migration(conn, "0005_add_anomaly_score_to_products.py")
+
+    product = Product(product_id="p1", product_name="Tea", source="u", price=900.0, anomaly_score=0.2)
+    db.add(product)
+    db.commit()
+    anomaly = LegalMetrologyRuleEngine().create_anomaly_violation(product, 0.2)
+    result = ViolationService(db).record_violations(
+        [(product.id, anomaly)], product_ids=[product.id], rule_ids=[ANOMALY_RULE_ID]
+    )
+    assert result["inserted"] == 1
+    assert db.query(Violation).one().violation_type is ViolationType.PRICING_ANOMALY
+
+def test_0016_is_idempotent(db_engine):
+    with db_engine.connect() as conn:
+        run_migration(conn, "0016_add_pricing_anomaly_violation_type.py")
+        values = conn.execute(text("SELECT unnest(enum_range(NULL::violationtype))::text")).scalars().all()
+    assert values.count("PRICING_ANOMALY") == 1
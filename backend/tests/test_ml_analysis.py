@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+from sqlalchemy import insert
+from app.core.config import settings
+from app.models.category import Category
+from app.models.ml_analysis import MLAnalysisRun, MLProductResult, MLRunStatus
+from app.models.platform import Platform
+from app.models.product import Product
+from app.services.ml_analysis_service import MLAnalysisService
+from app.services.ml_result_service import MLResultService
+from app.services.model_registry import model_registry
+
+@pytest.fixture
+def registry_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "base_dir", str(tmp_path))
+    monkeypatch.setattr(model_registry, "_cache", {})
+    monkeypatch.setattr(settings, "ML_N_JOBS", 1)
+    return tmp_path
+
+@pytest.fixture
+def priced_catalog(db):
+    db.add_all([Platform(name=f"Shop {i}", url="https://shop.example.com") for i in range(2)])
+    db.add_all([Category(name=f"Category {i}") for i in range(2)])
+    db.commit()
+    rnd = np.random.default_rng(0)
+    db.execute(insert(Product), [
+        {
+            "product_id": str(i), "product_name": "Tea", "source": f"https://shop.example.com/p/{i}",
+            "platform_id": int(rnd.integers(1, 3)), "category_id": int(rnd.integers(1, 3)),
+            "price": float(rnd.lognormal(4, 1)) if i % 7 else None,
+            "net_quantity": float(rnd.integers(1, 1000)), "compliance_score": float(rnd.uniform(0, 100))
+        }
+        for i in range(1500)
+    ])
+    db.commit()
+
+def test_listed_anomalies_match_persisted_results(db, registry_dir, priced_catalog, monkeypatch):
+    monkeypatch.setattr(settings, "ML_RESULT_ID_LIMIT", 20)
+    run = MLAnalysisRun(status=MLRunStatus.RUNNING)
+    db.add(run)
+    db.commit()
+
+    result = MLAnalysisService(db, chunk_size=400).run(run_id=run.id)
+    db.commit()
+
+    persisted = dict(
+        db.query(MLProductResult.product_id, MLProductResult.anomaly_score)
+        .filter(MLProductResult.run_id == run.id, MLProductResult.is_anomaly.is_(True))
+    )
+    detection = result["anomaly_detection"]
+    assert detection["anomaly_count"] == len(persisted) > 20
+    assert detection["anomalies_truncated"]
+    # The 20 most anomalous persisted products, most anomalous first
+    listed = detection["anomalies"]
+    assert len(listed) == 20
+    assert set(listed) <= set(persisted)
+    assert [persisted[i] for i in listed] == sorted(persisted.values(), reverse=True)[:20]
+    assert sum(segment["anomaly_count"] for segment in result["segments"].values()) == len(persisted)
+
+def test_small_catalog_lists_every_anomaly(db, registry_dir, priced_catalog):
+    result = MLAnalysisService(db).run()
+    detection = result["anomaly_detection"]
+    assert len(detection["anomalies"]) == detection["anomaly_count"]
+    assert not detection["anomalies_truncated"]
+
+def test_segment_models_and_fallback(db, registry_dir, priced_catalog, monkeypatch):
+    # A third platform with too few products for a segment model of its own
+    db.add(Platform(name="Shop 2", url="https://shop.example.com"))
+    db.commit()
+    db.execute(insert(Product), [
+        {"product_id": f"small{i}", "product_name": "Tea", "source": f"https://small.example.com/p/{i}",
+         "platform_id": 3, "category_id": 1, "price": 50.0 + i, "net_quantity": 100.0}
+        for i in range(settings.ANOMALY_MIN_CATEGORY_SIZE - 1)
+    ])
+    db.commit()
+
+    result = MLAnalysisService(db).run()
+    assert set(result["segment_models"]) == {
+        "price_anomaly_category_1", "price_anomaly_category_2",
+        *(f"price_anomaly_segment_{c}_{p}" for c in (1, 2) for p in (1, 2))
+    }
+    assert result["segments"]["1:3"]["model"] == "price_anomaly_category_1"
+    assert result["segments"]["2:1"]["model"] == "price_anomaly_segment_2_1"
+
+    # Stored models are reused until they expire or drift
+    versions = result["segment_models"]
+    assert MLAnalysisService(db).run()["segment_models"] == versions
+
+def test_scan_time_score_matches_batch_score(db, registry_dir, priced_catalog):
+    from app.services.compliance_engine import LegalMetrologyRuleEngine
+    run = MLAnalysisRun(status=MLRunStatus.RUNNING)
+    db.add(run)
+    db.commit()
+    MLAnalysisService(db).run(run_id=run.id)
+    db.commit()
+
+    engine = LegalMetrologyRuleEngine()
+    results = dict(db.query(MLProductResult.product_id, MLProductResult.anomaly_score).filter(
+        MLProductResult.run_id == run.id, MLProductResult.anomaly_score.isnot(None)
+    ))
+    for product in db.query(Product).filter(Product.price > 0).limit(50):
+        assert engine.score_product_anomaly(product) == pytest.approx(results[product.id], abs=1e-4)
+
+def test_prune_keeps_latest_completed_runs(db, catalog):
+    db.add(Product(product_id="p1", product_name="Tea", source="https://shop.example.com/p/1",
+                   platform_id=1, category_id=1))
+    statuses = [MLRunStatus.COMPLETED, MLRunStatus.FAILED, MLRunStatus.COMPLETED,
+                MLRunStatus.RUNNING, MLRunStatus.COMPLETED, MLRunStatus.COMPLETED]
+    runs = [MLAnalysisRun(status=status) for status in statuses]
+    db.add_all(runs)
+    db.flush()
+    db.add_all([MLProductResult(run_id=run.id, product_id=1, anomaly_score=0.1) for run in runs])
+    db.commit()
+
+    assert MLResultService(db).prune_runs(keep=2) == 3
+    kept = [run_id for run_id, in db.query(MLAnalysisRun.id).order_by(MLAnalysisRun.id)]
+    assert kept == [runs[3].id, runs[4].id, runs[5].id]
+    assert {run_id for run_id, in db.query(MLProductResult.run_id)} == set(kept)
+    assert MLResultService(db).prune_runs(keep=2) == 0
+
+def test_prune_keeps_at_least_one_run(db):
+    with pytest.raises(ValueError, match="at least 1"):
+        MLResultService(db).prune_runs(keep=0)
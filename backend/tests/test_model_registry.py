@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.model_registry import ModelRegistry
+
+FEATURES = ["price", "unit_price"]
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path))
+
+def _data(mean=10.0, rows=200):
+    rnd = np.random.default_rng(0)
+    return rnd.normal(mean, 1.0, size=(rows, len(FEATURES)))
+
+def test_saved_model_is_latest(registry, tmp_path):
+    assert registry.load("price_anomaly") is None
+    metadata = registry.save("price_anomaly", {"weights": [1, 2]}, FEATURES, _data())
+    assert metadata["training_size"] == 200
+    assert metadata["feature_schema"] == FEATURES
+
+    # A fresh process loads the published version from disk
+    model, loaded = ModelRegistry(str(tmp_path)).load("price_anomaly")
+    assert model == {"weights": [1, 2]}
+    assert loaded["version"] == metadata["version"] == registry.latest_version("price_anomaly")
+
+def test_retraining_reasons(registry):
+    data = _data()
+    assert registry.needs_retraining(None, data, FEATURES) == "no_model"
+    metadata = registry.save("price_anomaly", {}, FEATURES, data)
+    assert registry.needs_retraining(metadata, _data(rows=50), FEATURES) is None
+    assert registry.needs_retraining(metadata, data, FEATURES + ["pack_count"]) == "feature_schema_changed"
+    assert registry.needs_retraining(metadata, _data(mean=12.0), FEATURES) == "drift"
+    stale = {**metadata, "trained_at": (
+        datetime.utcnow() - timedelta(hours=settings.MODEL_RETRAIN_INTERVAL_HOURS + 1)
+    ).isoformat()}
+    assert registry.needs_retraining(stale, data, FEATURES) == "expired"
+
+def test_old_versions_are_pruned(registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_STORE_KEEP_VERSIONS", 2)
+    versions = [registry.save("price_anomaly", {"n": n}, FEATURES, _data())["version"] for n in range(4)]
+    kept = sorted(path.name for path in (tmp_path / "price_anomaly").iterdir() if path.is_dir())
+    assert kept == versions[-2:]
+    assert registry.load("price_anomaly")[0] == {"n": 3}
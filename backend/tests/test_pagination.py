@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import insert
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor, next_cursor
+from app.models.product import Product
+from app.models.violation import Violation, ViolationType
+from app.services.product_service import ProductService, PRODUCT_PAGE_KEYS
+from app.services.violation_service import ViolationService, VIOLATION_PAGE_KEYS
+
+def test_cursor_round_trip():
+    detected_at = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    token = encode_cursor([detected_at, 42])
+    assert decode_cursor(token, VIOLATION_PAGE_KEYS) == [detected_at, 42]
+
+@pytest.mark.parametrize("token", ["not-a-cursor", encode_cursor([1, 2]), encode_cursor(["yesterday", 1])])
+def test_invalid_cursor(token):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, VIOLATION_PAGE_KEYS)
+
+def _pages(load, keys, limit):
+    items, cursor = [], None
+    while True:
+        page = load(limit=limit, cursor=cursor)
+        items += page
+        cursor = next_cursor(page, keys, limit)
+        if cursor is None:
+            return items
+
+def test_product_pages_cover_every_product_once(db, catalog):
+    db.execute(insert(Product), [
+        {"product_id": str(i), "product_name": "Tea", "source": f"https://shop.example.com/{i}",
+         "platform_id": 1, "category_id": 1}
+        for i in range(25)
+    ])
+    db.commit()
+    service = ProductService(db)
+    ids = [p.id for p in _pages(service.get_products, PRODUCT_PAGE_KEYS, 10)]
+    assert ids == list(range(25, 0, -1))
+    assert [p.id for p in service.get_products(skip=10, limit=10)] == ids[10:20]
+
+def test_violation_pages_are_stable_under_inserts(db, catalog):
+    db.add(Product(product_id="p1", product_name="Tea", source="https://shop.example.com/p1",
+                   platform_id=1, category_id=1))
+    db.commit()
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    rows = lambda first, count: [
+        # Pairs of violations share a detection time, so the id breaks the tie
+        {"product_id": 1, "violation_type": ViolationType.LABELING, "description": "Missing label",
+         "evidence": {"rule_id": f"R{i}"}, "detected_at": start + timedelta(minutes=i // 2)}
+        for i in range(first, first + count)
+    ]
+    db.execute(insert(Violation), rows(0, 15))
+    db.commit()
+
+    service = ViolationService(db)
+    first_page = service.get_violations(limit=10)
+    # Newer violations arriving between pages do not shift the next page
+    db.execute(insert(Violation), rows(100, 5))
+    db.commit()
+    second_page = service.get_violations(limit=10, cursor=next_cursor(first_page, VIOLATION_PAGE_KEYS, 10))
+
+    seen = [v.id for v in first_page + second_page]
+    assert sorted(seen) == list(range(1, 16))
+    assert seen == [v.id for v in sorted(first_page + second_page,
+                                         key=lambda v: (v.detected_at, v.id), reverse=True)]
@@ -0,0 +1,125 @@
+import csv
+import gzip
+from datetime import datetime, time, timezone
+import pytest
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.partitions import (
+    month_start, add_months, partition_name, list_partitions, list_detached_partitions, create_monthly_partitions
+)
+from app.models.product import Product
+from app.models.violation import Violation, ViolationType, ViolationSeverity, ViolationStatus
+from app.services.partition_service import PartitionService
+from app.services.rollup_service import RollupService
+from tests.conftest import rollups
+
+@pytest.fixture
+def partitions(db, db_engine, tmp_path, monkeypatch):
+    """Archives go to tmp_path; the partitions the test drops are recreated afterwards"""
+    monkeypatch.setattr(settings, "PARTITION_ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "VIOLATION_RETENTION_MONTHS", 6)
+    # Reports stay within retention
+    monkeypatch.setattr(settings, "REPORT_RETENTION_MONTHS", 36)
+    yield PartitionService(db)
+    db.close()
+    with db_engine.begin() as conn:
+        create_monthly_partitions(conn, "violations", add_months(month_start(), -24), add_months(month_start(), 3))
+
+def _add_violation(db, months_ago, status):
+    month = add_months(month_start(), -months_ago)
+    violation = Violation(
+        product_id=1, violation_type=ViolationType.LABELING, severity=ViolationSeverity.HIGH,
+        description="LM001 failed", evidence={"rule_id": "LM001"}, status=status,
+        detected_at=datetime(month.year, month.month, 15, tzinfo=timezone.utc)
+    )
+    db.add(violation)
+    return violation
+
+def _month_partition(months_ago):
+    return partition_name("violations", add_months(month_start(), -months_ago))
+
+def _product(db):
+    db.add(Product(product_id="p1", product_name="Tea", source="https://shop.example.com/p1",
+                   platform_id=1, category_id=1))
+    db.commit()
+
+def test_retire_expired_partitions(db, catalog, partitions):
+    _product(db)
+    archived = _add_violation(db, 20, ViolationStatus.RESOLVED)
+    carried = _add_violation(db, 10, ViolationStatus.OPEN)
+    _add_violation(db, 10, ViolationStatus.RESOLVED)
+    _add_violation(db, 8, ViolationStatus.RESOLVED)
+    _add_violation(db, 3, ViolationStatus.OPEN)
+    db.commit()
+    archived_id, carried_id = archived.id, carried.id
+
+    results = partitions.retire_expired_partitions()
+
+    # The open violation does not hold its month back
+    retired = {entry["partition"]: entry for entry in results["violations"]["retired"]}
+    assert list(retired) == [_month_partition(months) for months in range(24, 6, -1)]
+    assert results["violations"]["held"] == {}
+    assert results["reports"] == {"retired": [], "held": {}}
+    remaining = {name for name, _ in list_partitions(db.connection(), "violations")}
+    assert not remaining & set(retired)
+
+    assert (retired[_month_partition(10)]["carried_forward"], retired[_month_partition(10)]["archived_rows"]) == (1, 1)
+    kept = db.get(Violation, carried_id)
+    assert kept.status == ViolationStatus.OPEN
+    assert kept.detected_at == datetime.combine(add_months(month_start(), -6), time(), timezone.utc)
+    assert db.query(Violation).count() == 2
+
+    entry = retired[_month_partition(20)]
+    assert entry["archived_rows"] == 1
+    with gzip.open(entry["archive"], "rt", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [int(row["id"]) for row in rows] == [archived_id]
+
+def test_violation_reopened_during_retirement_holds_its_month(db, catalog, partitions, monkeypatch):
+    _product(db)
+    _add_violation(db, 10, ViolationStatus.OPEN)
+    _add_violation(db, 8, ViolationStatus.RESOLVED)
+    db.commit()
+    # As if the violation were reopened between the carry-forward and the detach
+    monkeypatch.setattr(partitions, "_carry_forward_active_violations", lambda month, cutoff: 0)
+
+    results = partitions.retire_expired_partitions()
+
+    assert [entry["partition"] for entry in results["violations"]["retired"]] == [
+        _month_partition(months) for months in range(24, 10, -1)
+    ]
+    assert results["violations"]["held"] == {_month_partition(10): 1}
+    # Re-attached, and the months after it wait for the next run
+    remaining = {name for name, _ in list_partitions(db.connection(), "violations")}
+    assert {_month_partition(10), _month_partition(8)} <= remaining
+    assert db.query(Violation).count() == 2
+
+def test_interrupted_retirement_is_finished(db, db_engine, catalog, partitions):
+    _product(db)
+    _add_violation(db, 20, ViolationStatus.RESOLVED)
+    db.commit()
+    with db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"ALTER TABLE violations DETACH PARTITION {_month_partition(20)}"))
+
+    results = partitions.retire_expired_partitions()
+
+    entry = results["violations"]["retired"][0]
+    assert (entry["partition"], entry["archived_rows"]) == (_month_partition(20), 1)
+    assert list_detached_partitions(db.connection(), "violations") == []
+
+def test_carried_violations_keep_rollups_consistent(db, catalog, partitions, rollup_triggers):
+    _product(db)
+    _add_violation(db, 10, ViolationStatus.OPEN)
+    _add_violation(db, 10, ViolationStatus.RESOLVED)
+    _add_violation(db, 3, ViolationStatus.OPEN)
+    db.commit()
+
+    partitions.retire_expired_partitions()
+    violation_rollups, _ = rollups(db)
+    day = lambda months_ago, day: add_months(month_start(), -months_ago).replace(day=day)
+    # The carried violation is counted on its new detection day; the archived one stays where it was
+    assert {(key[0], key[-1]): count for key, count in violation_rollups.items()} == {
+        (day(10, 15), "RESOLVED"): 1, (day(6, 1), "OPEN"): 1, (day(3, 15), "OPEN"): 1
+    }
+    RollupService(db).rebuild()
+    assert rollups(db)[0] == violation_rollups
@@ -0,0 +1,48 @@
+import asyncio
+from app.models.platform import Platform
+from app.models.product import Product
+from app.schemas.product import ProductCreate, ProductScanRequest
+from app.services.compliance_service import ComplianceService
+from app.services.product_matching_service import ProductMatchingService
+from app.services.product_service import ProductService
+
+def _create(db, product_id, name, platform_id=1, **fields):
+    return ProductService(db).create_product(ProductCreate(
+        product_id=product_id, product_name=name, source=f"https://shop.example.com/{product_id}",
+        price=100.0, brand="Tata", platform_id=platform_id, category_id=1, **fields
+    ))
+
+def test_identifier_and_near_duplicate_matches(db, catalog):
+    db.add(Platform(name="Other", url="https://other.example.com"))
+    db.commit()
+    service = ProductMatchingService(db)
+    salt = _create(db, "a", "Tata Salt Iodised Crystal", weight="1 kg", extracted_data={"ean": "4006381333931"})
+    same_salt = _create(db, "b", "TATA Salt - Iodised Crystal", platform_id=2, weight="1000g")
+    same_ean = _create(db, "c", "Something else", platform_id=2, extracted_data={"gtin": "04006381333931"})
+    _create(db, "d", "Basmati Rice", weight="5 kg")
+    for product in db.query(Product).all():
+        service.index_product(product)
+
+    matches = service.find_matches(salt)
+    assert [(m["product_id"], m["match_type"]) for m in matches] == [
+        (same_ean.id, "identifier"), (same_salt.id, "near_duplicate")
+    ]
+
+def test_scan_computes_match_keys_once(db, catalog, monkeypatch):
+    service = ComplianceService(db)
+    async def scrape(url, config):
+        return {"scraped_successfully": True, "product_name": "Tea", "price": 100.0, "weight": "500 g"}
+    service.scraping_service.scrape_product_data = scrape
+
+    calls = []
+    compute_keys = ProductMatchingService.compute_keys
+    def counting(self, product):
+        calls.append(product.id)
+        return compute_keys(self, product)
+    monkeypatch.setattr(ProductMatchingService, "compute_keys", counting)
+
+    result = asyncio.run(service.scan_product_from_url(
+        ProductScanRequest(url="https://shop.example.com/p/1", platform_id=1, category_id=1)
+    ))
+    assert "error" not in result
+    assert calls == [result["product_id"]]
@@ -0,0 +1,61 @@
+import asyncio
+from sqlalchemy import event, insert
+from app.models.platform import Platform
+from app.models.product import Product, ComplianceStatus
+from app.schemas.product import ProductCreate
+from app.services.compliance_service import ComplianceService
+from app.services.product_service import ProductService
+
+def _scanned(price, source="https://shop.example.com/p/1", platform_id=1, category_id=1):
+    product = ProductService.build_product(ProductCreate(
+        product_id="p1", product_name="Tea", source=source, price=price, weight="500 g",
+        platform_id=platform_id, category_id=category_id
+    ))
+    product.compliance_status = ComplianceStatus.COMPLIANT
+    product.compliance_score = 100.0
+    return product
+
+def test_upsert_inserts_then_updates_scanned_fields(db, catalog):
+    db.add(Platform(name="Other", url="https://other.example.com"))
+    db.commit()
+    service = ProductService(db)
+    first = service.upsert_scanned_product(_scanned(100.0))
+    db.commit()
+    assert first.last_scanned is not None and first.updated_at is None
+
+    second = service.upsert_scanned_product(_scanned(120.0, source="https://other.example.com/p/1", platform_id=2))
+    db.commit()
+    assert second.id == first.id
+    assert db.query(Product).count() == 1
+    # Scan results are replaced; where the product came from is kept
+    assert (second.price, second.net_quantity, second.compliance_status) == (120.0, 500.0, ComplianceStatus.COMPLIANT)
+    assert (second.source, second.platform_id) == ("https://shop.example.com/p/1", 1)
+    assert second.updated_at is not None and second.last_scanned >= first.last_scanned
+
+def test_platform_scan_reuses_loaded_products(db, catalog):
+    db.execute(insert(Product), [
+        {"product_id": f"p{i}", "product_name": "Tea", "source": f"https://shop.example.com/p/{i}",
+         "platform_id": 1, "category_id": 1}
+        for i in range(3)
+    ])
+    db.commit()
+    service = ComplianceService(db)
+    async def scrape(url, config):
+        return {"scraped_successfully": True, "product_name": "Tea", "price": 100.0, "weight": "500 g"}
+    service.scraping_service.scrape_product_data = scrape
+
+    lookups = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and ("FROM platforms" in statement or "FROM products" in statement):
+            lookups.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", before_cursor_execute)
+    try:
+        result = asyncio.run(service.bulk_scan_platform(1))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", before_cursor_execute)
+
+    assert result["successful_scans"] == 3
+    # One platform lookup and one product page, not one of each per URL
+    assert len(lookups) == 2
+    assert db.query(Product).count() == 3
+    assert all(p.price == 100.0 and p.last_scanned is not None for p in db.query(Product))
@@ -0,0 +1,60 @@
+import pytest
+from app.schemas.product import ProductCreate
+from app.services.compliance_engine import LegalMetrologyRuleEngine
+from app.services.product_service import ProductService
+from app.services.quantity_parser import Quantity, parse_quantity
+
+@pytest.mark.parametrize("text, expected", [
+    ("500 g", Quantity(500.0, "g")),
+    ("500g", Quantity(500.0, "g")),
+    ("1.5 KG", Quantity(1500.0, "g")),
+    ("250 mg", Quantity(0.25, "g")),
+    ("1 l", Quantity(1000.0, "ml")),
+    ("75 cl", Quantity(750.0, "ml")),
+    ("1,000 ml", Quantity(1000.0, "ml")),
+    ("2 x 500 g", Quantity(1000.0, "g", 2)),
+    ("500 g x 2", Quantity(1000.0, "g", 2)),
+    ("200 ml pack of 6", Quantity(1200.0, "ml", 6)),
+    ("12 pcs", Quantity(12.0, "count")),
+    ("Net Wt: 16 oz", Quantity(453.592, "g")),
+])
+def test_parse_quantity_normalizes_to_base_units(text, expected):
+    assert parse_quantity(text) == expected
+
+@pytest.mark.parametrize("text", [None, "", "   ", "500", "best before 2025", "goods"])
+def test_parse_quantity_without_quantity(text):
+    assert parse_quantity(text) is None
+
+def test_quantities_compare_only_within_a_unit():
+    declared = parse_quantity("1 kg")
+    assert declared.is_comparable(parse_quantity("950 g"))
+    assert not declared.is_comparable(parse_quantity("1 l"))
+    assert declared.relative_difference(parse_quantity("950 g")) == pytest.approx(0.05)
+
+def _product(weight=None, **extracted):
+    return ProductService(None).build_product(ProductCreate(
+        product_id="p1", product_name="Tea", source="https://shop.example.com/p/1",
+        price=100.0, weight=weight, extracted_data=extracted, platform_id=1, category_id=1
+    ))
+
+def _failed_rules(product):
+    engine = LegalMetrologyRuleEngine()
+    return {v["evidence"]["rule_id"] for v in engine.validate_product(product)} & {"LM001", "LM006"}
+
+def test_declared_weight_is_normalized():
+    product = _product("1.5 kg")
+    assert (product.net_quantity, product.quantity_unit) == (1500.0, "g")
+
+def test_description_weight_is_not_a_declaration():
+    product = _product(extracted_weight="500 g")
+    assert product.net_quantity is None
+    assert _failed_rules(product) == {"LM001"}
+
+def test_net_quantity_within_tolerance():
+    assert _failed_rules(_product("1 kg", extracted_weight="980 g")) == set()
+
+def test_net_quantity_outside_tolerance():
+    assert _failed_rules(_product("1 kg", extracted_weight="900 g")) == {"LM006"}
+
+def test_net_quantity_ignores_other_units():
+    assert _failed_rules(_product("1 kg", extracted_weight="500 ml")) == set()
@@ -0,0 +1,12 @@
+import explain_queries
+
+def test_hot_queries_use_indexes(db):
+    # Large enough that the planner prefers the indexes, still a few seconds to seed
+    explain_queries.seed(products=20000, violations=60000)
+    problems = {
+        name: problems
+        for name, call in explain_queries.CASES
+        for problems, _ in [explain_queries.explain_case(db, call)]
+        if problems
+    }
+    assert problems == {}
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import insert, update, delete
+from app.models.product import Product, ComplianceStatus
+from app.models.violation import Violation, ViolationType, ViolationSeverity, ViolationStatus
+from app.services.dashboard_service import DashboardService
+from app.services.rollup_service import RollupService
+from tests.conftest import rollups
+
+def test_triggers_match_a_rebuild(db, catalog, rollup_triggers):
+    now = datetime.now(timezone.utc)
+    db.execute(insert(Product), [
+        {"product_id": str(i), "product_name": "Tea", "source": f"https://shop.example.com/{i}",
+         "platform_id": 1, "category_id": 1, "compliance_status": ComplianceStatus.PENDING}
+        for i in range(6)
+    ])
+    db.execute(insert(Violation), [
+        {"product_id": i % 3 + 1, "violation_type": ViolationType.LABELING, "severity": ViolationSeverity.HIGH,
+         "status": ViolationStatus.OPEN, "description": "Missing label", "evidence": {"rule_id": f"LM00{i}"},
+         "detected_at": now - timedelta(days=i % 2)}
+        for i in range(6)
+    ])
+    db.execute(update(Product).where(Product.id <= 4).values(compliance_status=ComplianceStatus.COMPLIANT))
+    db.execute(update(Violation).where(Violation.product_id == 1).values(status=ViolationStatus.RESOLVED))
+    db.execute(delete(Violation).where(Violation.product_id == 3))
+    db.execute(delete(Product).where(Product.id == 6))
+    db.commit()
+
+    violations, products = rollups(db)
+    assert sum(violations.values()) == 4
+    assert products == {(now.date(), 1, "COMPLIANT"): 4, (now.date(), 1, "PENDING"): 1}
+
+    RollupService(db).rebuild()
+    assert rollups(db) == (violations, products)
+
+def test_trend_charts_read_therollups(db, catalog, rollup_triggers):
+    today = datetime.now(timezone.utc)
+    db.execute(insert(Product), [{"product_id": "p1", "product_name": "Tea", "source": "https://shop.example.com/p1",
+                                  "platform_id": 1, "category_id": 1, "compliance_status": ComplianceStatus.NON_COMPLIANT}])
+    db.execute(insert(Violation), [
+        {"product_id": 1, "violation_type": violation_type, "severity": ViolationSeverity.LOW,
+         "description": "Missing", "evidence": {"rule_id": f"LM00{i}"}, "detected_at": today}
+        for i, violation_type in enumerate([ViolationType.LABELING, ViolationType.PRICE_DISPLAY, ViolationType.LABELING])
+    ])
+    db.commit()
+
+    dashboard = DashboardService(db)
+    assert dashboard.get_violations_chart_data(days=7) == [
+        {"date": today.date().isoformat(), "violation_type": "LABELING", "count": 2},
+        {"date": today.date().isoformat(), "violation_type": "PRICE_DISPLAY", "count": 1},
+    ]
+    assert dashboard.get_compliance_trends(days=7) == [
+        {"date": today.date().isoformat(), "compliance_status": "NON_COMPLIANT", "count": 1}
+    ]
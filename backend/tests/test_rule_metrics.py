@@ -0,0 +1,62 @@
+import redis
+from app.api.v1.endpoints import compliance
+from app.schemas.product import ProductCreate
+from app.services import compliance_service
+from app.services.compliance_engine import LegalMetrologyRuleEngine
+from app.services.compliance_service import ComplianceService
+from app.services.product_service import ProductService
+from app.services.rule_metrics import RuleMetrics
+
+def _product(**values):
+    return ProductService(None).build_product(ProductCreate(
+        product_id="p1", product_name="Tea", source="https://shop.example.com/p/1",
+        platform_id=1, category_id=2, **values
+    ))
+
+def test_counters_are_shared_between_processes(redis_client):
+    api, worker = RuleMetrics(flush_interval=3600), RuleMetrics(flush_interval=3600)
+    engine = LegalMetrologyRuleEngine(metrics=worker)
+    engine.validate_product(_product(price=100.0, weight="500 g"))
+    engine.validate_product(_product())
+    # Buffered until the interval elapses
+    assert api.snapshot()["total_evaluations"] == 0
+
+    worker.flush()
+    stats = api.snapshot()
+    assert stats["total_evaluations"] == 12
+    price = stats["rules"]["LM002"]
+    assert (price["evaluations"], price["failures"], price["hit_rate"]) == (2, 1, 0.5)
+    assert price["by_segment"] == [{"platform_id": 1, "category_id": 2, "passed": 1, "failed": 1}]
+    assert sum(price["latency_histogram"].values()) == 2
+    assert price["avg_evidence_bytes"] > 0
+
+def test_counters_accumulate_across_flushes(redis_client):
+    metrics = RuleMetrics(flush_interval=0)
+    metrics.record("LM001", 30.0, True, platform_id=None, category_id=3)
+    metrics.record("LM001", 7.0, False, platform_id=None, category_id=3, evidence_bytes=40)
+    rule = RuleMetrics().snapshot()["rules"]["LM001"]
+    assert rule["evaluations"] == 2
+    assert rule["max_time_us"] == 30.0
+    assert rule["total_time_ms"] == 0.037
+    assert rule["latency_histogram"]["le_10us"] == 1 and rule["latency_histogram"]["le_50us"] == 1
+    assert rule["by_segment"] == [{"platform_id": None, "category_id": 3, "passed": 1, "failed": 1}]
+
+def test_rule_stats_endpoint_reads_redis(redis_client, monkeypatch):
+    worker = RuleMetrics(flush_interval=0)
+    worker.record("LM003", 12.0, False)
+    monkeypatch.setattr(compliance_service, "rule_metrics", RuleMetrics())
+    stats = ComplianceService(None).get_rule_stats()
+    assert stats["available"] and stats["rules"]["LM003"]["failures"] == 1
+    # A sync endpoint, so the blocking Redis reads run in the threadpool
+    assert compliance.get_compliance_rule_stats(current_user=None)["rules"]["LM003"]["failures"] == 1
+
+def test_redis_outage_does_not_fail_evaluation(monkeypatch):
+    class Unreachable:
+        def pipeline(self, **kwargs):
+            raise redis.ConnectionError("down")
+        def smembers(self, key):
+            raise redis.ConnectionError("down")
+    metrics = RuleMetrics(flush_interval=0)
+    monkeypatch.setattr(metrics, "_client", Unreachable())
+    LegalMetrologyRuleEngine(metrics=metrics).validate_product(_product())
+    assert metrics.snapshot()["available"] is False
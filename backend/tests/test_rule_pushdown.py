@@ -0,0 +1,95 @@
+import random
+import pytest
+from sqlalchemy import select
+from app.models.product import Product
+from app.models.violation import Violation
+from app.services.compliance_engine import LegalMetrologyRuleEngine
+from app.services.compliance_sweep_service import ComplianceSweepService
+from app.services.product_service import _apply_normalized_quantity
+
+# Values that trip up the SQL translation: blanks, zeros, currency, non-numeric, JSON types
+EXTRACTED_VALUES = ["", "  ", "₹1,200", "abc", 0, 5, "12.5", "0", "India", "2 kg", "500 g", None,
+                    True, False, [], ["x"], {}, {"k": 1}, -3, ".5"]
+EXTRACTED_FIELDS = ["price", "mrp", "cost", "origin", "made_in", "country_of_origin", "packer", "company",
+                    "unit_price", "rate_per_kg", "weight", "extracted_weight"]
+
+@pytest.fixture
+def products(db, catalog):
+    rnd = random.Random(7)
+    for i in range(300):
+        extracted = {
+            field: rnd.choice(EXTRACTED_VALUES) for field in EXTRACTED_FIELDS if rnd.random() < 0.3
+        }
+        product = Product(
+            product_id=str(i), product_name="Tea", source=f"https://shop.example.com/p/{i}",
+            platform_id=1, category_id=1, extracted_data=extracted,
+            price=rnd.choice([None, 0, 10.0]), weight=rnd.choice([None, "", "1 kg", "abc"]),
+            country_of_origin=rnd.choice([None, "", " ", "IN"]), manufacturer=rnd.choice([None, "  ", "M"])
+        )
+        _apply_normalized_quantity(product)
+        db.add(product)
+    db.commit()
+    return db.query(Product).order_by(Product.id).all()
+
+@pytest.mark.parametrize("rule_id", ["LM002", "LM003", "LM004", "LM005"])
+def test_compiled_rule_matches_validator(db, products, rule_id):
+    engine = LegalMetrologyRuleEngine()
+    passed_in_sql = dict(db.execute(select(Product.id, engine.compile_rule_to_sql(rule_id))).all())
+    validator = engine._validators[rule_id]
+    mismatched = [
+        (product.id, product.extracted_data) for product in products
+        if passed_in_sql[product.id] != validator(product, product.extracted_data or {})
+    ]
+    assert mismatched == []
+
+def test_parser_rules_stay_in_python():
+    engine = LegalMetrologyRuleEngine()
+    assert engine.compile_rule_to_sql("LM001") is None
+    assert engine.compile_rule_to_sql("LM006") is None
+
+def test_sweep_matches_rule_engine(db, products):
+    engine = LegalMetrologyRuleEngine()
+    expected = {}
+    for product in products:
+        violations = engine.validate_product(product)
+        expected[product.id] = (
+            engine.calculate_score(violations), sorted(v["evidence"]["rule_id"] for v in violations)
+        )
+
+    ComplianceSweepService(db).sweep_platform(1)
+    db.expire_all()
+    found = {}
+    for product_id, rule_id in db.execute(select(Violation.product_id, Violation.evidence["rule_id"].as_string())):
+        found.setdefault(product_id, []).append(rule_id)
+    for product in db.query(Product):
+        rules = sorted(found.get(product.id, []))
+        assert (product.compliance_score, rules) == expected[product.id]
+        assert product.violation_count == len(rules)
+
+# Whitespace other than spaces, number spellings float() reads or rejects, and currency formatting
+PARITY_VALUES = ["\t", "\n ", " ", "　", " India\t", " M ", "1e3", "1E-05", " 2.5 ",
+                 "\t7\n", "inf", "nan", "-5", "+.5", "5.", "1_000", "१२", "0e5", "₹ 1,200 ", "12 5",
+                 1e20, 0.0, 3]
+
+@pytest.mark.parametrize("rule_id, field", [("LM002", "mrp"), ("LM003", "origin"), ("LM004", "packer")])
+@pytest.mark.parametrize("value", PARITY_VALUES)
+def test_pushdown_parity(db, catalog, rule_id, field, value):
+    product = Product(product_id="p1", product_name="Tea", source="https://shop.example.com/p/1",
+                      platform_id=1, category_id=1, extracted_data={field: value})
+    db.add(product)
+    db.commit()
+    engine = LegalMetrologyRuleEngine()
+    passed_in_sql = db.scalar(select(engine.compile_rule_to_sql(rule_id)).where(Product.id == product.id))
+    assert passed_in_sql == engine._validators[rule_id](product, product.extracted_data)
+
+@pytest.mark.parametrize("column", ["country_of_origin", "manufacturer"])
+@pytest.mark.parametrize("value", ["\t", "\r\n", " ", " ", " x\t"])
+def test_pushdown_parity_of_columns(db, catalog, column, value):
+    product = Product(product_id="p1", product_name="Tea", source="https://shop.example.com/p/1",
+                      platform_id=1, category_id=1, **{column: value})
+    db.add(product)
+    db.commit()
+    engine = LegalMetrologyRuleEngine()
+    rule_id = "LM003" if column == "country_of_origin" else "LM004"
+    passed_in_sql = db.scalar(select(engine.compile_rule_to_sql(rule_id)).where(Product.id == product.id))
+    assert passed_in_sql == engine._validators[rule_id](product, {})
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from sqlalchemy import insert
+from app.models.category import Category
+from app.models.product import Product, ComplianceStatus
+from app.models.sampling_run import SamplingRun
+from app.services.compliance_service import ComplianceService
+from app.services.sampling_service import SamplingService
+
+def test_estimate_weights_strata_by_population():
+    estimate = SamplingService(None).estimate([
+        {"population": 900, "scanned": 50, "compliant": 45},
+        {"population": 100, "scanned": 50, "compliant": 25},
+    ])
+    assert estimate["estimated_compliance_rate"] == pytest.approx(0.9 * 0.9 + 0.1 * 0.5)
+    assert estimate["ci_lower"] < estimate["estimated_compliance_rate"] < estimate["ci_upper"]
+
+def test_all_compliant_sample_keeps_an_interval():
+    estimate = SamplingService(None).estimate([{"population": 1000, "scanned": 40, "compliant": 40}])
+    assert estimate["estimated_compliance_rate"] == 1.0
+    assert estimate["ci_lower"] < 0.95
+    assert estimate["ci_upper"] == pytest.approx(1.0)
+
+def test_census_has_no_sampling_error():
+    estimate = SamplingService(None).estimate([{"population": 10, "scanned": 10, "compliant": 7}])
+    assert estimate["ci_lower"] == estimate["ci_upper"] == pytest.approx(0.7)
+
+@pytest.fixture
+def sampled_catalog(db, catalog):
+    """Category 1 is large and steady, category 2 small and volatile, category 3 tiny"""
+    db.add_all([Category(name="Volatile"), Category(name="Tiny")])
+    db.commit()
+    rows = []
+    for category_id, population, non_compliant in [(1, 2000, 40), (2, 500, 250), (3, 3, 0)]:
+        rows += [
+            {
+                "product_id": f"{category_id}-{i}", "product_name": "Tea", "platform_id": 1,
+                "source": f"https://shop.example.com/{category_id}/{i}", "category_id": category_id,
+                "compliance_status": ComplianceStatus.NON_COMPLIANT if i < non_compliant else ComplianceStatus.COMPLIANT
+            }
+            for i in range(population)
+        ]
+    db.execute(insert(Product), rows)
+    db.commit()
+
+def test_neyman_allocation(db, sampled_catalog):
+    plan = {s["category_id"]: s for s in SamplingService(db).build_plan(1, sample_size=200)}
+    assert sum(s["allocation"] for s in plan.values()) == 200
+    assert plan[3]["allocation"] == 3  # capped at the population
+    # The volatile category gets far more than its 20% population share
+    assert plan[2]["allocation"] > 0.4 * 197
+
+def test_sample_scan_stores_estimate(db, sampled_catalog):
+    service = ComplianceService(db)
+    async def scan(scan_request, platform=None, existing_product=None):
+        if existing_product.category_id == 3:
+            return {"success": False}
+        compliant = existing_product.category_id == 1
+        return {"success": True,
+                "compliance_status": ComplianceStatus.COMPLIANT if compliant else ComplianceStatus.NON_COMPLIANT}
+    service.scan_product_from_url = scan
+
+    result = asyncio.run(service.sample_scan_platform(1, sample_size=100))
+    assert result["total_scanned"] == 100
+    assert result["failed_scans"] == 3
+    run = db.get(SamplingRun, result["sampling_run_id"])
+    assert (run.population_size, run.sample_size, run.scanned_count) == (2503, 100, 97)
+    # The failed tiny stratum falls back to its historical rate, (0 + 1) / (3 + 2) violations
+    expected = (2000 * 1.0 + 500 * 0.0 + 3 * 0.8) / 2503
+    assert run.estimated_compliance_rate == pytest.approx(expected)
+    assert run.ci_lower < run.estimated_compliance_rate < run.ci_upper
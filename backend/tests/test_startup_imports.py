@@ -0,0 +1,22 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from benchmark_startup import HEAVY_MODULES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _loaded_modules(statement):
+    output = subprocess.run(
+        [sys.executable, "-c", f"{statement}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return {name.split(".")[0] for name in json.loads(output.strip().splitlines()[-1])}
+
+@pytest.mark.parametrize("statement", [
+    "from main import app",
+    "from worker import celery_app; [__import__(name) for name in celery_app.conf.include]",
+])
+def test_startup_does_not_import_ml_libraries(statement):
+    assert not _loaded_modules(statement) & set(HEAVY_MODULES)
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+from app.models.product import Product
+from app.models.violation import Violation, ViolationType, ViolationSeverity, ViolationStatus
+from app.services.violation_service import ViolationService, AUTO_RESOLVED_NOTE
+
+def _violation(rule_id):
+    return {"violation_type": ViolationType.LABELING, "severity": ViolationSeverity.HIGH,
+            "description": f"{rule_id} failed", "rule_reference": "Rule 6", "evidence": {"rule_id": rule_id}}
+
+def _product(db):
+    db.add(Product(product_id="p1", product_name="Tea", source="https://shop.example.com/p1",
+                   platform_id=1, category_id=1))
+    db.commit()
+
+def _statuses(db):
+    db.expire_all()
+    return {(v.evidence["rule_id"], v.status) for v in db.query(Violation)}
+
+def test_rescan_bumps_instead_of_duplicating(db, catalog):
+    _product(db)
+    service = ViolationService(db)
+    first = service.record_violations([(1, _violation("LM001"))], [1], ["LM001"])
+    second = service.record_violations([(1, _violation("LM001"))], [1], ["LM001"])
+
+    assert (first["inserted"], first["seen"]) == (1, 0)
+    assert (second["inserted"], second["seen"], second["resolved"]) == (0, 1, 0)
+    assert second["violation_ids"] == first["violation_ids"]
+    assert db.query(Violation).count() == 1
+
+def test_rescan_resolves_only_undetected_findings(db, catalog):
+    _product(db)
+    service = ViolationService(db)
+    service.record_violations([(1, _violation(rule)) for rule in ("LM001", "LM002", "LM003")],
+                              [1], ["LM001", "LM002", "LM003"])
+    # LM003 is not evaluated by the rescan, so it is left open
+    result = service.record_violations([(1, _violation("LM001"))], [1], ["LM001", "LM002"])
+
+    assert result["resolved"] == 1
+    assert _statuses(db) == {("LM001", ViolationStatus.OPEN), ("LM002", ViolationStatus.RESOLVED),
+                             ("LM003", ViolationStatus.OPEN)}
+    resolved = db.query(Violation).filter(Violation.status == ViolationStatus.RESOLVED).one()
+    assert resolved.resolution_notes == AUTO_RESOLVED_NOTE
+
+def test_resolution_ignores_newer_timestamps(db, catalog):
+    _product(db)
+    service = ViolationService(db)
+    service.record_violations([(1, _violation("LM001")), (1, _violation("LM002"))], [1], ["LM001", "LM002"])
+    # A concurrent scan that committed after this transaction began leaves a later last_seen_at
+    db.query(Violation).update({"last_seen_at": datetime.utcnow() + timedelta(hours=1)})
+    db.commit()
+
+    result = service.record_violations([(1, _violation("LM001"))], [1], ["LM001", "LM002"])
+    assert result["resolved"] == 1
+    assert _statuses(db) == {("LM001", ViolationStatus.OPEN), ("LM002", ViolationStatus.RESOLVED)}
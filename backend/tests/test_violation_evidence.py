@@ -0,0 +1,53 @@
+from app.models.product_snapshot import ProductSnapshot
+from app.schemas.product import ProductCreate
+from app.services.compliance_engine import LegalMetrologyRuleEngine
+from app.services.product_service import ProductService
+from app.services.violation_service import ViolationService
+
+def _scan(db, product):
+    engine = LegalMetrologyRuleEngine()
+    violations = engine.validate_product(product)
+    service = ViolationService(db)
+    service.save_product_snapshot(engine.get_product_snapshot(product), product.id)
+    return violations, [service.create_violation(v, product.id).id for v in violations]
+
+def test_evidence_references_shared_snapshot(db, catalog):
+    product = ProductService(db).create_product(ProductCreate(
+        product_id="p1", product_name="Tea", source="https://shop.example.com/p/1", weight="1 kg",
+        extracted_data={"description": "Assam tea " * 200, "extracted_weight": "2 kg"},
+        platform_id=1, category_id=1
+    ))
+    _scan(db, product)
+    violations, ids = _scan(db, product)
+
+    assert db.query(ProductSnapshot).count() == 1
+    quantity = next(v for v in violations if v["evidence"]["rule_id"] == "LM006")
+    # Only the fields the rule looked at are stored with the violation
+    assert quantity["evidence"]["fields"] == {
+        "weight": "1 kg", "net_quantity": 1000.0, "quantity_unit": "g", "extracted_weight": "2 kg"
+    }
+    assert "description" not in str(quantity["evidence"])
+
+    evidence = ViolationService(db).get_violation_evidence(ids[violations.index(quantity)])
+    assert evidence["snapshot_hash"] == quantity["evidence"]["snapshot_hash"]
+    assert evidence["product_data"]["weight"] == "1 kg"
+    assert evidence["extracted_data"]["description"].startswith("Assam tea")
+
+def test_snapshot_hash_follows_content():
+    engine = LegalMetrologyRuleEngine()
+    product = ProductService(None).build_product(ProductCreate(
+        product_id="p1", product_name="Tea", source="https://shop.example.com/p/1",
+        extracted_data={"a": 1, "b": 2}, platform_id=1, category_id=1
+    ))
+    first = engine.get_product_snapshot(product)["content_hash"]
+    product.extracted_data = {"b": 2, "a": 1}
+    assert engine.get_product_snapshot(product)["content_hash"] == first
+    product.price = 10.0
+    assert engine.get_product_snapshot(product)["content_hash"] != first
+
+def test_score_only_evaluation_skips_evidence():
+    product = ProductService(None).build_product(ProductCreate(
+        product_id="p1", product_name="Tea", source="https://shop.example.com/p/1", platform_id=1, category_id=1
+    ))
+    violations = LegalMetrologyRuleEngine().validate_product(product, include_evidence=False)
+    assert violations and all("evidence" not in v for v in violations)
@@ -0,0 +1,41 @@
+import asyncio
+from app.models.product import Product
+from app.models.violation import Violation, ViolationType, ViolationSeverity, ViolationStatus
+from app.schemas.product import ProductScanRequest
+from app.services import violation_service
+from app.services.compliance_service import ComplianceService
+from app.services.violation_service import ViolationService
+from tests.conftest import captured
+
+def _violation(rule_id, violation_type=ViolationType.LABELING):
+    return {"violation_type": violation_type, "severity": ViolationSeverity.HIGH,
+            "description": f"{rule_id} failed", "rule_reference": "Rule 6", "evidence": {"rule_id": rule_id}}
+
+def test_create_violations_in_batches(db, catalog, monkeypatch):
+    monkeypatch.setattr(violation_service, "VIOLATION_INSERT_BATCH", 3)
+    db.add(Product(product_id="p1", product_name="Tea", source="https://shop.example.com/p1",
+                   platform_id=1, category_id=1))
+    db.commit()
+    with captured(db, "INSERT INTO VIOLATIONS") as inserts:
+        ids = ViolationService(db).create_violations([(1, _violation(f"LM00{i}")) for i in range(7)])
+    assert len(inserts) == 3
+    assert ids == sorted(ids) and len(set(ids)) == 7
+
+    stored = {v.id: v for v in db.query(Violation)}
+    assert [stored[i].evidence["rule_id"] for i in ids] == [f"LM00{i}" for i in range(7)]
+    assert all(stored[i].status == ViolationStatus.OPEN and stored[i].rule_reference == "Rule 6" for i in ids)
+
+def test_scan_writes_its_violations_in_one_statement(db, catalog):
+    service = ComplianceService(db)
+    async def scrape(url, config):
+        # No weight, manufacturer or origin: several rules fail
+        return {"scraped_successfully": True, "product_name": "Tea", "price": 100.0}
+    service.scraping_service.scrape_product_data = scrape
+
+    with captured(db, "INSERT INTO VIOLATIONS") as inserts:
+        result = asyncio.run(service.scan_product_from_url(
+            ProductScanRequest(url="https://shop.example.com/p/1", platform_id=1, category_id=1)
+        ))
+    assert result["violations_found"] > 1
+    assert len(inserts) == 1
+    assert db.query(Violation).count() == result["violations_found"]
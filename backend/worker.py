@@ -2,6 +2,10 @@
 """
 Celery worker entry point
 """
+import os
+
+os.environ.setdefault("DB_POOL_PROFILE", "worker")
+
 from app.tasks.celery_app import celery_app
 
 if __name__ == '__main__':